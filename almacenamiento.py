@@ -0,0 +1,1220 @@
+"""
+Capa de Almacenamiento - Sistema de Turnos de Pádel
+Abstrae dónde se guardan reservas, turnos fijos, ausencias y configuración.
+
+Backends disponibles:
+- 'json':   archivos JSON en la carpeta de datos (formato histórico)
+- 'sqlite': base SQLite en modo WAL con tablas indexadas
+
+El backend se elige con el archivo almacenamiento.json de la carpeta de datos
+({"backend": "sqlite"}) o con la variable de entorno PADEL_ALMACENAMIENTO.
+
+Los dos backends admiten varios threads y varios procesos sobre la misma
+carpeta: el JSON con locks de archivo y escrituras atómicas (ver bloqueos.py
+y diario.py), SQLite con sus propias transacciones.
+
+Instantáneas: almacenamiento.instantanea() fija una versión de todos los
+datos para lecturas largas (reportes, backups). JSON: referencias al estado
+publicado, que nunca se modifica (sin copias). SQLite: una transacción de
+lectura en modo WAL. Con 'with almacenamiento.fijar():' todas las lecturas
+del thread salen de esa versión; las escrituras no esperan a nadie.
+
+Migración de datos existentes:
+    python almacenamiento.py migrar [--datos CARPETA]
+"""
+
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from bloqueos import bloqueo_para, escribir_atomico, franjas_para
+from cache_archivos import cache_global, descongelar
+from diario import DiarioReservas
+from metricas import metricas
+
+# ================================================================================
+# CONSTANTES
+# ================================================================================
+
+ARCHIVO_SELECCION = 'almacenamiento.json'   # Selección de backend (en data_path)
+ARCHIVO_SQLITE = 'padel.db'                 # Nombre por defecto de la base SQLite
+BACKENDS_VALIDOS = ('json', 'sqlite')
+
+# Columnas de la tabla rollups_diarios (mismos campos que finanzas.CAMPOS_FILA)
+CAMPOS_ROLLUP = ('turnos_regulares', 'turnos_fijos', 'total_recaudado', 'total_descuentos', 'total_extras')
+
+# Operaciones de datos que cada backend registra en metricas (tiempo por llamada)
+OPERACIONES_MEDIDAS = (
+    'cargar_config', 'guardar_config',
+    'cargar_reservas', 'guardar_reservas', 'modificar_reservas',
+    'obtener_reservas_horario', 'obtener_reservas_fecha', 'obtener_reservas_rango',
+    'agregar_reserva', 'eliminar_reserva', 'actualizar_reserva',
+    'cargar_turnos_fijos', 'guardar_turnos_fijos', 'modificar_turnos_fijos',
+    'agregar_turno_fijo', 'eliminar_turno_fijo', 'actualizar_turno_fijo',
+    'cargar_ausencias', 'guardar_ausencias', 'agregar_ausencia', 'eliminar_ausencia',
+    'cargar_rollups', 'guardar_rollups', 'borrar_rollups'
+)
+
+# Configuración por defecto al iniciar por primera vez
+CONFIG_POR_DEFECTO = {
+    'cantidad_canchas': 2,
+    'horario_inicio': '08:00',
+    'horario_fin': '22:00',
+    'duracion_turno': 90,
+    'precio_turno_regular': 10000,
+    'precio_turno_fijo': 9000,
+    'descuento_promocion': 0
+}
+
+
+def separar_clave(clave_fecha_hora):
+    """
+    Separa una clave "fecha_horario" en sus dos partes
+    Ejemplo: '2025-01-15_09:30' -> ('2025-01-15', '09:30')
+    """
+    fecha, _, horario = clave_fecha_hora.partition('_')
+    return fecha, horario
+
+
+def lectura(metodo):
+    """Lectura que, con una instantánea fijada en el thread (ver fijar), se responde desde ella"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        fijada = getattr(self._fijadas, 'instantanea', None)
+        if fijada is not None:
+            return getattr(fijada, metodo.__name__)(*args, **kwargs)
+        return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+# ================================================================================
+# INTERFAZ COMÚN
+# ================================================================================
+
+class AlmacenamientoBase:
+    """
+    Operaciones que todo backend debe ofrecer.
+
+    Las operaciones "completas" (cargar_*/guardar_*) leen o reemplazan una
+    colección entera. Las operaciones puntuales (agregar_*, eliminar_*, ...)
+    tienen aquí una implementación genérica basada en las completas; los
+    backends indexados las sobrescriben para tocar una sola fila.
+
+    cargar_*(solo_lectura=True) permite al backend devolver datos compartidos
+    que no deben modificarse (evita copias en los caminos de solo lectura).
+
+    Cada backend define self.franjas (bloqueos.FranjasBloqueo) para los
+    locks por turno fijo de bloqueo_turno_fijo, y self._fijadas
+    (threading.local) para la instantánea fijada de cada thread.
+
+    Cada backend mide sus OPERACIONES_MEDIDAS en metricas, así se ve el costo
+    real de cada llamada (la app usa tanto las completas como las puntuales).
+    """
+
+    nombre = None
+    franjas = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Se envuelve la versión que resuelve el backend: las llamadas a
+        # super() desde él llegan a la genérica sin medir (no se cuentan dos veces)
+        for operacion in OPERACIONES_MEDIDAS:
+            metodo = getattr(cls, operacion)
+            if not getattr(metodo, '_medida', False):
+                medida = metricas.medir(operacion)(metodo)
+                medida._medida = True
+                setattr(cls, operacion, medida)
+
+    # --- Operaciones completas (obligatorias) ---
+
+    def cargar_config(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def guardar_config(self, config):
+        raise NotImplementedError
+
+    def cargar_reservas(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def guardar_reservas(self, reservas):
+        raise NotImplementedError
+
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def guardar_turnos_fijos(self, turnos_fijos):
+        raise NotImplementedError
+
+    def cargar_ausencias(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def guardar_ausencias(self, ausencias):
+        raise NotImplementedError
+
+    def cerrar(self):
+        """Libera recursos del backend (conexiones, archivos abiertos)"""
+        pass
+
+    def estadisticas_cache(self):
+        """Contadores de la cache de lectura (None si el backend no usa cache)"""
+        return None
+
+    def version_datos(self, *colecciones):
+        """
+        Retorna un valor que cambia cada vez que se modifica alguna de las
+        colecciones pedidas ('config', 'reservas', 'turnos_fijos', 'ausencias').
+        Sirve para saber si un índice armado en memoria sigue vigente.
+        """
+        raise NotImplementedError
+
+    def bloqueo_turno_fijo(self, id_turno):
+        """
+        Lock de un turno fijo (entre threads y procesos): para leer y modificar
+        ese turno sin esperar a los que editan otros turnos fijos
+        """
+        return self.franjas.franja('turno_fijo', id_turno)
+
+    # --- Instantáneas ---
+
+    def instantanea(self):
+        """
+        Retorna una Instantanea: una versión fija de todos los datos, con las
+        mismas lecturas que el almacenamiento. Lo que devuelve no cambia
+        aunque otros threads o procesos escriban después. Hay que cerrarla.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def fijar(self, instantanea=None):
+        """
+        Mientras dura el 'with', las lecturas de este thread (cargar_*,
+        obtener_reservas_*, version_datos) salen de la instantánea (una nueva
+        si no se indica, que se cierra al salir). Solo para secuencias de
+        lectura: una escritura adentro leería la versión fijada.
+        Anidado: se sigue usando la que ya estaba fijada.
+        """
+        actual = self.instantanea_fijada()
+        if actual is not None:
+            yield actual
+            return
+        propia = instantanea is None
+        if propia:
+            instantanea = self.instantanea()
+        self._fijadas.instantanea = instantanea
+        try:
+            yield instantanea
+        finally:
+            self._fijadas.instantanea = None
+            if propia:
+                instantanea.cerrar()
+
+    def instantanea_fijada(self):
+        """Instantánea fijada en este thread (None si no hay)"""
+        return getattr(self._fijadas, 'instantanea', None)
+
+    def instantanea_vigente(self):
+        """False si este thread tiene fijada una instantánea y los datos ya cambiaron"""
+        fijada = self.instantanea_fijada()
+        return fijada is None or fijada.vigente()
+
+    # --- Reservas puntuales ---
+
+    def obtener_reservas_horario(self, fecha, horario):
+        """Retorna {cancha_id: reserva} para una fecha y horario"""
+        return self.cargar_reservas(solo_lectura=True).get(f"{fecha}_{horario}", {})
+
+    def obtener_reservas_fecha(self, fecha):
+        """Retorna {clave_fecha_hora: {cancha_id: reserva}} de un día"""
+        return {
+            clave: canchas
+            for clave, canchas in self.cargar_reservas(solo_lectura=True).items()
+            if separar_clave(clave)[0] == fecha
+        }
+
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        """Retorna {clave_fecha_hora: {cancha_id: reserva}} de fecha_desde a fecha_hasta (inclusive)"""
+        return {
+            clave: canchas
+            for clave, canchas in self.cargar_reservas(solo_lectura=True).items()
+            if fecha_desde <= separar_clave(clave)[0] <= fecha_hasta
+        }
+
+    def agregar_reserva(self, fecha, horario, cancha_id, reserva):
+        """
+        Agrega una reserva puntual
+        Retorna False si la cancha ya estaba reservada en ese horario
+        """
+        reservas = self.cargar_reservas()
+        clave_fecha_hora = f"{fecha}_{horario}"
+        canchas = reservas.setdefault(clave_fecha_hora, {})
+        if cancha_id in canchas:
+            return False
+        canchas[cancha_id] = reserva
+        self.guardar_reservas(reservas)
+        return True
+
+    def eliminar_reserva(self, fecha, horario, cancha_id):
+        """Elimina una reserva puntual. Retorna False si no existía"""
+        reservas = self.cargar_reservas()
+        clave_fecha_hora = f"{fecha}_{horario}"
+        if clave_fecha_hora not in reservas or cancha_id not in reservas[clave_fecha_hora]:
+            return False
+        del reservas[clave_fecha_hora][cancha_id]
+        # Limpiar si no hay más reservas en ese horario
+        if not reservas[clave_fecha_hora]:
+            del reservas[clave_fecha_hora]
+        self.guardar_reservas(reservas)
+        return True
+
+    def modificar_reservas(self, funcion):
+        """
+        Reemplaza todas las reservas por funcion(reservas) (recibe una copia
+        modificable y retorna las nuevas). Los backends lo hacen atómico:
+        nadie reserva ni cancela entre la lectura y la escritura.
+        """
+        self.guardar_reservas(funcion(self.cargar_reservas()))
+
+    def actualizar_reserva(self, fecha, horario, cancha_id, cambios):
+        """Actualiza campos de una reserva puntual. Retorna False si no existía"""
+        reservas = self.cargar_reservas()
+        clave_fecha_hora = f"{fecha}_{horario}"
+        if clave_fecha_hora not in reservas or cancha_id not in reservas[clave_fecha_hora]:
+            return False
+        reservas[clave_fecha_hora][cancha_id].update(cambios)
+        self.guardar_reservas(reservas)
+        return True
+
+    # --- Turnos fijos ---
+
+    def modificar_turnos_fijos(self, funcion):
+        """Igual que modificar_reservas, para la lista de turnos fijos"""
+        self.guardar_turnos_fijos(funcion(self.cargar_turnos_fijos()))
+
+    def agregar_turno_fijo(self, turno):
+        """
+        Agrega un turno fijo asignándole un ID nuevo
+        Retorna el turno creado, o None si ya existe uno para ese
+        día/horario/cancha
+        """
+        turnos_fijos = self.cargar_turnos_fijos()
+        for existente in turnos_fijos:
+            if (existente['dia_semana'] == turno['dia_semana'] and
+                    existente['horario'] == turno['horario'] and
+                    existente['cancha_id'] == turno['cancha_id']):
+                return None
+        turno['id'] = max([t.get('id', 0) for t in turnos_fijos], default=0) + 1
+        turnos_fijos.append(turno)
+        self.guardar_turnos_fijos(turnos_fijos)
+        return turno
+
+    def eliminar_turno_fijo(self, id_turno):
+        """Elimina un turno fijo por ID"""
+        turnos_fijos = self.cargar_turnos_fijos()
+        self.guardar_turnos_fijos([t for t in turnos_fijos if t['id'] != id_turno])
+
+    def actualizar_turno_fijo(self, id_turno, cambios):
+        """Actualiza campos de un turno fijo. Retorna False si no existía"""
+        turnos_fijos = self.cargar_turnos_fijos()
+        for turno in turnos_fijos:
+            if turno['id'] == id_turno:
+                turno.update(cambios)
+                self.guardar_turnos_fijos(turnos_fijos)
+                return True
+        return False
+
+    # --- Ausencias ---
+
+    def agregar_ausencia(self, ausencia):
+        """Agrega una ausencia. Retorna False si ya existía esa clave"""
+        ausencias = self.cargar_ausencias()
+        if any(a['clave'] == ausencia['clave'] for a in ausencias):
+            return False
+        ausencias.append(ausencia)
+        self.guardar_ausencias(ausencias)
+        return True
+
+    def eliminar_ausencia(self, clave_ausencia):
+        """Elimina la ausencia con esa clave (si existe)"""
+        ausencias = self.cargar_ausencias()
+        self.guardar_ausencias([a for a in ausencias if a['clave'] != clave_ausencia])
+
+    # --- Rollups financieros diarios (ver rollups.py) ---
+    # Un backend sin persistencia de rollups simplemente los recalcula siempre
+
+    def cargar_rollups(self, fecha_desde, fecha_hasta):
+        """Retorna {fecha: fila} de los días ya materializados en el rango"""
+        return {}
+
+    def version_rollups(self):
+        """
+        Valor que cambia con cada modificación de los datos de los que salen
+        los rollups (config, turnos fijos, reservas, ausencias) hecha por
+        cualquier proceso. Es siempre la de los datos actuales, aunque el
+        thread tenga una instantánea fijada.
+        """
+        return None
+
+    def guardar_rollups(self, filas, version=None):
+        """
+        Guarda/reemplaza filas {fecha: fila}
+        Con version (version_rollups() leída antes de calcularlas) solo las
+        guarda si los datos no cambiaron desde entonces; la comprobación y la
+        escritura son atómicas entre procesos. Retorna False si no las guardó.
+        """
+        return True
+
+    def borrar_rollups(self, fechas=None, dia_semana=None):
+        """
+        Descarta filas materializadas: las de esas fechas, las de ese día de
+        la semana (0=Lunes), o todas si no se indica nada
+        """
+        pass
+
+
+class Instantanea:
+    """
+    Una versión fija de los datos (ver AlmacenamientoBase.instantanea).
+    Mismas lecturas que el almacenamiento; se usa con 'with' o con cerrar().
+    """
+
+    def cargar_config(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def cargar_reservas(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def cargar_ausencias(self, solo_lectura=False):
+        raise NotImplementedError
+
+    def obtener_reservas_horario(self, fecha, horario):
+        raise NotImplementedError
+
+    def obtener_reservas_fecha(self, fecha):
+        raise NotImplementedError
+
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        raise NotImplementedError
+
+    def version_datos(self, *colecciones):
+        raise NotImplementedError
+
+    def vigente(self):
+        """True si sigue siendo la versión actual de los datos"""
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        self.cerrar()
+        return False
+
+
+# ================================================================================
+# BACKEND JSON (formato histórico)
+# ================================================================================
+
+class AlmacenamientoJSON(AlmacenamientoBase):
+    """
+    Guarda cada colección en su propio archivo JSON dentro de data_path.
+
+    - config y turnos fijos: las lecturas pasan por la cache de archivos
+      (solo se parsea el JSON de nuevo cuando el archivo cambió en disco)
+    - reservas y ausencias: viven en memoria y cada cambio se agrega al
+      diario append-only; reservas.json/ausencias.json se reescriben solo
+      al compactar (ver diario.py), agrupadas por fecha para que las
+      consultas de un día o rango no recorran todas las reservas; cada
+      mutación toma solo la franja de su (fecha, cancha) y las lecturas
+      no toman locks
+    - cada archivo tiene su lock entre procesos (archivo.lock), tomado en
+      toda escritura y en toda secuencia leer-modificar-escribir; editar
+      un turno fijo toma además el lock de ese turno
+    """
+
+    nombre = 'json'
+
+    def __init__(self, data_path, cache=None, compactacion_segundos=300, compactacion_entradas=1000):
+        self.data_path = data_path
+        self.cache = cache or cache_global
+        self.config_file = os.path.join(data_path, 'config.json')          # Configuración del sistema
+        self.reservas_file = os.path.join(data_path, 'reservas.json')      # Reservas puntuales
+        self.turnos_fijos_file = os.path.join(data_path, 'turnos_fijos.json')  # Turnos recurrentes
+        self.ausencias_file = os.path.join(data_path, 'ausencias.json')    # Ausencias de turnos fijos
+        self.diario_file = os.path.join(data_path, 'diario.jsonl')         # Cambios desde la última compactación
+        self.rollups_file = os.path.join(data_path, 'rollups_diarios.json')  # Totales financieros por día
+        self.diario = DiarioReservas(
+            self.reservas_file, self.ausencias_file, self.diario_file,
+            intervalo_compactacion=compactacion_segundos,
+            max_entradas=compactacion_entradas
+        )
+        self._bloqueo_config = bloqueo_para(self.config_file)
+        self._bloqueo_turnos = bloqueo_para(self.turnos_fijos_file)
+        self._bloqueo_rollups = bloqueo_para(self.rollups_file)
+        self.franjas = franjas_para(self.turnos_fijos_file)
+        self._fijadas = threading.local()
+
+    def _leer(self, ruta, por_defecto, solo_lectura):
+        return self.cache.leer(ruta, por_defecto, solo_lectura)
+
+    def _escribir(self, ruta, datos):
+        self.cache.escribir(ruta, datos, indent=4)
+
+    def estadisticas_cache(self):
+        """Aciertos/fallos de la cache de archivos"""
+        return self.cache.estadisticas()
+
+    def instantanea(self):
+        firma_config, config = self.cache.leer_version(self.config_file, dict(CONFIG_POR_DEFECTO))
+        firma_turnos, turnos_fijos = self.cache.leer_version(self.turnos_fijos_file, [])
+        return InstantaneaJSON(self, firma_config, config, firma_turnos, turnos_fijos, self.diario.estado())
+
+    @lectura
+    def version_datos(self, *colecciones):
+        versiones = {
+            'config': lambda: self.cache.firma(self.config_file),
+            'turnos_fijos': lambda: self.cache.firma(self.turnos_fijos_file),
+            'reservas': lambda: self.diario.version_reservas,
+            'ausencias': lambda: self.diario.version_ausencias,
+        }
+        return tuple(versiones[nombre]() for nombre in colecciones)
+
+    @lectura
+    def cargar_config(self, solo_lectura=False):
+        return self._leer(self.config_file, dict(CONFIG_POR_DEFECTO), solo_lectura)
+
+    def guardar_config(self, config):
+        with self._bloqueo_config:
+            self._escribir(self.config_file, config)
+
+    def cerrar(self):
+        self.diario.cerrar()
+
+    @lectura
+    def cargar_reservas(self, solo_lectura=False):
+        return self.diario.reservas(solo_lectura)
+
+    def guardar_reservas(self, reservas):
+        self.diario.reemplazar(reservas=reservas)
+
+    def modificar_reservas(self, funcion):
+        self.diario.reemplazar(reservas=funcion)
+
+    @lectura
+    def obtener_reservas_horario(self, fecha, horario):
+        return self.diario.reservas_horario(f"{fecha}_{horario}")
+
+    @lectura
+    def obtener_reservas_fecha(self, fecha):
+        return self.diario.reservas_fecha(fecha)
+
+    @lectura
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        return self.diario.reservas_rango(fecha_desde, fecha_hasta)
+
+    def agregar_reserva(self, fecha, horario, cancha_id, reserva):
+        return self.diario.reservar(f"{fecha}_{horario}", cancha_id, reserva)
+
+    def eliminar_reserva(self, fecha, horario, cancha_id):
+        return self.diario.cancelar(f"{fecha}_{horario}", cancha_id)
+
+    def actualizar_reserva(self, fecha, horario, cancha_id, cambios):
+        return self.diario.actualizar(f"{fecha}_{horario}", cancha_id, cambios)
+
+    @lectura
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        return self._leer(self.turnos_fijos_file, [], solo_lectura)
+
+    def guardar_turnos_fijos(self, turnos_fijos):
+        with self._bloqueo_turnos:
+            self._escribir(self.turnos_fijos_file, turnos_fijos)
+
+    # Leer-modificar-escribir de turnos_fijos.json: con el lock tomado toda la secuencia
+
+    def modificar_turnos_fijos(self, funcion):
+        with self._bloqueo_turnos:
+            super().modificar_turnos_fijos(funcion)
+
+    def agregar_turno_fijo(self, turno):
+        with self._bloqueo_turnos:
+            return super().agregar_turno_fijo(turno)
+
+    def eliminar_turno_fijo(self, id_turno):
+        with self.bloqueo_turno_fijo(id_turno), self._bloqueo_turnos:
+            super().eliminar_turno_fijo(id_turno)
+
+    def actualizar_turno_fijo(self, id_turno, cambios):
+        with self.bloqueo_turno_fijo(id_turno), self._bloqueo_turnos:
+            return super().actualizar_turno_fijo(id_turno, cambios)
+
+    @lectura
+    def cargar_ausencias(self, solo_lectura=False):
+        return self.diario.ausencias(solo_lectura)
+
+    def guardar_ausencias(self, ausencias):
+        self.diario.reemplazar(ausencias=ausencias)
+
+    def agregar_ausencia(self, ausencia):
+        return self.diario.marcar_ausencia(ausencia)
+
+    def eliminar_ausencia(self, clave_ausencia):
+        self.diario.quitar_ausencia(clave_ausencia)
+
+    def cargar_rollups(self, fecha_desde, fecha_hasta):
+        rollups = self._leer(self.rollups_file, {}, solo_lectura=True)
+        return {fecha: fila for fecha, fila in rollups.items() if fecha_desde <= fecha <= fecha_hasta}
+
+    def version_rollups(self):
+        # Del disco (no de la memoria del proceso): la ven igual todos los procesos
+        return (self.cache.firma(self.config_file), self.cache.firma(self.turnos_fijos_file), self.diario.marca())
+
+    def guardar_rollups(self, filas, version=None):
+        with self._bloqueo_rollups:
+            if version is not None and self.version_rollups() != version:
+                return False
+            rollups = self._leer(self.rollups_file, {}, solo_lectura=False)
+            rollups.update(filas)
+            self.cache.escribir(self.rollups_file, dict(sorted(rollups.items())), separators=(',', ':'))
+            return True
+
+    def borrar_rollups(self, fechas=None, dia_semana=None):
+        with self._bloqueo_rollups:
+            self._borrar_rollups(fechas, dia_semana)
+
+    def _borrar_rollups(self, fechas, dia_semana):
+        if fechas is None and dia_semana is None:
+            if os.path.exists(self.rollups_file):
+                os.remove(self.rollups_file)
+            self.cache.invalidar(self.rollups_file)
+            return
+        rollups = self._leer(self.rollups_file, {}, solo_lectura=False)
+        descartar = set(fechas or ())
+        if dia_semana is not None:
+            descartar.update(f for f in rollups if datetime.strptime(f, '%Y-%m-%d').weekday() == dia_semana)
+        if descartar & rollups.keys():
+            self.cache.escribir(
+                self.rollups_file,
+                {fecha: fila for fecha, fila in rollups.items() if fecha not in descartar},
+                separators=(',', ':')
+            )
+
+
+class InstantaneaJSON(Instantanea):
+    """
+    Referencias al estado publicado: config y turnos fijos congelados por la
+    cache, reservas y ausencias en un EstadoDiario. Nada se copia al fijarla.
+    """
+
+    def __init__(self, almacenamiento, firma_config, config, firma_turnos, turnos_fijos, estado):
+        self._almacenamiento = almacenamiento
+        self._firma_config = firma_config
+        self._config = config
+        self._firma_turnos = firma_turnos
+        self._turnos_fijos = turnos_fijos
+        self._estado = estado
+
+    def cargar_config(self, solo_lectura=False):
+        return self._config if solo_lectura else descongelar(self._config)
+
+    def cargar_reservas(self, solo_lectura=False):
+        reservas = self._estado.reservas()
+        return reservas if solo_lectura else descongelar(reservas)
+
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        return self._turnos_fijos if solo_lectura else descongelar(self._turnos_fijos)
+
+    def cargar_ausencias(self, solo_lectura=False):
+        ausencias = self._estado.lista_ausencias()
+        return ausencias if solo_lectura else descongelar(ausencias)
+
+    def obtener_reservas_horario(self, fecha, horario):
+        return self._estado.reservas_horario(f"{fecha}_{horario}")
+
+    def obtener_reservas_fecha(self, fecha):
+        return self._estado.reservas_fecha(fecha)
+
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        return self._estado.reservas_rango(fecha_desde, fecha_hasta)
+
+    def version_datos(self, *colecciones):
+        versiones = {
+            'config': self._firma_config,
+            'turnos_fijos': self._firma_turnos,
+            'reservas': self._estado.version_reservas,
+            'ausencias': self._estado.version_ausencias,
+        }
+        return tuple(versiones[nombre] for nombre in colecciones)
+
+    def vigente(self):
+        almacenamiento = self._almacenamiento
+        return (almacenamiento.diario.estado() is self._estado and
+                almacenamiento.cache.firma(almacenamiento.config_file) == self._firma_config and
+                almacenamiento.cache.firma(almacenamiento.turnos_fijos_file) == self._firma_turnos)
+
+
+# ================================================================================
+# BACKEND SQLITE (modo WAL, tablas indexadas)
+# ================================================================================
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS config (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reservas (
+    clave TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    horario TEXT NOT NULL,
+    cancha_id TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    UNIQUE (fecha, horario, cancha_id)
+);
+
+CREATE TABLE IF NOT EXISTS turnos_fijos (
+    id INTEGER,
+    dia_semana INTEGER,
+    horario TEXT,
+    cancha_id TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turnos_fijos_id ON turnos_fijos (id);
+CREATE INDEX IF NOT EXISTS idx_turnos_fijos_slot ON turnos_fijos (dia_semana, horario, cancha_id);
+
+CREATE TABLE IF NOT EXISTS ausencias (
+    clave TEXT NOT NULL,
+    fecha TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ausencias_clave ON ausencias (clave);
+CREATE INDEX IF NOT EXISTS idx_ausencias_fecha ON ausencias (fecha);
+
+-- Totales financieros por día (ver rollups.py)
+CREATE TABLE IF NOT EXISTS rollups_diarios (
+    fecha TEXT PRIMARY KEY,
+    turnos_regulares INTEGER NOT NULL,
+    turnos_fijos INTEGER NOT NULL,
+    -- Sin tipo: se guardan tal cual (int o float), igual que en el JSON
+    total_recaudado NOT NULL,
+    total_descuentos NOT NULL,
+    total_extras NOT NULL
+);
+
+-- Un contador por tabla, incrementado por triggers en cada cambio
+CREATE TABLE IF NOT EXISTS versiones (
+    coleccion TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO versiones (coleccion) VALUES ('config'), ('reservas'), ('turnos_fijos'), ('ausencias');
+"""
+
+# Triggers de versión: se generan para cada tabla y operación
+ESQUEMA_SQLITE += ''.join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS version_{tabla}_{operacion.lower()} AFTER {operacion} ON {tabla}
+BEGIN
+    UPDATE versiones SET version = version + 1 WHERE coleccion = '{tabla}';
+END;
+"""
+    for tabla in ('config', 'reservas', 'turnos_fijos', 'ausencias')
+    for operacion in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+
+class AlmacenamientoSQLite(AlmacenamientoBase):
+    """
+    Guarda los datos en una base SQLite.
+    Cada reserva, turno fijo y ausencia es una fila; el registro completo
+    se conserva como JSON en la columna 'datos' para no perder campos.
+    """
+
+    nombre = 'sqlite'
+
+    def __init__(self, ruta_db):
+        self.ruta_db = ruta_db
+        self.franjas = franjas_para(ruta_db)
+        self._fijadas = threading.local()
+        # Werkzeug atiende cada request en su propio thread: una conexión por thread
+        self._local = threading.local()
+        # Conexiones de las instantáneas (pueden cerrarse desde otro thread)
+        self._lecturas = []
+        self._lock_lecturas = threading.Lock()
+        conexion = self._conexion()
+        conexion.executescript(ESQUEMA_SQLITE)
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    def _transaccion(self):
+        """Abre una transacción de escritura (BEGIN IMMEDIATE)"""
+        return _TransaccionSQLite(self._conexion())
+
+    def cerrar(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+        with self._lock_lecturas:
+            lecturas, self._lecturas = self._lecturas, []
+        for conexion in lecturas:
+            conexion.close()
+
+    def instantanea(self):
+        with self._lock_lecturas:
+            conexion = self._lecturas.pop() if self._lecturas else None
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None, check_same_thread=False)
+        # En WAL, la primera lectura de la transacción fija la versión que ve
+        # (los escritores siguen sin esperar)
+        conexion.execute('BEGIN')
+        return InstantaneaSQLite(self, conexion, self._versiones(conexion))
+
+    def _devolver_lectura(self, conexion):
+        conexion.execute('COMMIT')
+        with self._lock_lecturas:
+            self._lecturas.append(conexion)
+
+    @staticmethod
+    def _decodificar(tabla, texto):
+        """JSON guardado en una columna -> datos (suma los bytes leídos a las métricas)"""
+        metricas.sumar_bytes_leidos(f'sqlite:{tabla}', len(texto))
+        return json.loads(texto)
+
+    @staticmethod
+    def _codificar(tabla, datos):
+        texto = json.dumps(datos)
+        metricas.sumar_bytes_escritos(f'sqlite:{tabla}', len(texto))
+        return texto
+
+    @staticmethod
+    def _versiones(conexion):
+        return dict(conexion.execute('SELECT coleccion, version FROM versiones').fetchall())
+
+    @lectura
+    def version_datos(self, *colecciones):
+        versiones = self._versiones(self._conexion())
+        return tuple(versiones[nombre] for nombre in colecciones)
+
+    # Las lecturas reciben la conexión: la propia del thread o la de una instantánea
+
+    # --- Configuración ---
+
+    @lectura
+    def cargar_config(self, solo_lectura=False):
+        return self._leer_config(self._conexion())
+
+    def _leer_config(self, conexion):
+        filas = conexion.execute('SELECT clave, valor FROM config ORDER BY rowid').fetchall()
+        if not filas:
+            return dict(CONFIG_POR_DEFECTO)
+        return {clave: self._decodificar('config', valor) for clave, valor in filas}
+
+    def guardar_config(self, config):
+        with self._transaccion() as cur:
+            cur.execute('DELETE FROM config')
+            cur.executemany(
+                'INSERT INTO config (clave, valor) VALUES (?, ?)',
+                [(clave, self._codificar('config', valor)) for clave, valor in config.items()]
+            )
+
+    # --- Reservas puntuales ---
+
+    def _agrupar_reservas(self, filas):
+        reservas = {}
+        for clave, cancha_id, datos in filas:
+            reservas.setdefault(clave, {})[cancha_id] = self._decodificar('reservas', datos)
+        return reservas
+
+    @lectura
+    def cargar_reservas(self, solo_lectura=False):
+        return self._leer_reservas(self._conexion())
+
+    def _leer_reservas(self, conexion):
+        filas = conexion.execute('SELECT clave, cancha_id, datos FROM reservas ORDER BY rowid').fetchall()
+        return self._agrupar_reservas(filas)
+
+    def _reemplazar_reservas(self, cur, reservas):
+        filas = []
+        for clave, canchas in reservas.items():
+            fecha, horario = separar_clave(clave)
+            for cancha_id, reserva in canchas.items():
+                filas.append((clave, fecha, horario, cancha_id, self._codificar('reservas', reserva)))
+        cur.execute('DELETE FROM reservas')
+        cur.executemany(
+            'INSERT INTO reservas (clave, fecha, horario, cancha_id, datos) VALUES (?, ?, ?, ?, ?)',
+            filas
+        )
+
+    def guardar_reservas(self, reservas):
+        with self._transaccion() as cur:
+            self._reemplazar_reservas(cur, reservas)
+
+    def modificar_reservas(self, funcion):
+        with self._transaccion() as cur:
+            filas = cur.execute('SELECT clave, cancha_id, datos FROM reservas ORDER BY rowid').fetchall()
+            self._reemplazar_reservas(cur, funcion(self._agrupar_reservas(filas)))
+
+    @lectura
+    def obtener_reservas_horario(self, fecha, horario):
+        return self._leer_reservas_horario(self._conexion(), fecha, horario)
+
+    def _leer_reservas_horario(self, conexion, fecha, horario):
+        filas = conexion.execute(
+            'SELECT cancha_id, datos FROM reservas WHERE fecha = ? AND horario = ? ORDER BY rowid',
+            (fecha, horario)
+        ).fetchall()
+        return {cancha_id: self._decodificar('reservas', datos) for cancha_id, datos in filas}
+
+    @lectura
+    def obtener_reservas_fecha(self, fecha):
+        return self._leer_reservas_rango(self._conexion(), fecha, fecha)
+
+    @lectura
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        return self._leer_reservas_rango(self._conexion(), fecha_desde, fecha_hasta)
+
+    def _leer_reservas_rango(self, conexion, fecha_desde, fecha_hasta):
+        filas = conexion.execute(
+            'SELECT clave, cancha_id, datos FROM reservas WHERE fecha BETWEEN ? AND ? ORDER BY rowid',
+            (fecha_desde, fecha_hasta)
+        ).fetchall()
+        return self._agrupar_reservas(filas)
+
+    def agregar_reserva(self, fecha, horario, cancha_id, reserva):
+        cur = self._conexion().execute(
+            'INSERT OR IGNORE INTO reservas (clave, fecha, horario, cancha_id, datos) VALUES (?, ?, ?, ?, ?)',
+            (f"{fecha}_{horario}", fecha, horario, cancha_id, self._codificar('reservas', reserva))
+        )
+        return cur.rowcount == 1
+
+    def eliminar_reserva(self, fecha, horario, cancha_id):
+        cur = self._conexion().execute(
+            'DELETE FROM reservas WHERE fecha = ? AND horario = ? AND cancha_id = ?',
+            (fecha, horario, cancha_id)
+        )
+        return cur.rowcount > 0
+
+    def actualizar_reserva(self, fecha, horario, cancha_id, cambios):
+        with self._transaccion() as cur:
+            fila = cur.execute(
+                'SELECT rowid, datos FROM reservas WHERE fecha = ? AND horario = ? AND cancha_id = ?',
+                (fecha, horario, cancha_id)
+            ).fetchone()
+            if fila is None:
+                return False
+            reserva = self._decodificar('reservas', fila[1])
+            reserva.update(cambios)
+            cur.execute(
+                'UPDATE reservas SET datos = ? WHERE rowid = ?', (self._codificar('reservas', reserva), fila[0])
+            )
+        return True
+
+    # --- Turnos fijos ---
+
+    @lectura
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        return self._leer_turnos_fijos(self._conexion())
+
+    def _leer_turnos_fijos(self, conexion):
+        filas = conexion.execute('SELECT datos FROM turnos_fijos ORDER BY rowid').fetchall()
+        return [self._decodificar('turnos_fijos', datos) for (datos,) in filas]
+
+    def _reemplazar_turnos_fijos(self, cur, turnos_fijos):
+        cur.execute('DELETE FROM turnos_fijos')
+        cur.executemany(
+            'INSERT INTO turnos_fijos (id, dia_semana, horario, cancha_id, datos) VALUES (?, ?, ?, ?, ?)',
+            [(t.get('id'), t.get('dia_semana'), t.get('horario'), t.get('cancha_id'),
+              self._codificar('turnos_fijos', t))
+             for t in turnos_fijos]
+        )
+
+    def guardar_turnos_fijos(self, turnos_fijos):
+        with self._transaccion() as cur:
+            self._reemplazar_turnos_fijos(cur, turnos_fijos)
+
+    def modificar_turnos_fijos(self, funcion):
+        with self._transaccion() as cur:
+            filas = cur.execute('SELECT datos FROM turnos_fijos ORDER BY rowid').fetchall()
+            self._reemplazar_turnos_fijos(
+                cur, funcion([self._decodificar('turnos_fijos', datos) for (datos,) in filas])
+            )
+
+    def agregar_turno_fijo(self, turno):
+        with self._transaccion() as cur:
+            existe = cur.execute(
+                'SELECT 1 FROM turnos_fijos WHERE dia_semana = ? AND horario = ? AND cancha_id = ?',
+                (turno['dia_semana'], turno['horario'], turno['cancha_id'])
+            ).fetchone()
+            if existe:
+                return None
+            turno['id'] = cur.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM turnos_fijos').fetchone()[0]
+            cur.execute(
+                'INSERT INTO turnos_fijos (id, dia_semana, horario, cancha_id, datos) VALUES (?, ?, ?, ?, ?)',
+                (turno['id'], turno['dia_semana'], turno['horario'], turno['cancha_id'],
+                 self._codificar('turnos_fijos', turno))
+            )
+        return turno
+
+    def eliminar_turno_fijo(self, id_turno):
+        self._conexion().execute('DELETE FROM turnos_fijos WHERE id = ?', (id_turno,))
+
+    def actualizar_turno_fijo(self, id_turno, cambios):
+        with self._transaccion() as cur:
+            fila = cur.execute(
+                'SELECT rowid, datos FROM turnos_fijos WHERE id = ? ORDER BY rowid LIMIT 1', (id_turno,)
+            ).fetchone()
+            if fila is None:
+                return False
+            turno = self._decodificar('turnos_fijos', fila[1])
+            turno.update(cambios)
+            cur.execute(
+                'UPDATE turnos_fijos SET datos = ? WHERE rowid = ?', (self._codificar('turnos_fijos', turno), fila[0])
+            )
+        return True
+
+    # --- Ausencias ---
+
+    @lectura
+    def cargar_ausencias(self, solo_lectura=False):
+        return self._leer_ausencias(self._conexion())
+
+    def _leer_ausencias(self, conexion):
+        filas = conexion.execute('SELECT datos FROM ausencias ORDER BY rowid').fetchall()
+        return [self._decodificar('ausencias', datos) for (datos,) in filas]
+
+    def guardar_ausencias(self, ausencias):
+        # Los backups antiguos traen ausencias como dict vacío: solo se guardan listas
+        if not isinstance(ausencias, list):
+            ausencias = []
+        with self._transaccion() as cur:
+            cur.execute('DELETE FROM ausencias')
+            cur.executemany(
+                'INSERT INTO ausencias (clave, fecha, datos) VALUES (?, ?, ?)',
+                [(a['clave'], a.get('fecha'), self._codificar('ausencias', a)) for a in ausencias]
+            )
+
+    def agregar_ausencia(self, ausencia):
+        with self._transaccion() as cur:
+            existe = cur.execute('SELECT 1 FROM ausencias WHERE clave = ?', (ausencia['clave'],)).fetchone()
+            if existe:
+                return False
+            cur.execute(
+                'INSERT INTO ausencias (clave, fecha, datos) VALUES (?, ?, ?)',
+                (ausencia['clave'], ausencia.get('fecha'), self._codificar('ausencias', ausencia))
+            )
+        return True
+
+    def eliminar_ausencia(self, clave_ausencia):
+        self._conexion().execute('DELETE FROM ausencias WHERE clave = ?', (clave_ausencia,))
+
+    # --- Rollups financieros diarios ---
+
+    def cargar_rollups(self, fecha_desde, fecha_hasta):
+        filas = self._conexion().execute(
+            f'SELECT fecha, {", ".join(CAMPOS_ROLLUP)} FROM rollups_diarios WHERE fecha BETWEEN ? AND ?',
+            (fecha_desde, fecha_hasta)
+        ).fetchall()
+        return {fila[0]: dict(zip(CAMPOS_ROLLUP, fila[1:])) for fila in filas}
+
+    def version_rollups(self):
+        return self._versiones(self._conexion())
+
+    def guardar_rollups(self, filas, version=None):
+        with self._transaccion() as cur:
+            # Dentro de BEGIN IMMEDIATE nadie más puede escribir hasta el COMMIT
+            if version is not None and self._versiones(cur) != version:
+                return False
+            cur.executemany(
+                f'INSERT OR REPLACE INTO rollups_diarios (fecha, {", ".join(CAMPOS_ROLLUP)}) '
+                f'VALUES (?{", ?" * len(CAMPOS_ROLLUP)})',
+                [(fecha, *(fila[campo] for campo in CAMPOS_ROLLUP)) for fecha, fila in filas.items()]
+            )
+        return True
+
+    def borrar_rollups(self, fechas=None, dia_semana=None):
+        with self._transaccion() as cur:
+            if fechas is None and dia_semana is None:
+                cur.execute('DELETE FROM rollups_diarios')
+                return
+            if fechas:
+                cur.executemany('DELETE FROM rollups_diarios WHERE fecha = ?', [(f,) for f in fechas])
+            if dia_semana is not None:
+                # strftime('%w'): 0=Domingo; weekday() de Python: 0=Lunes
+                cur.execute(
+                    "DELETE FROM rollups_diarios WHERE CAST(strftime('%w', fecha) AS INTEGER) = ?",
+                    ((dia_semana + 1) % 7,)
+                )
+
+
+class InstantaneaSQLite(Instantanea):
+    """Transacción de lectura abierta en su propia conexión (COMMIT al cerrar)"""
+
+    def __init__(self, almacenamiento, conexion, versiones):
+        self._almacenamiento = almacenamiento
+        self._conexion = conexion
+        self._versiones = versiones
+
+    def cargar_config(self, solo_lectura=False):
+        return self._almacenamiento._leer_config(self._conexion)
+
+    def cargar_reservas(self, solo_lectura=False):
+        return self._almacenamiento._leer_reservas(self._conexion)
+
+    def cargar_turnos_fijos(self, solo_lectura=False):
+        return self._almacenamiento._leer_turnos_fijos(self._conexion)
+
+    def cargar_ausencias(self, solo_lectura=False):
+        return self._almacenamiento._leer_ausencias(self._conexion)
+
+    def obtener_reservas_horario(self, fecha, horario):
+        return self._almacenamiento._leer_reservas_horario(self._conexion, fecha, horario)
+
+    def obtener_reservas_fecha(self, fecha):
+        return self._almacenamiento._leer_reservas_rango(self._conexion, fecha, fecha)
+
+    def obtener_reservas_rango(self, fecha_desde, fecha_hasta):
+        return self._almacenamiento._leer_reservas_rango(self._conexion, fecha_desde, fecha_hasta)
+
+    def version_datos(self, *colecciones):
+        return tuple(self._versiones[nombre] for nombre in colecciones)
+
+    def vigente(self):
+        return self._almacenamiento._versiones(self._almacenamiento._conexion()) == self._versiones
+
+    def cerrar(self):
+        if self._conexion is not None:
+            conexion, self._conexion = self._conexion, None
+            self._almacenamiento._devolver_lectura(conexion)
+
+
+class _TransaccionSQLite:
+    """Context manager: BEGIN IMMEDIATE / COMMIT, o ROLLBACK si hay error"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def __enter__(self):
+        self.conexion.execute('BEGIN IMMEDIATE')
+        return self.conexion.cursor()
+
+    def __exit__(self, tipo_error, error, traza):
+        if tipo_error is None:
+            self.conexion.execute('COMMIT')
+        else:
+            self.conexion.execute('ROLLBACK')
+        return False
+
+
+# ================================================================================
+# SELECCIÓN DE BACKEND Y MIGRACIÓN
+# ================================================================================
+
+def leer_seleccion(data_path):
+    """
+    Lee qué backend usar
+    Prioridad: variable PADEL_ALMACENAMIENTO > almacenamiento.json > 'json'
+    """
+    seleccion = {
+        'backend': 'json',
+        'archivo_sqlite': ARCHIVO_SQLITE,
+        'compactacion_segundos': 300,      # Backend JSON: cada cuánto compactar el diario
+        'compactacion_entradas': 1000      # Backend JSON: o al llegar a tantas entradas
+    }
+    ruta = os.path.join(data_path, ARCHIVO_SELECCION)
+    if os.path.exists(ruta):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            seleccion.update(json.load(f))
+    if os.environ.get('PADEL_ALMACENAMIENTO'):
+        seleccion['backend'] = os.environ['PADEL_ALMACENAMIENTO']
+    if seleccion['backend'] not in BACKENDS_VALIDOS:
+        raise ValueError(f"Backend de almacenamiento desconocido: {seleccion['backend']}")
+    return seleccion
+
+
+def guardar_seleccion(data_path, backend, archivo_sqlite=ARCHIVO_SQLITE):
+    """Guarda el backend elegido en almacenamiento.json"""
+    escribir_atomico(
+        os.path.join(data_path, ARCHIVO_SELECCION),
+        lambda f: json.dump({'backend': backend, 'archivo_sqlite': archivo_sqlite}, f, indent=4)
+    )
+
+
+def crear_almacenamiento(data_path):
+    """Crea el backend configurado para la carpeta de datos"""
+    seleccion = leer_seleccion(data_path)
+    if seleccion['backend'] == 'sqlite':
+        return AlmacenamientoSQLite(os.path.join(data_path, seleccion['archivo_sqlite']))
+    return AlmacenamientoJSON(
+        data_path,
+        compactacion_segundos=seleccion['compactacion_segundos'],
+        compactacion_entradas=seleccion['compactacion_entradas']
+    )
+
+
+def migrar_json_a_sqlite(data_path, archivo_sqlite=ARCHIVO_SQLITE):
+    """
+    Importa los archivos JSON existentes a la base SQLite y la deja
+    seleccionada como backend. Los archivos JSON no se borran.
+    Retorna un dict con la cantidad de registros migrados.
+    """
+    origen = AlmacenamientoJSON(data_path)
+    destino = AlmacenamientoSQLite(os.path.join(data_path, archivo_sqlite))
+
+    reservas = origen.cargar_reservas()
+    turnos_fijos = origen.cargar_turnos_fijos()
+    ausencias = origen.cargar_ausencias()
+
+    if os.path.exists(origen.config_file):
+        destino.guardar_config(origen.cargar_config())
+    destino.guardar_reservas(reservas)
+    destino.guardar_turnos_fijos(turnos_fijos)
+    destino.guardar_ausencias(ausencias)
+    destino.cerrar()
+    origen.cerrar()
+
+    guardar_seleccion(data_path, 'sqlite', archivo_sqlite)
+
+    return {
+        'reservas': sum(len(canchas) for canchas in reservas.values()),
+        'turnos_fijos': len(turnos_fijos),
+        'ausencias': len(ausencias) if isinstance(ausencias, list) else 0
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Herramientas de almacenamiento - Sistema de Turnos Pádel')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    migrar = sub.add_parser('migrar', help='Importa los archivos JSON a SQLite y activa ese backend')
+    migrar.add_argument('--datos', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Carpeta de datos (por defecto, la carpeta del proyecto)')
+    migrar.add_argument('--archivo', default=ARCHIVO_SQLITE, help='Nombre del archivo SQLite')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'migrar':
+        totales = migrar_json_a_sqlite(args.datos, args.archivo)
+        print(f"✅ Migración completa: {totales['reservas']} reservas, "
+              f"{totales['turnos_fijos']} turnos fijos, {totales['ausencias']} ausencias")
+        print(f"Backend activo: sqlite ({os.path.join(args.datos, args.archivo)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,3 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from datetime import datetime, timedelta
-import json
-import os
-import sys
-from io import BytesIO
-from licencia_manager import LicenciaManager
-
-
 # ================================================================================
 # SISTEMA DE TURNOS DE PADEL - BACKEND (Flask)
 # ================================================================================
@@ -18,13 +9,25 @@ from licencia_manager import LicenciaManager
 # - Integración con sistema de licencias
 # ================================================================================
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from datetime import datetime, timedelta
 import json
 import os
 import sys
 from io import BytesIO
-from licencia_manager import LicenciaManager
+import base64
+from functools import wraps
+from licencia_manager import servicio_licencia
+from almacenamiento import crear_almacenamiento
+from bloqueos import bloqueo_para, escribir_atomico
+from indice_turnos import GestorIndiceTurnos, recalcular_precio_turno_fijo
+from finanzas import (fechas_del_rango, iterar_detalle, iterar_detalle_por_tramos,
+                      exportar_csv, exportar_ndjson, ordenar_por_dia, filtrar_lineas,
+                      paginar, decodificar_cursor)
+from rollups import RollupsFinanzas
+from metricas import metricas, instalar as instalar_metricas
+import bitacora
+from captura import desde_entorno as captura_desde_entorno
 
 # ================================================================================
 # CONFIGURACIÓN DE RUTAS Y DIRECTORIOS
@@ -42,6 +45,16 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
     data_path = application_path
 
+# Carpeta de datos alternativa (benchmarks, pruebas, varias instancias)
+if os.environ.get('PADEL_DATOS'):
+    data_path = os.environ['PADEL_DATOS']
+    os.makedirs(data_path, exist_ok=True)
+
+# Log estructurado (JSON por línea) en data_path/padel.log (padel.<n>.log en cada
+# trabajador de servidor.py --procesos N)
+bitacora.configurar(data_path)
+log = bitacora.obtener_logger('app')
+
 # ================================================================================
 # INICIALIZACIÓN DE FLASK
 # ================================================================================
@@ -51,90 +64,94 @@ app = Flask(__name__,
             static_folder=os.path.join(application_path, 'static'))
 app.secret_key = 'tu_clave_secreta_aqui_cambiar_en_produccion'
 
+# Latencia, cantidad, errores y tamaño de respuesta por ruta (ver /api/metrics)
+instalar_metricas(app, metricas)
+
+# Grabación de solicitudes a /api/* para benchmarks.replay (solo con PADEL_CAPTURA)
+captura = captura_desde_entorno(app)
+
 # ================================================================================
-# RUTAS DE ARCHIVOS JSON (Base de datos persistente)
+# ALMACENAMIENTO (JSON o SQLite según almacenamiento.json)
 # ================================================================================
 
-CONFIG_FILE = os.path.join(data_path, 'config.json')          # Configuración del sistema
-RESERVAS_FILE = os.path.join(data_path, 'reservas.json')      # Reservas puntuales
-TURNOS_FIJOS_FILE = os.path.join(data_path, 'turnos_fijos.json')  # Turnos recurrentes
-AUSENCIAS_FILE = os.path.join(data_path, 'ausencias.json')    # Ausencias de turnos fijos
 TEMA_FILE = os.path.join(data_path, 'tema.json')              # Tema visual seleccionado
 
+almacenamiento = crear_almacenamiento(data_path)
+
+# Turnos fijos agrupados por día/horario + ausencias; se reconstruye solo al cambiar los datos
+indice_turnos = GestorIndiceTurnos(almacenamiento)
+
+# Totales financieros por día materializados (los endpoints que modifican datos los mantienen)
+rollups = RollupsFinanzas(almacenamiento, indice_turnos)
+
+def con_instantanea(vista):
+    """
+    Endpoints de solo lectura: todo lo que leen sale de una misma versión de
+    los datos (almacenamiento.fijar), así un reporte largo es consistente
+    aunque entren reservas mientras se arma, y no las demora
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        with almacenamiento.fijar():
+            return vista(*args, **kwargs)
+    return envoltura
+
 # ================================================================================
-# FUNCIONES DE PERSISTENCIA - Cargar/Guardar datos en JSON
+# FUNCIONES DE PERSISTENCIA - Delegan en el backend de almacenamiento
 # ================================================================================
+# solo_lectura=True: los datos vienen de la cache compartida y NO deben
+# modificarse (usar en endpoints que solo consultan)
+# El tiempo de cada operación lo registra el backend (ver OPERACIONES_MEDIDAS)
 
-def cargar_config():
+def cargar_config(solo_lectura=False):
     """
-    Carga la configuración del sistema desde config.json
-    Retorna configuración por defecto si el archivo no existe
+    Carga la configuración del sistema
+    Retorna configuración por defecto si todavía no se guardó ninguna
     """
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    # Configuración por defecto al iniciar por primera vez
-    return {
-        'cantidad_canchas': 2,
-        'horario_inicio': '08:00',
-        'horario_fin': '22:00',
-        'duracion_turno': 90,
-        'precio_turno_regular': 10000,
-        'precio_turno_fijo': 9000,
-        'descuento_promocion': 0
-    }
+    return almacenamiento.cargar_config(solo_lectura)
 
 def guardar_config(config):
-    """Guarda la configuración del sistema en config.json"""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4)
+    """Guarda la configuración del sistema"""
+    almacenamiento.guardar_config(config)
+    rollups.invalidar()
 
-def cargar_reservas():
+def cargar_reservas(solo_lectura=False):
     """
-    Carga todas las reservas puntuales desde reservas.json
+    Carga todas las reservas puntuales
     Formato: { "fecha_hora": { "cancha_id": { datos_reserva } } }
     """
-    if os.path.exists(RESERVAS_FILE):
-        with open(RESERVAS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    return almacenamiento.cargar_reservas(solo_lectura)
 
 def guardar_reservas(reservas):
-    """Guarda todas las reservas puntuales en reservas.json"""
-    with open(RESERVAS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(reservas, f, indent=4)
+    """Guarda (reemplaza) todas las reservas puntuales"""
+    almacenamiento.guardar_reservas(reservas)
+    rollups.invalidar()
 
-def cargar_turnos_fijos():
+def cargar_turnos_fijos(solo_lectura=False):
     """
-    Carga los turnos fijos/recurrentes desde turnos_fijos.json
+    Carga los turnos fijos/recurrentes
     Los turnos fijos se repiten todas las semanas en el mismo día/horario
     """
-    if os.path.exists(TURNOS_FIJOS_FILE):
-        with open(TURNOS_FIJOS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    return almacenamiento.cargar_turnos_fijos(solo_lectura)
 
 def guardar_turnos_fijos(turnos_fijos):
-    """Guarda los turnos fijos en turnos_fijos.json"""
-    with open(TURNOS_FIJOS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(turnos_fijos, f, indent=4)
+    """Guarda (reemplaza) todos los turnos fijos"""
+    almacenamiento.guardar_turnos_fijos(turnos_fijos)
+    rollups.invalidar()
 
-def cargar_ausencias():
+def cargar_ausencias(solo_lectura=False):
     """
-    Carga las ausencias de turnos fijos desde ausencias.json
+    Carga las ausencias de turnos fijos
     Las ausencias permiten "liberar" un turno fijo en una fecha específica
     """
-    if os.path.exists(AUSENCIAS_FILE):
-        with open(AUSENCIAS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    return almacenamiento.cargar_ausencias(solo_lectura)
 
 def guardar_ausencias(ausencias):
-    """Guarda las ausencias en ausencias.json"""
-    with open(AUSENCIAS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(ausencias, f, indent=4)
+    """Guarda (reemplaza) todas las ausencias"""
+    almacenamiento.guardar_ausencias(ausencias)
+    rollups.invalidar()
 
+@metricas.medir('cargar_tema')
 def cargar_tema():
     """Carga el tema visual seleccionado por el usuario desde tema.json"""
     if os.path.exists(TEMA_FILE):
@@ -142,56 +159,45 @@ def cargar_tema():
             return json.load(f)
     return {'tema': 'clasico', 'tamano': 'normal'}
 
+@metricas.medir('guardar_tema')
 def guardar_tema(tema, tamano=None):
     """Guarda el tema visual y/o tamaño en tema.json"""
-    # Cargar configuración existente
-    config = cargar_tema()
-    
-    # Actualizar tema si se proporciona
-    if tema:
-        config['tema'] = tema
-    
-    # Actualizar tamaño si se proporciona
-    if tamano:
-        config['tamano'] = tamano
-    
-    # Guardar
-    with open(TEMA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4)
-
-def _recalcular_precio_turno_fijo(config, turno):
-    """Recalcula precios de un turno fijo según configuración actual."""
-    precio_base_cfg = config.get('precio_turno_fijo', 9000)
-    descuento_pct = config.get('descuento_promocion', 0)
-    descuento_aplicado = precio_base_cfg * (descuento_pct / 100)
-    precio_final = precio_base_cfg - descuento_aplicado
-
-    turno['precio_base'] = precio_base_cfg
-    turno['descuento_porcentaje'] = descuento_pct
-    turno['descuento_aplicado'] = descuento_aplicado
-    turno['precio_final'] = precio_final
-    return turno
+    # El lock cubre lectura y escritura: dos cambios a la vez no se pisan
+    with bloqueo_para(TEMA_FILE):
+        # Cargar configuración existente
+        config = cargar_tema()
+        
+        # Actualizar tema si se proporciona
+        if tema:
+            config['tema'] = tema
+        
+        # Actualizar tamaño si se proporciona
+        if tamano:
+            config['tamano'] = tamano
+        
+        # Guardar (temporal + rename: nunca queda un archivo a medias)
+        escribir_atomico(TEMA_FILE, lambda f: json.dump(config, f, indent=4))
 
 
 def _actualizar_turnos_fijos_con_config(config):
     """Actualiza todos los turnos fijos persistidos con los precios vigentes."""
-    turnos_fijos = cargar_turnos_fijos()
-    if not turnos_fijos:
-        return
-
-    turnos_actualizados = []
-    for turno in turnos_fijos:
-        turnos_actualizados.append(_recalcular_precio_turno_fijo(config, turno))
+    def recalcular(turnos_fijos):
+        return [recalcular_precio_turno_fijo(config, turno) for turno in turnos_fijos]
 
-    guardar_turnos_fijos(turnos_actualizados)
+    # Lectura y escritura sin cortes: un turno fijo creado en el medio no se pierde
+    almacenamiento.modificar_turnos_fijos(recalcular)
+    rollups.invalidar()
 
 
 def _actualizar_reservas_con_config(config):
     """Actualiza reservas puntuales con precios vigentes (no toca productos)."""
-    reservas = cargar_reservas()
-    if not reservas:
-        return
+    # Lectura y escritura sin cortes: una reserva hecha en el medio no se pierde
+    almacenamiento.modificar_reservas(lambda reservas: _recalcular_precios_reservas(config, reservas))
+    rollups.invalidar()
 
+
+def _recalcular_precios_reservas(config, reservas):
+    """Aplica los precios vigentes a las reservas regulares (modifica y retorna el dict)"""
     for clave, canchas in reservas.items():
         for cancha_id, reserva in canchas.items():
             if reserva.get('es_fijo', False):
@@ -204,63 +210,109 @@ def _actualizar_reservas_con_config(config):
             reserva['descuento_porcentaje'] = descuento_pct
             reserva['descuento_aplicado'] = descuento_aplicado
             reserva['precio_final'] = precio_final
-
-    guardar_reservas(reservas)
+    return reservas
 
 # ================================================================================
 # FUNCIONES HELPER - Lógica de negocio reutilizable
 # ================================================================================
 
-def aplicar_turnos_fijos(fecha, horario, canchas):
+def _dia_semana_turno_fijo(id_turno):
+    """Día de la semana de un turno fijo (None si no existe)"""
+    for turno in cargar_turnos_fijos(solo_lectura=True):
+        if turno['id'] == id_turno:
+            return turno['dia_semana']
+    return None
+
+def aplicar_turnos_fijos(fecha, horario, canchas, indice=None):
     """
     Aplica los turnos fijos recurrentes a la disponibilidad de canchas
     
     Busca turnos fijos que coincidan con el día de la semana y horario,
     y marca las canchas correspondientes como ocupadas.
     También verifica si hay ausencias marcadas para ese día específico.
+    
+    Usa el índice precompilado (ver indice_turnos.py): solo se recorren los
+    turnos fijos de ese slot, no la lista completa.
+    """
+    if indice is None:
+        indice = indice_turnos.obtener()
+    dia_semana = datetime.strptime(fecha, '%Y-%m-%d').weekday()  # 0=Lunes, 6=Domingo
+    return indice.aplicar(fecha, dia_semana, horario, canchas)
+
+def calcular_grilla_dia(fecha, config, horarios, reservas_dia, indice):
     """
-    turnos_fijos = cargar_turnos_fijos()
-    ausencias = cargar_ausencias()
-    fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
-    dia_semana = fecha_obj.weekday()  # 0=Lunes, 6=Domingo
-    config = cargar_config()
+    Calcula la disponibilidad de todos los horarios de un día
     
-    # Recorrer todos los turnos fijos configurados
-    for turno in turnos_fijos:
-        if turno['dia_semana'] == dia_semana and turno['horario'] == horario:
-            turno = _recalcular_precio_turno_fijo(config, turno)
-            # Verificar si hay una ausencia marcada para esta fecha específica
-            clave_ausencia = f"{fecha}_{horario}_{turno['cancha_id']}"
-            tiene_ausencia = any(a['clave'] == clave_ausencia for a in ausencias)
-            
-            # Buscar la cancha correspondiente y actualizar su estado
-            for cancha in canchas:
-                if cancha['id'] == turno['cancha_id']:
-                    if tiene_ausencia:
-                        # Ausencia marcada: cancha disponible pero muestra info del turno fijo
-                        cancha['turno_fijo_ausente'] = {
-                            'nombre': turno['nombre_cliente'],
-                            'telefono': turno.get('telefono_cliente', ''),
-                            'id_turno_fijo': turno['id']
-                        }
-                    else:
-                        # Sin ausencia: cancha ocupada por turno fijo
-                        cancha['disponible'] = False
-                        cancha['reserva'] = {
-                            'nombre': turno['nombre_cliente'],
-                            'telefono': turno.get('telefono_cliente', ''),
-                            'es_fijo': True,
-                            'id_turno_fijo': turno['id'],
-                            'productos_lista': turno.get('productos_lista', []),
-                            'productos_extras': turno.get('productos_extras', ''),
-                            'precio_extras': turno.get('precio_extras', 0),
-                            'precio_base': turno.get('precio_base', 0),
-                            'descuento_porcentaje': turno.get('descuento_porcentaje', config.get('descuento_promocion', 0)),
-                            'descuento_aplicado': turno.get('descuento_aplicado', 0),
-                            'precio_final': turno.get('precio_final', turno.get('precio_base', 0))
-                        }
-                    break
+    reservas_dia: { "fecha_horario": { cancha_id: reserva } } de ese día
+    indice:       índice de turnos fijos y ausencias (indice_turnos.obtener())
+    
+    Cada horario trae el mismo formato de canchas que /api/obtener_disponibilidad
+    """
+    dia_semana = datetime.strptime(fecha, '%Y-%m-%d').weekday()
+    grilla = []
+    for horario in horarios:
+        canchas = generar_canchas(config, reservas_dia.get(f"{fecha}_{horario}", {}))
+        indice.aplicar(fecha, dia_semana, horario, canchas)
+        disponibles = sum(1 for c in canchas if c['disponible'])
+        grilla.append({
+            'horario': horario,
+            'canchas': canchas,
+            'disponibles': disponibles,
+            'ocupadas': len(canchas) - disponibles
+        })
+    return grilla
+
+def codificar_grilla_compacta(grilla, cantidad_canchas):
+    """
+    Codifica la grilla de un día en formato compacto
+    
+    - Celda = indice_horario * cantidad_canchas + (numero_cancha - 1)
+    - 'ocupadas' / 'ausentes': bitmaps en base64 (bit i = celda i,
+      byte i // 8, bit menos significativo primero)
+    - 'detalles': [celda, nombre, telefono, tipo] por celda con datos,
+      tipo 'R' = reserva puntual, 'F' = turno fijo, 'A' = turno fijo ausente
     
+    Retorna None si el día no tiene ninguna celda ocupada ni ausente.
+    """
+    total_celdas = len(grilla) * cantidad_canchas
+    ocupadas = bytearray((total_celdas + 7) // 8)
+    ausentes = bytearray((total_celdas + 7) // 8)
+    detalles = []
+    for i, item in enumerate(grilla):
+        for cancha in item['canchas']:
+            celda = i * cantidad_canchas + cancha['numero'] - 1
+            if not cancha['disponible']:
+                ocupadas[celda // 8] |= 1 << (celda % 8)
+                reserva = cancha['reserva']
+                tipo = 'F' if reserva.get('es_fijo') else 'R'
+                detalles.append([celda, reserva.get('nombre', ''), reserva.get('telefono', ''), tipo])
+            elif 'turno_fijo_ausente' in cancha:
+                ausentes[celda // 8] |= 1 << (celda % 8)
+                info = cancha['turno_fijo_ausente']
+                detalles.append([celda, info['nombre'], info['telefono'], 'A'])
+    if not detalles:
+        return None
+    return {
+        'ocupadas': base64.b64encode(bytes(ocupadas)).decode('ascii'),
+        'ausentes': base64.b64encode(bytes(ausentes)).decode('ascii'),
+        'detalles': detalles
+    }
+
+def generar_canchas(config, reservas_horario):
+    """
+    Arma la lista de canchas de un horario a partir de sus reservas puntuales
+    Formato de cada cancha: { id, numero, disponible, reserva }
+    """
+    canchas = []
+    for i in range(1, config['cantidad_canchas'] + 1):
+        cancha_id = f"cancha_{i}"
+        reservada = cancha_id in reservas_horario
+        canchas.append({
+            'id': cancha_id,
+            'numero': i,
+            'disponible': not reservada,
+            'reserva': reservas_horario.get(cancha_id, {})
+        })
     return canchas
 
 def generar_horarios(hora_inicio, hora_fin, duracion):
@@ -288,7 +340,7 @@ def generar_horarios(hora_inicio, hora_fin, duracion):
 @app.route('/')
 def index():
     """Página principal con los turnos"""
-    config = cargar_config()
+    config = cargar_config(solo_lectura=True)
     horarios = generar_horarios(
         config['horario_inicio'],
         config['horario_fin'],
@@ -301,9 +353,18 @@ def index():
 @app.route('/configuracion')
 def configuracion():
     """Página de configuración"""
-    config = cargar_config()
+    config = cargar_config(solo_lectura=True)
     return render_template('configuracion.html', config=config)
 
+def precalentar():
+    """
+    Lee la configuración y compila las plantillas antes de la primera solicitud
+    (servidor.py lo llama en segundo plano mientras se abre la ventana)
+    """
+    cargar_config(solo_lectura=True)
+    for plantilla in ('index.html', 'configuracion.html', 'licencia.html'):
+        app.jinja_env.get_template(plantilla)
+
 @app.route('/api/guardar_config', methods=['POST'])
 def guardar_configuracion():
     """API para guardar configuración"""
@@ -335,42 +396,30 @@ def guardar_configuracion():
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @app.route('/api/obtener_disponibilidad', methods=['POST'])
+@con_instantanea
 def obtener_disponibilidad():
     """API para obtener disponibilidad de canchas en un horario"""
     try:
         data = request.get_json()
-        print(f"[DEBUG] Datos recibidos: {data}")
         
         fecha = data.get('fecha', datetime.now().strftime('%Y-%m-%d'))
         horario = data['horario']
-        print(f"[DEBUG] Fecha: {fecha}, Horario: {horario}")
-        
-        config = cargar_config()
-        print(f"[DEBUG] Config cargada: {config}")
+        log.debug('obtener_disponibilidad fecha=%s horario=%s', fecha, horario)
         
-        reservas = cargar_reservas()
-        print(f"[DEBUG] Reservas: {reservas}")
+        config = cargar_config(solo_lectura=True)
         
-        # Crear clave para buscar reservas
-        clave_fecha_hora = f"{fecha}_{horario}"
-        reservas_horario = reservas.get(clave_fecha_hora, {})
+        # Buscar solo las reservas de ese horario
+        reservas_horario = almacenamiento.obtener_reservas_horario(fecha, horario)
         
         # Generar disponibilidad de canchas
-        canchas = []
-        for i in range(1, config['cantidad_canchas'] + 1):
-            cancha_id = f"cancha_{i}"
-            reservada = cancha_id in reservas_horario
-            canchas.append({
-                'id': cancha_id,
-                'numero': i,
-                'disponible': not reservada,
-                'reserva': reservas_horario.get(cancha_id, {})
-            })
+        canchas = generar_canchas(config, reservas_horario)
         
         # Aplicar turnos fijos
         canchas = aplicar_turnos_fijos(fecha, horario, canchas)
         
-        print(f"[DEBUG] Canchas generadas: {canchas}")
+        # Datos completos solo con los volcados prendidos (ver /api/logging)
+        bitacora.volcar(log, 'obtener_disponibilidad datos', recibido=data, config=config,
+                        reservas=reservas_horario, canchas=canchas)
         
         response = {
             'success': True,
@@ -378,13 +427,111 @@ def obtener_disponibilidad():
             'horario': horario,
             'fecha': fecha
         }
-        print(f"[DEBUG] Respuesta: {response}")
         
         return jsonify(response)
     except Exception as e:
-        print(f"[ERROR] {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception('obtener_disponibilidad: %s', e)
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/disponibilidad_dia', methods=['POST'])
+@con_instantanea
+def disponibilidad_dia():
+    """
+    API para obtener la grilla completa de un día (todos los horarios x canchas)
+    
+    Reemplaza una llamada a /api/obtener_disponibilidad por cada horario:
+    los datos se cargan una sola vez y cada horario trae el mismo formato
+    de canchas que obtener_disponibilidad, más un resumen de ocupación.
+    """
+    try:
+        data = request.get_json() or {}
+        fecha = data.get('fecha', datetime.now().strftime('%Y-%m-%d'))
+        
+        config = cargar_config(solo_lectura=True)
+        reservas_dia = almacenamiento.obtener_reservas_fecha(fecha)
+        
+        horarios = generar_horarios(
+            config['horario_inicio'],
+            config['horario_fin'],
+            config['duracion_turno']
+        )
+        
+        grilla = calcular_grilla_dia(fecha, config, horarios, reservas_dia, indice_turnos.obtener())
+        
+        return jsonify({
+            'success': True,
+            'fecha': fecha,
+            'cantidad_canchas': config['cantidad_canchas'],
+            'horarios': grilla
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Máximo de días por consulta de rango (un año)
+MAX_DIAS_DISPONIBILIDAD = 366
+
+@app.route('/api/disponibilidad_rango', methods=['POST'])
+@con_instantanea
+def disponibilidad_rango():
+    """
+    API para obtener la ocupación de varios días (semana, mes) en una sola llamada
+    
+    Body: { fecha_desde, fecha_hasta, formato: 'completo' | 'compacto' }
+    - completo: por cada día, la misma grilla que /api/disponibilidad_dia
+    - compacto: por cada día con actividad, bitmaps de celdas ocupadas/ausentes
+      y una tabla chica de detalles (ver codificar_grilla_compacta).
+      Los días que no aparecen están completamente libres.
+    """
+    try:
+        data = request.get_json() or {}
+        fecha_desde = data.get('fecha_desde')
+        fecha_hasta = data.get('fecha_hasta')
+        formato = data.get('formato', 'completo')
+        if not fecha_desde or not fecha_hasta:
+            return jsonify({'success': False, 'message': 'Faltan fechas'}), 400
+        if formato not in ('completo', 'compacto'):
+            return jsonify({'success': False, 'message': 'Formato no válido'}), 400
+        
+        desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
+        hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d')
+        cantidad_dias = (hasta - desde).days + 1
+        if cantidad_dias < 1:
+            return jsonify({'success': False, 'message': 'La fecha final es anterior a la inicial'}), 400
+        if cantidad_dias > MAX_DIAS_DISPONIBILIDAD:
+            return jsonify({'success': False, 'message': f'El rango no puede superar {MAX_DIAS_DISPONIBILIDAD} días'}), 400
+        
+        # Una sola carga de datos para todo el rango
+        config = cargar_config(solo_lectura=True)
+        reservas_rango = almacenamiento.obtener_reservas_rango(fecha_desde, fecha_hasta)
+        indice = indice_turnos.obtener()
+        horarios = generar_horarios(
+            config['horario_inicio'],
+            config['horario_fin'],
+            config['duracion_turno']
+        )
+        
+        dias = {}
+        for n in range(cantidad_dias):
+            dia = desde + timedelta(days=n)
+            fecha = dia.strftime('%Y-%m-%d')
+            grilla = calcular_grilla_dia(fecha, config, horarios, reservas_rango, indice)
+            if formato == 'compacto':
+                codificado = codificar_grilla_compacta(grilla, config['cantidad_canchas'])
+                if codificado:
+                    dias[fecha] = codificado
+            else:
+                dias[fecha] = grilla
+        
+        return jsonify({
+            'success': True,
+            'formato': formato,
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'cantidad_canchas': config['cantidad_canchas'],
+            'horarios': horarios,
+            'dias': dias
+        })
+    except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @app.route('/api/reservar', methods=['POST'])
@@ -406,31 +553,16 @@ def reservar_turno():
             fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
             dia_semana = fecha_obj.weekday()
             
-            turnos_fijos = cargar_turnos_fijos()
-            
-            # Generar ID único
-            nuevo_id = max([t.get('id', 0) for t in turnos_fijos], default=0) + 1
-            
-            # Verificar si ya existe un turno fijo para ese día/horario/cancha
-            for turno in turnos_fijos:
-                if (turno['dia_semana'] == dia_semana and 
-                    turno['horario'] == horario and 
-                    turno['cancha_id'] == cancha_id):
-                    return jsonify({
-                        'success': False,
-                        'message': 'Ya existe un turno fijo para este día y horario en esta cancha'
-                    }), 400
-            
             # Calcular precios
-            config = cargar_config()
+            config = cargar_config(solo_lectura=True)
             precio_base = config.get('precio_turno_fijo', 9000)
             descuento_porcentaje = config.get('descuento_promocion', 0)
             descuento_aplicado = precio_base * (descuento_porcentaje / 100)
             precio_final = precio_base - descuento_aplicado
             
-            # Crear turno fijo
+            # Crear turno fijo (el ID lo asigna el almacenamiento)
             turno_fijo = {
-                'id': nuevo_id,
+                'id': None,
                 'dia_semana': dia_semana,
                 'dia_nombre': ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'][dia_semana],
                 'horario': horario,
@@ -446,8 +578,13 @@ def reservar_turno():
                 'precio_extras': precio_extras
             }
             
-            turnos_fijos.append(turno_fijo)
-            guardar_turnos_fijos(turnos_fijos)
+            # Verifica que no exista otro turno fijo para ese día/horario/cancha
+            if almacenamiento.agregar_turno_fijo(turno_fijo) is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Ya existe un turno fijo para este día y horario en esta cancha'
+                }), 400
+            rollups.dia_semana_modificado(dia_semana)
             
             return jsonify({
                 'success': True,
@@ -455,29 +592,15 @@ def reservar_turno():
             })
         else:
             # Reserva normal (no recurrente)
-            reservas = cargar_reservas()
-            clave_fecha_hora = f"{fecha}_{horario}"
-            
-            # Inicializar si no existe
-            if clave_fecha_hora not in reservas:
-                reservas[clave_fecha_hora] = {}
-            
-            # Verificar si ya está reservada
-            if cancha_id in reservas[clave_fecha_hora]:
-                return jsonify({
-                    'success': False, 
-                    'message': 'Esta cancha ya está reservada para este horario'
-                }), 400
-            
             # Calcular precios
-            config = cargar_config()
+            config = cargar_config(solo_lectura=True)
             precio_base = config.get('precio_turno_regular', 10000)
             descuento_porcentaje = config.get('descuento_promocion', 0)
             descuento_aplicado = precio_base * (descuento_porcentaje / 100)
             precio_final = precio_base - descuento_aplicado
             
             # Crear reserva
-            reservas[clave_fecha_hora][cancha_id] = {
+            reserva = {
                 'nombre': nombre_cliente,
                 'telefono': telefono_cliente,
                 'fecha_reserva': datetime.now().isoformat(),
@@ -490,7 +613,13 @@ def reservar_turno():
                 'precio_extras': precio_extras
             }
             
-            guardar_reservas(reservas)
+            # Verificar si ya está reservada (se inserta solo si está libre)
+            if not almacenamiento.agregar_reserva(fecha, horario, cancha_id, reserva):
+                return jsonify({
+                    'success': False, 
+                    'message': 'Esta cancha ya está reservada para este horario'
+                }), 400
+            rollups.fecha_modificada(fecha)
             
             return jsonify({
                 'success': True,
@@ -506,11 +635,14 @@ def cancelar_reserva():
         data = request.get_json()
         id_turno_fijo = data.get('id_turno_fijo')
         
-        # Si es un turno fijo, eliminarlo
+        # Si es un turno fijo, eliminarlo (con el lock de ese turno: otro
+        # request no puede modificarlo entre la búsqueda y la baja)
         if id_turno_fijo:
-            turnos_fijos = cargar_turnos_fijos()
-            turnos_fijos = [t for t in turnos_fijos if t['id'] != id_turno_fijo]
-            guardar_turnos_fijos(turnos_fijos)
+            with almacenamiento.bloqueo_turno_fijo(id_turno_fijo):
+                dia_semana = _dia_semana_turno_fijo(id_turno_fijo)
+                almacenamiento.eliminar_turno_fijo(id_turno_fijo)
+                if dia_semana is not None:
+                    rollups.dia_semana_modificado(dia_semana)
             
             return jsonify({
                 'success': True,
@@ -529,18 +661,8 @@ def cancelar_reserva():
             }), 400
         
         # Cancelar reserva normal
-        reservas = cargar_reservas()
-        clave_fecha_hora = f"{fecha}_{horario}"
-        
-        if clave_fecha_hora in reservas and cancha_id in reservas[clave_fecha_hora]:
-            del reservas[clave_fecha_hora][cancha_id]
-            
-            # Limpiar si no hay más reservas en ese horario
-            if not reservas[clave_fecha_hora]:
-                del reservas[clave_fecha_hora]
-            
-            guardar_reservas(reservas)
-            
+        if almacenamiento.eliminar_reserva(fecha, horario, cancha_id):
+            rollups.fecha_modificada(fecha)
             return jsonify({
                 'success': True,
                 'message': 'Reserva cancelada correctamente'
@@ -554,10 +676,11 @@ def cancelar_reserva():
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @app.route('/api/obtener_turnos_fijos', methods=['GET'])
+@con_instantanea
 def obtener_turnos_fijos():
     """API para obtener todos los turnos fijos"""
     try:
-        turnos_fijos = cargar_turnos_fijos()
+        turnos_fijos = cargar_turnos_fijos(solo_lectura=True)
         return jsonify({
             'success': True,
             'turnos_fijos': turnos_fijos
@@ -575,16 +698,8 @@ def marcar_ausencia():
         cancha_id = data['cancha_id']
         id_turno_fijo = data['id_turno_fijo']
         
-        ausencias = cargar_ausencias()
         clave_ausencia = f"{fecha}_{horario}_{cancha_id}"
         
-        # Verificar si ya existe
-        if any(a['clave'] == clave_ausencia for a in ausencias):
-            return jsonify({
-                'success': False,
-                'message': 'Ya existe una ausencia marcada para este turno'
-            }), 400
-        
         # Crear ausencia
         ausencia = {
             'clave': clave_ausencia,
@@ -595,8 +710,13 @@ def marcar_ausencia():
             'fecha_marcado': datetime.now().isoformat()
         }
         
-        ausencias.append(ausencia)
-        guardar_ausencias(ausencias)
+        # Verificar si ya existe (se agrega solo si no estaba marcada)
+        if not almacenamiento.agregar_ausencia(ausencia):
+            return jsonify({
+                'success': False,
+                'message': 'Ya existe una ausencia marcada para este turno'
+            }), 400
+        rollups.fecha_modificada(fecha)
         
         return jsonify({
             'success': True,
@@ -614,12 +734,11 @@ def cancelar_ausencia():
         horario = data['horario']
         cancha_id = data['cancha_id']
         
-        ausencias = cargar_ausencias()
         clave_ausencia = f"{fecha}_{horario}_{cancha_id}"
         
-        # Filtrar la ausencia
-        ausencias = [a for a in ausencias if a['clave'] != clave_ausencia]
-        guardar_ausencias(ausencias)
+        # Eliminar la ausencia
+        almacenamiento.eliminar_ausencia(clave_ausencia)
+        rollups.fecha_modificada(fecha)
         
         return jsonify({
             'success': True,
@@ -649,28 +768,22 @@ def api_agregar_productos():
         # Generar descripción de productos (para compatibilidad)
         productos_extras = ', '.join([f"{p['nombre']} (${p['precio']})" for p in productos_lista])
         
+        cambios = {
+            'productos_lista': productos_lista,
+            'productos_extras': productos_extras,
+            'precio_extras': precio_extras
+        }
+        
         if es_fijo and id_turno_fijo:
-            # Actualizar turno fijo
-            turnos_fijos = cargar_turnos_fijos()
-            for turno in turnos_fijos:
-                if turno['id'] == id_turno_fijo:
-                    turno['productos_lista'] = productos_lista
-                    turno['productos_extras'] = productos_extras
-                    turno['precio_extras'] = precio_extras
-                    break
-            guardar_turnos_fijos(turnos_fijos)
+            # Actualizar turno fijo (con el lock de ese turno, ver cancelar_reserva)
+            with almacenamiento.bloqueo_turno_fijo(id_turno_fijo):
+                if almacenamiento.actualizar_turno_fijo(id_turno_fijo, cambios):
+                    rollups.dia_semana_modificado(_dia_semana_turno_fijo(id_turno_fijo))
         else:
             # Actualizar reserva regular
-            reservas = cargar_reservas()
-            clave_fecha_hora = f"{fecha}_{horario}"
-            
-            if clave_fecha_hora in reservas and cancha_id in reservas[clave_fecha_hora]:
-                reservas[clave_fecha_hora][cancha_id]['productos_lista'] = productos_lista
-                reservas[clave_fecha_hora][cancha_id]['productos_extras'] = productos_extras
-                reservas[clave_fecha_hora][cancha_id]['precio_extras'] = precio_extras
-                guardar_reservas(reservas)
-            else:
+            if not almacenamiento.actualizar_reserva(fecha, horario, cancha_id, cambios):
                 return jsonify({'success': False, 'message': 'Reserva no encontrada'}), 404
+            rollups.fecha_modificada(fecha)
         
         return jsonify({
             'success': True,
@@ -726,106 +839,101 @@ def api_guardar_tamano():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Paginación del detalle de los reportes financieros
+LIMITE_DETALLE_POR_DEFECTO = 100
+LIMITE_DETALLE_MAXIMO = 1000
+PARAMETROS_PAGINACION = ('limite', 'cursor', 'tipo', 'cancha', 'cliente')
+
+def _detalle_reporte(fecha_desde, fecha_hasta, config, incluir_fecha=True):
+    """Líneas de detalle del reporte financiero (datos crudos del rango)"""
+    return list(iterar_detalle(
+        fecha_desde, fecha_hasta,
+        cargar_turnos_fijos(solo_lectura=True),
+        almacenamiento.obtener_reservas_rango(fecha_desde, fecha_hasta),
+        indice_turnos.obtener().claves_ausentes,
+        config,
+        incluir_fecha
+    ))
+
+def _pagina_detalle(data, fecha_desde, fecha_hasta, config):
+    """
+    Una página del detalle en orden (fecha, horario, cancha)
+    
+    data: limite, cursor (el 'siguiente_cursor' de la página anterior) y
+    filtros opcionales tipo ('fijo'/'regular'), cancha y cliente.
+    Retorna (pagina, siguiente_cursor). Solo se calculan los días necesarios
+    para llenar la página, empezando desde el día del cursor.
+    """
+    limite = int(data.get('limite') or LIMITE_DETALLE_POR_DEFECTO)
+    if not 1 <= limite <= LIMITE_DETALLE_MAXIMO:
+        raise ValueError(f'El límite debe estar entre 1 y {LIMITE_DETALLE_MAXIMO}')
+    despues_de = decodificar_cursor(data['cursor']) if data.get('cursor') else None
+    if despues_de is not None:
+        fecha_desde = max(fecha_desde, despues_de[0])
+    
+    lineas = iterar_detalle_por_tramos(
+        fecha_desde, fecha_hasta,
+        cargar_turnos_fijos(solo_lectura=True),
+        almacenamiento.obtener_reservas_rango,
+        indice_turnos.obtener().claves_ausentes,
+        config
+    )
+    lineas = filtrar_lineas(ordenar_por_dia(lineas), data.get('tipo'), data.get('cancha'), data.get('cliente'))
+    return paginar(lineas, limite, despues_de)
+
+def _agregar_detalle(respuesta, data, fecha_desde, fecha_hasta, config, incluir_fecha=True):
+    """
+    Completa la respuesta de un reporte financiero según los parámetros:
+    - Sin parámetros de paginación: todo el detalle (comportamiento histórico)
+    - Con limite/cursor/filtros: una página + 'siguiente_cursor'. El resumen
+      (siempre del rango completo) solo viaja en la primera página, así
+      pedir más páginas nunca recalcula los totales
+    """
+    if not any(data.get(parametro) for parametro in PARAMETROS_PAGINACION):
+        if data.get('detalle', True):
+            respuesta['detalle'] = _detalle_reporte(fecha_desde, fecha_hasta, config, incluir_fecha)
+        return respuesta
+    
+    pagina, siguiente_cursor = _pagina_detalle(data, fecha_desde, fecha_hasta, config)
+    if not incluir_fecha:
+        pagina = [{k: v for k, v in linea.items() if k != 'fecha'} for linea in pagina]
+    respuesta['detalle'] = pagina
+    respuesta['siguiente_cursor'] = siguiente_cursor
+    return respuesta
+
 @app.route('/api/finanzas/reporte_diario', methods=['POST'])
+@con_instantanea
 def api_reporte_finanzas():
-    """Genera reporte financiero para una fecha específica"""
+    """
+    Genera reporte financiero para una fecha específica
+    El resumen sale de los rollups diarios; el detalle se arma solo si se
+    pide (parámetro 'detalle', por defecto true)
+    Paginación y filtros opcionales: ver _agregar_detalle
+    """
     try:
         data = request.get_json()
         fecha = data.get('fecha', datetime.now().strftime('%Y-%m-%d'))
         
-        reservas = cargar_reservas()
-        turnos_fijos = cargar_turnos_fijos()
-        ausencias = cargar_ausencias()
-        config = cargar_config()
-        
-        # Parse fecha
-        fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
-        dia_semana = fecha_obj.weekday()
-        
-        total_recaudado = 0
-        turnos_regulares_count = 0
-        turnos_fijos_count = 0
-        total_descuentos = 0
-        total_extras = 0
-        detalle_turnos = []
-        
-        # Revisar turnos fijos para ese día
-        for turno_fijo in turnos_fijos:
-            if turno_fijo['dia_semana'] == dia_semana:
-                # Verificar si no está ausente
-                clave_ausencia = f"{fecha}_{turno_fijo['horario']}_{turno_fijo['cancha_id']}"
-                esta_ausente = any(a['clave'] == clave_ausencia for a in ausencias)
-                
-                if not esta_ausente:
-                    precio_final = turno_fijo.get('precio_final', turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)))
-                    descuento = turno_fijo.get('descuento_aplicado', 0)
-                    precio_extras = turno_fijo.get('precio_extras', 0)
-                    
-                    total_recaudado += precio_final + precio_extras
-                    total_descuentos += descuento
-                    total_extras += precio_extras
-                    turnos_fijos_count += 1
-                    
-                    detalle_turnos.append({
-                        'tipo': 'Turno Fijo',
-                        'horario': turno_fijo['horario'],
-                        'cancha': turno_fijo['cancha_id'],
-                        'cliente': turno_fijo['nombre_cliente'],
-                        'precio_base': turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)),
-                        'descuento': descuento,
-                        'precio_final': precio_final,
-                        'productos_extras': turno_fijo.get('productos_extras', ''),
-                        'precio_extras': precio_extras
-                    })
-        
-        # Revisar reservas regulares para esa fecha
-        for clave_fecha_hora, canchas in reservas.items():
-            if clave_fecha_hora.startswith(fecha):
-                for cancha_id, reserva in canchas.items():
-                    if not reserva.get('es_fijo', False):  # Solo contar regulares
-                        horario = clave_fecha_hora.split('_')[1]
-                        precio_final = reserva.get('precio_final', reserva.get('precio_base', config.get('precio_turno_regular', 10000)))
-                        descuento = reserva.get('descuento_aplicado', 0)
-                        precio_extras = reserva.get('precio_extras', 0)
-                        
-                        total_recaudado += precio_final + precio_extras
-                        total_descuentos += descuento
-                        total_extras += precio_extras
-                        turnos_regulares_count += 1
-                        
-                        detalle_turnos.append({
-                            'tipo': 'Turno Regular',
-                            'horario': horario,
-                            'cancha': cancha_id,
-                            'cliente': reserva['nombre'],
-                            'precio_base': reserva.get('precio_base', config.get('precio_turno_regular', 10000)),
-                            'descuento': descuento,
-                            'precio_final': precio_final,
-                            'productos_extras': reserva.get('productos_extras', ''),
-                            'precio_extras': precio_extras
-                        })
+        config = cargar_config(solo_lectura=True)
+        respuesta = {'success': True, 'fecha': fecha}
+        if not data.get('cursor'):
+            respuesta['resumen'] = rollups.resumen(fechas_del_rango(fecha, fecha), config)
+        _agregar_detalle(respuesta, data, fecha, fecha, config, incluir_fecha=False)
         
-        return jsonify({
-            'success': True,
-            'fecha': fecha,
-            'resumen': {
-                'total_recaudado': total_recaudado,
-                'turnos_regulares': turnos_regulares_count,
-                'turnos_fijos': turnos_fijos_count,
-                'total_turnos': turnos_regulares_count + turnos_fijos_count,
-                'total_descuentos': total_descuentos,
-                'total_extras': total_extras,
-                'descuento_promocion_actual': config.get('descuento_promocion', 0)
-            },
-            'detalle': detalle_turnos
-        })
+        return jsonify(respuesta)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
 # Nuevo endpoint: Reporte financiero por rango de fechas
 @app.route('/api/finanzas/reporte_rango', methods=['POST'])
+@con_instantanea
 def api_reporte_finanzas_rango():
-    """Genera reporte financiero para un rango de fechas (varios días, semana, mes)"""
+    """
+    Genera reporte financiero para un rango de fechas (varios días, semana, mes, año)
+    El resumen suma una fila por día (rollups); el detalle se arma en una sola
+    pasada (finanzas.py) y solo si se pide (parámetro 'detalle', por defecto true)
+    Paginación y filtros opcionales: ver _agregar_detalle
+    """
     try:
         data = request.get_json()
         fecha_desde = data.get('fecha_desde')
@@ -833,108 +941,114 @@ def api_reporte_finanzas_rango():
         if not fecha_desde or not fecha_hasta:
             return jsonify({'success': False, 'message': 'Faltan fechas'}), 400
 
-        reservas = cargar_reservas()
-        turnos_fijos = cargar_turnos_fijos()
-        ausencias = cargar_ausencias()
-        config = cargar_config()
+        config = cargar_config(solo_lectura=True)
+        respuesta = {'success': True, 'fecha_desde': fecha_desde, 'fecha_hasta': fecha_hasta}
+        if not data.get('cursor'):
+            respuesta['resumen'] = rollups.resumen(fechas_del_rango(fecha_desde, fecha_hasta), config)
+        _agregar_detalle(respuesta, data, fecha_desde, fecha_hasta, config)
 
-        # Convertir a objetos datetime
-        desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
-        hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d')
+        return jsonify(respuesta)
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
-        total_recaudado = 0
-        turnos_regulares_count = 0
-        turnos_fijos_count = 0
-        total_descuentos = 0
-        total_extras = 0
-        detalle_turnos = []
-
-        # Recorrer cada día del rango
-        dia_actual = desde
-        while dia_actual <= hasta:
-            fecha_str = dia_actual.strftime('%Y-%m-%d')
-            dia_semana = dia_actual.weekday()
-
-            # Turnos fijos de ese día
-            for turno_fijo in turnos_fijos:
-                if turno_fijo['dia_semana'] == dia_semana:
-                    clave_ausencia = f"{fecha_str}_{turno_fijo['horario']}_{turno_fijo['cancha_id']}"
-                    esta_ausente = any(a['clave'] == clave_ausencia for a in ausencias)
-                    if not esta_ausente:
-                        precio_final = turno_fijo.get('precio_final', turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)))
-                        descuento = turno_fijo.get('descuento_aplicado', 0)
-                        precio_extras = turno_fijo.get('precio_extras', 0)
-                        total_recaudado += precio_final + precio_extras
-                        total_descuentos += descuento
-                        total_extras += precio_extras
-                        turnos_fijos_count += 1
-                        detalle_turnos.append({
-                            'tipo': 'Turno Fijo',
-                            'horario': turno_fijo['horario'],
-                            'cancha': turno_fijo['cancha_id'],
-                            'cliente': turno_fijo['nombre_cliente'],
-                            'precio_base': turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)),
-                            'descuento': descuento,
-                            'precio_final': precio_final,
-                            'productos_extras': turno_fijo.get('productos_extras', ''),
-                            'precio_extras': precio_extras,
-                            'fecha': fecha_str
-                        })
-
-            # Reservas regulares de ese día
-            for clave_fecha_hora, canchas in reservas.items():
-                if clave_fecha_hora.startswith(fecha_str):
-                    for cancha_id, reserva in canchas.items():
-                        if not reserva.get('es_fijo', False):
-                            horario = clave_fecha_hora.split('_')[1]
-                            precio_final = reserva.get('precio_final', reserva.get('precio_base', config.get('precio_turno_regular', 10000)))
-                            descuento = reserva.get('descuento_aplicado', 0)
-                            precio_extras = reserva.get('precio_extras', 0)
-                            total_recaudado += precio_final + precio_extras
-                            total_descuentos += descuento
-                            total_extras += precio_extras
-                            turnos_regulares_count += 1
-                            detalle_turnos.append({
-                                'tipo': 'Turno Regular',
-                                'horario': horario,
-                                'cancha': cancha_id,
-                                'cliente': reserva['nombre'],
-                                'precio_base': reserva.get('precio_base', config.get('precio_turno_regular', 10000)),
-                                'descuento': descuento,
-                                'precio_final': precio_final,
-                                'productos_extras': reserva.get('productos_extras', ''),
-                                'precio_extras': precio_extras,
-                                'fecha': fecha_str
-                            })
-
-            dia_actual += timedelta(days=1)
+# Formatos de exportación del reporte por rango: generador y tipo de contenido
+FORMATOS_EXPORTACION = {
+    'csv': (exportar_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (exportar_ndjson, 'application/x-ndjson; charset=utf-8')
+}
 
-        return jsonify({
-            'success': True,
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-            'resumen': {
-                'total_recaudado': total_recaudado,
-                'turnos_regulares': turnos_regulares_count,
-                'turnos_fijos': turnos_fijos_count,
-                'total_turnos': turnos_regulares_count + turnos_fijos_count,
-                'total_descuentos': total_descuentos,
-                'total_extras': total_extras,
-                'descuento_promocion_actual': config.get('descuento_promocion', 0)
-            },
-            'detalle': detalle_turnos
-        })
+@app.route('/api/finanzas/reporte_rango/exportar', methods=['GET'])
+def api_exportar_reporte_rango():
+    """
+    Exporta el detalle del reporte por rango en CSV o NDJSON
+    
+    Query: ?fecha_desde=YYYY-MM-DD&fecha_hasta=YYYY-MM-DD&formato=csv|ndjson
+    Las filas se envían a medida que se calculan (las reservas se leen de a
+    un mes), así que la memoria usada no depende del largo del rango.
+    Al final va el resumen: filas "RESUMEN" en CSV, {"resumen": ...} en NDJSON.
+    """
+    try:
+        fecha_desde = request.args.get('fecha_desde')
+        fecha_hasta = request.args.get('fecha_hasta')
+        formato = request.args.get('formato', 'csv')
+        if not fecha_desde or not fecha_hasta:
+            return jsonify({'success': False, 'message': 'Faltan fechas'}), 400
+        if formato not in FORMATOS_EXPORTACION:
+            return jsonify({'success': False, 'message': 'Formato no válido'}), 400
+        # Validar las fechas antes de empezar a enviar la respuesta
+        datetime.strptime(fecha_desde, '%Y-%m-%d')
+        datetime.strptime(fecha_hasta, '%Y-%m-%d')
+        
+        # La instantánea sigue abierta mientras se envían las filas (se cierra al terminar)
+        instantanea = almacenamiento.instantanea()
+        try:
+            with almacenamiento.fijar(instantanea):
+                config = cargar_config(solo_lectura=True)
+                turnos_fijos = cargar_turnos_fijos(solo_lectura=True)
+                claves_ausentes = indice_turnos.obtener().claves_ausentes
+        except Exception:
+            instantanea.cerrar()
+            raise
+        lineas = iterar_detalle_por_tramos(
+            fecha_desde, fecha_hasta, turnos_fijos, instantanea.obtener_reservas_rango, claves_ausentes, config
+        )
+        generar, tipo_contenido = FORMATOS_EXPORTACION[formato]
+        nombre_archivo = f"reporte_{fecha_desde}_{fecha_hasta}.{formato}"
+        return Response(
+            _cerrar_al_terminar(generar(lineas, config), instantanea),
+            content_type=tipo_contenido,
+            headers={'Content-Disposition': f'attachment; filename="{nombre_archivo}"'}
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+def _cerrar_al_terminar(partes, instantanea):
+    """Envía las partes y cierra la instantánea al final (o si el cliente corta antes)"""
+    try:
+        yield from partes
+    finally:
+        instantanea.cerrar()
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metricas():
+    """
+    Métricas del servidor: latencia/cantidad/errores/tamaño por ruta y
+    tiempos y bytes del almacenamiento
+    Formato de texto de Prometheus por defecto; JSON con ?formato=json
+    o Accept: application/json
+    """
+    formato = request.args.get('formato')
+    if formato == 'json' or (formato is None and request.accept_mimetypes.best == 'application/json'):
+        return jsonify({'success': True, 'metricas': metricas.como_dict()})
+    return Response(metricas.como_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/logging', methods=['GET', 'POST'])
+def api_logging():
+    """
+    Estado del log (GET) o cambio en caliente (POST) de 'nivel'
+    (DEBUG/INFO/...), 'volcados' (true/false) y 'muestreo' (1 de cada N)
+    """
+    try:
+        if request.method == 'GET':
+            return jsonify({'success': True, 'logging': bitacora.estado()})
+        data = request.get_json() or {}
+        estado = bitacora.actualizar(nivel=data.get('nivel'), volcados=data.get('volcados'),
+                                     muestreo=data.get('muestreo'))
+        log.info('Logging actualizado: nivel=%s volcados=%s muestreo=%s',
+                 estado['nivel'], estado['volcados'], estado['muestreo'])
+        return jsonify({'success': True, 'logging': estado})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @app.route('/api/exportar_backup', methods=['GET'])
+@con_instantanea
 def exportar_backup():
     """Exporta todos los datos a un archivo JSON legible"""
     try:
-        config = cargar_config()
-        reservas = cargar_reservas()
-        turnos_fijos = cargar_turnos_fijos()
-        ausencias = cargar_ausencias()
+        config = cargar_config(solo_lectura=True)
+        reservas = cargar_reservas(solo_lectura=True)
+        turnos_fijos = cargar_turnos_fijos(solo_lectura=True)
+        ausencias = cargar_ausencias(solo_lectura=True)
         
         datos_completos = {
             "_INFORMACION": {
@@ -1185,17 +1299,11 @@ def pagina_licencia():
 def info_licencia():
     """Obtiene información de la licencia actual"""
     try:
-        # Detectar ruta de licencia
-        if getattr(sys, 'frozen', False):
-            base_path = os.path.dirname(sys.executable)
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        archivo_licencia = os.path.join(base_path, 'licencia.dat')
-        manager = LicenciaManager(archivo_licencia)
+        # Licencia en memoria mientras licencia.dat no cambie (sin desencriptar en cada consulta)
+        licencia = servicio_licencia()
         
-        es_valida, dias_restantes, mensaje = manager.verificar_licencia()
-        info = manager.obtener_info_licencia()
+        es_valida, dias_restantes, mensaje = licencia.estado()
+        info = licencia.info()
         
         if info:
             fecha_exp = datetime.fromisoformat(info['fecha_expiracion'])
@@ -1234,16 +1342,7 @@ def aplicar_serial():
                 'mensaje': 'Serial vacío'
             }), 400
         
-        # Detectar ruta de licencia
-        if getattr(sys, 'frozen', False):
-            base_path = os.path.dirname(sys.executable)
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        archivo_licencia = os.path.join(base_path, 'licencia.dat')
-        manager = LicenciaManager(archivo_licencia)
-        
-        exito, mensaje = manager.aplicar_serial(serial)
+        exito, mensaje = servicio_licencia().aplicar_serial(serial)
         
         return jsonify({
             'success': exito,
@@ -1257,4 +1356,7 @@ def aplicar_serial():
         }), 400
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Servidor de producción (pool de threads, keep-alive, cierre ordenado); ver servidor.py
+    # Opciones: --host --puerto --hilos --procesos
+    import servidor
+    servidor.main(modulo='__main__', host='0.0.0.0')
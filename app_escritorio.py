@@ -5,60 +5,67 @@
 # Este archivo es el punto de entrada de la aplicación de escritorio.
 # 
 # FUNCIONAMIENTO:
-# 1. Verifica la licencia antes de iniciar
-# 2. Inicia un servidor Flask en segundo plano (localhost:5000)
-# 3. Abre una ventana de escritorio con PyWebView que carga la interfaz web
-# 4. El servidor Flask sigue corriendo en un thread daemon hasta cerrar la app
+# 1. Abre el socket del servidor en un puerto libre e importa la app en segundo plano
+# 2. Mientras tanto verifica la licencia (no se atiende nada hasta que sea válida)
+# 3. Abre una ventana de escritorio con PyWebView apenas el servidor avisa que está listo
+# 4. Al cerrar la ventana, el servidor termina las solicitudes en curso y se detiene
+#
+# Los imports pesados (PyWebView, Flask, cryptography) se hacen recién cuando
+# se usan: el arranque no los espera en serie y los procesos trabajadores
+# (que vuelven a importar este archivo) no cargan PyWebView.
 #
 # COMPONENTES:
 # - PyWebView: Crea ventana nativa del sistema operativo
 # - Flask: Servidor web local que sirve la aplicación
-# - Threading: Permite ejecutar Flask en segundo plano
+# - servidor.py: Pool de threads, keep-alive y procesos trabajadores opcionales
+#
+# LÍNEA DE COMANDOS (opcional):
+#   --host 0.0.0.0     Atender también a otros mostradores de la red
+#   --puerto N         Puerto fijo (por defecto: libre con ventana, 5000 en red o sin ventana)
+#   --hilos N          Conexiones atendidas a la vez por proceso
+#   --procesos N       Procesos trabajadores sobre la misma carpeta de datos
+#   --sin-ventana      Solo el servidor (sin PyWebView), hasta Ctrl+C
 # ================================================================================
 
-import webview
-import threading
+import argparse
+import json
+import multiprocessing
 import time
 import sys
 import os
-import ctypes
-from werkzeug.serving import make_server
-from app import app
-from licencia_manager import LicenciaManager
+import servidor
 
 # ================================================================================
 # VARIABLES GLOBALES para control del servidor Flask
 # ================================================================================
 
-server = None          # Instancia del servidor Flask
-server_thread = None   # Thread donde corre el servidor
+server = None          # Servicio en marcha (servidor.iniciar)
 
 # ================================================================================
 # FUNCIONES DE GESTIÓN DEL SERVIDOR FLASK
 # ================================================================================
 
-def run_flask():
+def run_flask(opciones):
     """
-    Ejecuta el servidor Flask en un thread separado (daemon)
-    El servidor escucha en localhost:5000 y queda en segundo plano
+    Prepara el servidor de producción en segundo plano (thread o procesos trabajadores)
+    El socket queda abierto en opciones.host:opciones.puerto pero no atiende
+    hasta server.habilitar()
     """
     global server
-    # Silenciar logs de Werkzeug redirigiendo a devnull
-    import logging
-    log = logging.getLogger('werkzeug')
-    log.setLevel(logging.ERROR)
-    
-    server = make_server('127.0.0.1', 5000, app, threaded=True)
-    server.serve_forever()
+    server = servidor.preparar(opciones.host, opciones.puerto, opciones.hilos, opciones.procesos)
+    return server
 
 def shutdown_server():
     """
-    Detiene el servidor Flask de forma segura
+    Detiene el servidor de forma ordenada (termina las solicitudes en curso)
     Se llama al cerrar la ventana de la aplicación
     """
     global server
     if server:
-        server.shutdown()
+        server.detener()
+        server.esperar()
+        server = None
+        servidor.cerrar_almacenamiento()
 
 def on_closing():
     """
@@ -71,9 +78,10 @@ def on_closing():
 # FUNCIÓN DE VERIFICACIÓN DE LICENCIAS
 # ================================================================================
 
-def verificar_y_mostrar_licencia():
+def verificar_y_mostrar_licencia(con_ventana=True):
     """
     Verifica la licencia antes de iniciar la aplicación
+    Sin ventana (--sin-ventana) el error se muestra en la consola
     
     FLUJO:
     1. Busca archivo licencia.dat
@@ -85,20 +93,17 @@ def verificar_y_mostrar_licencia():
     Returns:
         bool: True si la licencia es válida, False si no lo es
     """
-    # Detectar ruta correcta según modo de ejecución
-    if getattr(sys, 'frozen', False):
-        base_path = os.path.dirname(sys.executable)  # Modo ejecutable
-    else:
-        base_path = os.path.dirname(os.path.abspath(__file__))  # Modo desarrollo
-    
-    archivo_licencia = os.path.join(base_path, 'licencia.dat')
-    manager = LicenciaManager(archivo_licencia)
+    # licencia.dat junto al ejecutable (modo ejecutable) o al código (modo desarrollo)
+    from licencia_manager import ruta_licencia, servicio_licencia
+
+    archivo_licencia = ruta_licencia()
+    licencia = servicio_licencia(archivo_licencia)
     
     # ============================================================
     # CASO 1: No existe licencia - Intentar crear trial
     # ============================================================
     if not os.path.exists(archivo_licencia):
-        resultado_trial = manager.crear_licencia_trial()
+        resultado_trial = licencia.crear_licencia_trial()
         
         if resultado_trial is None:
             # Trial ya fue usado previamente y expiró
@@ -107,21 +112,27 @@ def verificar_y_mostrar_licencia():
             mensaje = "El período de prueba de 15 días ya expiró. Para continuar usando la aplicación, active una licencia ingresando un serial válido en la sección 'Licencia'."
         elif not resultado_trial:
             # Caso extraño: no debería llegar aquí
-            es_valida, dias_restantes, mensaje = manager.verificar_licencia()
+            es_valida, dias_restantes, mensaje = licencia.estado()
         else:
             # Trial creado exitosamente
-            es_valida, dias_restantes, mensaje = manager.verificar_licencia()
+            es_valida, dias_restantes, mensaje = licencia.estado()
     else:
         # ============================================================
         # CASO 2: Existe licencia - Verificar validez
         # ============================================================
-        es_valida, dias_restantes, mensaje = manager.verificar_licencia()
+        es_valida, dias_restantes, mensaje = licencia.estado()
     
     # ============================================================
     # Si la licencia NO es válida, mostrar error y cerrar
     # ============================================================
     if not es_valida:
+        if not con_ventana:
+            print(f"Licencia no válida: {mensaje}", file=sys.stderr)
+            return False
+
         def mostrar_error_licencia():
+            import webview
+
             html_error = f"""
             <!DOCTYPE html>
             <html>
@@ -199,12 +210,48 @@ def verificar_y_mostrar_licencia():
 
     return True
 
-def start_app():
+def registrar_medicion_arranque(window):
+    """
+    Con PADEL_MEDIR_ARRANQUE=archivo (benchmarks.arranque): al terminar de
+    cargar la primera página anota el instante y cierra la ventana
+    """
+    ruta = os.environ.get('PADEL_MEDIR_ARRANQUE')
+    if not ruta:
+        return
+
+    def al_cargar():
+        with open(ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'pagina_cargada': time.time()}) + '\n')
+        window.destroy()
+
+    window.events.loaded += al_cargar
+
+def start_app(opciones):
     """Iniciar la aplicación de escritorio"""
-    # Verificar licencia primero
-    if not verificar_y_mostrar_licencia():
+    # Abrir el socket e importar la app en segundo plano (todavía sin atender)
+    run_flask(opciones)
+
+    # Verificar licencia mientras tanto
+    if not verificar_y_mostrar_licencia(con_ventana=not opciones.sin_ventana):
+        shutdown_server()
+        return
+    server.habilitar()
+
+    # ID de hardware listo antes de que se active un serial (sin esperar a wmic)
+    from licencia_manager import precalentar_huella
+    precalentar_huella()
+
+    # Solo servidor: otros mostradores se conectan con el navegador
+    if opciones.sin_ventana:
+        servidor.detener_con_senales(server)
+        server.esperar_listo()
+        print(f"Sirviendo en http://{opciones.host}:{server.puerto}. Ctrl+C para detener.", flush=True)
+        server.esperar()
+        servidor.cerrar_almacenamiento()
         return
 
+    import webview
+
     # Configurar ícono de la aplicación en Windows
     if sys.platform == 'win32':
         if getattr(sys, 'frozen', False):
@@ -215,21 +262,17 @@ def start_app():
         icono_path = os.path.join(base_path, 'icono_padel.ico')
         if os.path.exists(icono_path):
             # Cambiar el ícono de la aplicación en la barra de tareas
+            import ctypes
             myappid = 'padel.reservas.app.1.0'
             ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
 
-    # Iniciar Flask en un thread
-    global server_thread
-    server_thread = threading.Thread(target=run_flask, daemon=True)
-    server_thread.start()
-
-    # Esperar a que Flask inicie
-    time.sleep(1.5)
+    # Abrir la ventana apenas el servidor puede atender (sin esperas fijas)
+    server.esperar_listo()
 
     # Crear ventana de la aplicación
     window = webview.create_window(
         title='Sistema de Turnos - Padel',
-        url='http://127.0.0.1:5000',
+        url=f'http://127.0.0.1:{server.puerto}',
         width=1200,
         height=800,
         resizable=True,
@@ -239,10 +282,31 @@ def start_app():
 
     # Registrar evento de cierre
     window.events.closed += on_closing
+    registrar_medicion_arranque(window)
 
     # Iniciar la interfaz gráfica
     webview.start(debug=False)
 
+def puerto_por_defecto(opciones):
+    """
+    Con ventana y solo en esta computadora, cualquier puerto libre (nunca choca
+    con otra instancia u otro programa); en red o sin ventana, el 5000 de siempre
+    """
+    if opciones.sin_ventana or opciones.host not in ('127.0.0.1', 'localhost', '::1'):
+        return servidor.PUERTO
+    return 0
+
 if __name__ == '__main__':
+    # Procesos trabajadores del ejecutable empaquetado (PyInstaller)
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Sistema de Turnos - Padel')
+    servidor.agregar_argumentos(parser, puerto=None)
+    parser.add_argument('--sin-ventana', action='store_true',
+                        help='Solo el servidor, sin la ventana de escritorio')
+    opciones = parser.parse_args()
+    if opciones.puerto is None:
+        opciones.puerto = puerto_por_defecto(opciones)
+
     # Ejecutable standalone - no mostrar mensajes en consola
-    start_app()
+    start_app(opciones)
@@ -0,0 +1,11 @@
+"""
+Benchmarks - Sistema de Turnos de Pádel
+Scripts para medir el rendimiento del backend con datos sintéticos.
+Se ejecutan desde la carpeta del proyecto, por ejemplo:
+
+    python -m benchmarks.bench_reporte_rango
+    python -m benchmarks.datos_sinteticos /tmp/datos --canchas 20 --anios 3
+    python -m benchmarks.bench_endpoints --canchas 20 --anios 3 --salida resultados.json
+    python -m benchmarks.replay captura.jsonl --datos /tmp/datos --velocidad max --concurrencia 4
+    python -m benchmarks.arranque --repeticiones 5
+"""
@@ -0,0 +1,202 @@
+"""
+Benchmark de arranque de la aplicación de escritorio
+
+Lanza app_escritorio.py varias veces sobre una carpeta de datos sintéticos
+(con una licencia de prueba propia) y mide, desde que se crea el proceso:
+- listo: el servidor avisa que puede atender (sin ventana: la línea 'Sirviendo en')
+- pagina: la primera página se terminó de cargar. Con ventana es el evento
+  'loaded' de PyWebView (la ventana se cierra sola); sin ventana, la primera
+  respuesta 200 completa de '/'
+
+Uso:
+    python -m benchmarks.arranque [--modo ventana|sin-ventana] [--repeticiones N]
+                                  [--datos CARPETA] [--backend json|sqlite] [--salida ARCHIVO]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+from benchmarks.bench_endpoints import commit_actual, percentil
+from benchmarks.datos_sinteticos import generar
+
+
+VERSION_RESULTADOS = 1
+ARCHIVO_SALIDA = 'resultados_arranque.json'
+TIEMPO_MAXIMO = 60          # segundos por arranque antes de darlo por fallido
+ESPERA_SONDEO = 0.005       # segundos entre lecturas del archivo de medición
+PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar_carpeta(carpeta, args):
+    """Datos sintéticos (o copia de --datos) y una licencia de prueba solo para el benchmark"""
+    datos_dir = os.path.join(carpeta, 'datos')
+    if args.datos:
+        shutil.copytree(args.datos, datos_dir)
+    else:
+        generar(datos_dir, canchas=args.canchas, anios=args.anios, backend=args.backend)
+
+    sys.path.insert(0, PROYECTO)
+    from licencia_manager import LicenciaManager
+    archivo_licencia = os.path.join(carpeta, 'licencia.dat')
+    LicenciaManager(archivo_licencia).generar_licencia('Benchmark', 30, 'prueba')
+    return datos_dir, archivo_licencia
+
+
+def _entorno(carpeta, datos_dir, archivo_licencia, medicion):
+    entorno = dict(os.environ)
+    entorno.update({
+        'PADEL_DATOS': datos_dir,
+        'PADEL_LICENCIA': archivo_licencia,
+        'PADEL_MEDIR_ARRANQUE': medicion,
+        'HOME': carpeta,
+        'USERPROFILE': carpeta
+    })
+    entorno.pop('PADEL_CAPTURA', None)
+    return entorno
+
+
+# ================================================================================
+# UN ARRANQUE
+# ================================================================================
+
+def arrancar_con_ventana(carpeta, entorno, medicion):
+    """Segundos hasta la primera página cargada en la ventana (la ventana se cierra sola)"""
+    inicio = time.time()
+    proceso = subprocess.Popen([sys.executable, os.path.join(PROYECTO, 'app_escritorio.py')],
+                               cwd=carpeta, env=entorno)
+    try:
+        while True:
+            if os.path.exists(medicion):
+                with open(medicion, 'r', encoding='utf-8') as f:
+                    linea = f.readline()
+                if linea.endswith('\n'):
+                    return {'pagina_s': json.loads(linea)['pagina_cargada'] - inicio}
+            if proceso.poll() is not None:
+                raise RuntimeError(f'app_escritorio.py terminó con código {proceso.returncode}')
+            if time.time() - inicio > TIEMPO_MAXIMO:
+                raise TimeoutError('La primera página no cargó a tiempo')
+            time.sleep(ESPERA_SONDEO)
+    finally:
+        _terminar(proceso)
+        if os.path.exists(medicion):
+            os.remove(medicion)
+
+
+def arrancar_sin_ventana(carpeta, entorno):
+    """Segundos hasta 'Sirviendo en' y hasta la primera respuesta completa de '/'"""
+    inicio = time.time()
+    proceso = subprocess.Popen([sys.executable, os.path.join(PROYECTO, 'app_escritorio.py'),
+                                '--sin-ventana', '--puerto', '0'],
+                               cwd=carpeta, env=entorno, stdout=subprocess.PIPE, text=True)
+    try:
+        linea = proceso.stdout.readline()
+        listo = time.time() - inicio
+        encontrado = re.search(r':(\d+)\.', linea)
+        if encontrado is None:
+            raise RuntimeError(f'Salida inesperada de app_escritorio.py: {linea!r}')
+        url = f'http://127.0.0.1:{encontrado.group(1)}/'
+        with urllib.request.urlopen(url, timeout=TIEMPO_MAXIMO) as respuesta:
+            respuesta.read()
+            if respuesta.status != 200:
+                raise RuntimeError(f'/ respondió {respuesta.status}')
+        return {'listo_s': listo, 'pagina_s': time.time() - inicio}
+    finally:
+        _terminar(proceso)
+
+
+def _terminar(proceso):
+    if proceso.poll() is None:
+        proceso.terminate()
+    try:
+        proceso.wait(TIEMPO_MAXIMO)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+
+
+# ================================================================================
+# EJECUCIÓN
+# ================================================================================
+
+def resumir(mediciones):
+    resumen = {}
+    for clave in mediciones[0]:
+        ms = [m[clave] * 1000 for m in mediciones]
+        resumen[clave.replace('_s', '_ms')] = {
+            'min': round(min(ms), 1),
+            'mediana': round(percentil(ms, 0.5), 1),
+            'max': round(max(ms), 1)
+        }
+    return resumen
+
+
+def ejecutar(args):
+    carpeta = tempfile.mkdtemp(prefix='padel_arranque_')
+    try:
+        datos_dir, archivo_licencia = preparar_carpeta(carpeta, args)
+        medicion = os.path.join(carpeta, 'arranque.jsonl')
+        entorno = _entorno(carpeta, datos_dir, archivo_licencia, medicion)
+        mediciones = []
+        for numero in range(args.repeticiones):
+            if args.modo == 'ventana':
+                medida = arrancar_con_ventana(carpeta, entorno, medicion)
+            else:
+                medida = arrancar_sin_ventana(carpeta, entorno)
+            mediciones.append(medida)
+            if not args.silencioso:
+                print(f"arranque {numero + 1}: " +
+                      '  '.join(f"{clave} {valor * 1000:.1f} ms" for clave, valor in medida.items()), flush=True)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return {
+        'version': VERSION_RESULTADOS,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'modo': args.modo,
+        'repeticiones': args.repeticiones,
+        'mediciones': [{clave: round(valor, 4) for clave, valor in m.items()} for m in mediciones],
+        'resumen': resumir(mediciones)
+    }
+
+
+def main(argv=None):
+    con_ventana = importlib.util.find_spec('webview') is not None
+    parser = argparse.ArgumentParser(description='Mide el arranque de la aplicación de escritorio')
+    parser.add_argument('--modo', choices=('ventana', 'sin-ventana'),
+                        default='ventana' if con_ventana else 'sin-ventana',
+                        help='Con ventana requiere PyWebView y un escritorio')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--datos', help='Usar una copia de esta carpeta de datos en lugar de generar una')
+    parser.add_argument('--canchas', type=int, default=4)
+    parser.add_argument('--anios', type=float, default=1)
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA, help='Archivo JSON de resultados')
+    parser.add_argument('--silencioso', action='store_true')
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(args)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if not args.silencioso:
+        for clave, valores in resultados['resumen'].items():
+            print(f"{clave:<10} min {valores['min']:>8} ms  mediana {valores['mediana']:>8} ms  "
+                  f"max {valores['max']:>8} ms")
+        print(f"Resultados: {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
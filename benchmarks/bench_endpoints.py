@@ -0,0 +1,256 @@
+"""
+Benchmark de los endpoints más usados
+
+Genera una carpeta de datos sintéticos (o copia una existente), levanta la
+app sobre ella con el cliente de pruebas de Flask y mide cada endpoint
+varias veces. El resultado se guarda en un JSON para comparar corridas
+entre versiones.
+
+Uso:
+    python -m benchmarks.bench_endpoints [--canchas N] [--anios N] [--turnos-fijos N] [--ausencias N]
+                                         [--backend json|sqlite] [--datos CARPETA]
+                                         [--repeticiones N] [--salida ARCHIVO]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.datos_sinteticos import agregar_argumentos, generar, horarios_de
+
+
+VERSION_RESULTADOS = 1
+ARCHIVO_SALIDA = 'resultados_bench_endpoints.json'
+
+
+# ================================================================================
+# MEDICIÓN
+# ================================================================================
+
+def percentil(valores, fraccion):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(fraccion * (len(ordenados) - 1))))]
+
+
+def resumir(duraciones, estados, tamanos):
+    """Estadísticas en milisegundos de una serie de llamadas (la primera se informa aparte)"""
+    ms = [d * 1000 for d in duraciones]
+    siguientes = ms[1:] or ms
+    return {
+        'llamadas': len(ms),
+        'primera_ms': round(ms[0], 3),
+        'min_ms': round(min(siguientes), 3),
+        'mediana_ms': round(percentil(siguientes, 0.5), 3),
+        'media_ms': round(sum(siguientes) / len(siguientes), 3),
+        'p95_ms': round(percentil(siguientes, 0.95), 3),
+        'max_ms': round(max(siguientes), 3),
+        'errores': sum(1 for estado in estados if estado >= 400),
+        'respuesta_bytes': percentil(tamanos, 0.5)
+    }
+
+
+def medir(llamadas):
+    """Ejecuta cada llamada (función sin argumentos que retorna la respuesta) y la cronometra"""
+    duraciones, estados, tamanos = [], [], []
+    for llamada in llamadas:
+        inicio = time.perf_counter()
+        respuesta = llamada()
+        duraciones.append(time.perf_counter() - inicio)
+        estados.append(respuesta.status_code)
+        tamanos.append(len(respuesta.get_data()))
+    return resumir(duraciones, estados, tamanos)
+
+
+# ================================================================================
+# ESCENARIOS
+# ================================================================================
+
+def escenarios(cliente, config, datos, repeticiones, repeticiones_pesadas, semilla=7):
+    """
+    Lista de (nombre, [llamadas]) en el orden en que se ejecutan
+    Las reservas nuevas van a fechas posteriores a los datos (siempre libres)
+    y después se cancelan; importar_backup va al final porque reemplaza todo
+    """
+    azar = random.Random(semilla)
+    horarios = horarios_de(config)
+    canchas = [f"cancha_{i}" for i in range(1, config['cantidad_canchas'] + 1)]
+    desde = datetime.strptime(datos['fecha_desde'], '%Y-%m-%d')
+    hasta = datetime.strptime(datos['fecha_hasta'], '%Y-%m-%d')
+    dias = (hasta - desde).days + 1
+
+    def fecha_al_azar():
+        return (desde + timedelta(days=azar.randrange(dias))).strftime('%Y-%m-%d')
+
+    def post(url, cuerpo):
+        return lambda: cliente.post(url, json=cuerpo)
+
+    nuevas = []
+    for n in range(repeticiones):
+        fecha = (hasta + timedelta(days=1 + n // (len(horarios) * len(canchas)))).strftime('%Y-%m-%d')
+        posicion = n % (len(horarios) * len(canchas))
+        nuevas.append({'fecha': fecha, 'horario': horarios[posicion // len(canchas)],
+                       'cancha_id': canchas[posicion % len(canchas)]})
+
+    mes_desde = max(desde, hasta - timedelta(days=30)).strftime('%Y-%m-%d')
+    anio_desde = max(desde, hasta - timedelta(days=364)).strftime('%Y-%m-%d')
+    total = (datos['fecha_desde'], datos['fecha_hasta'])
+
+    return [
+        ('obtener_disponibilidad', [
+            post('/api/obtener_disponibilidad', {'fecha': fecha_al_azar(), 'horario': azar.choice(horarios)})
+            for _ in range(repeticiones)
+        ]),
+        ('reservar', [
+            post('/api/reservar', {**nueva, 'nombre_cliente': 'Benchmark'}) for nueva in nuevas
+        ]),
+        ('agregar_productos', [
+            post('/api/agregar_productos', {**nueva, 'productos_lista': [{'nombre': 'Agua', 'precio': 1500}]})
+            for nueva in nuevas
+        ]),
+        ('cancelar_reserva', [post('/api/cancelar_reserva', nueva) for nueva in nuevas]),
+        ('finanzas/reporte_diario', [
+            post('/api/finanzas/reporte_diario', {'fecha': fecha_al_azar()}) for _ in range(repeticiones)
+        ]),
+        ('finanzas/reporte_rango (30 días)', [
+            post('/api/finanzas/reporte_rango', {'fecha_desde': mes_desde, 'fecha_hasta': total[1]})
+            for _ in range(repeticiones_pesadas)
+        ]),
+        ('finanzas/reporte_rango (365 días, sin detalle)', [
+            post('/api/finanzas/reporte_rango',
+                 {'fecha_desde': anio_desde, 'fecha_hasta': total[1], 'detalle': False})
+            for _ in range(repeticiones_pesadas)
+        ]),
+        ('finanzas/reporte_rango (todo)', [
+            post('/api/finanzas/reporte_rango', {'fecha_desde': total[0], 'fecha_hasta': total[1]})
+            for _ in range(repeticiones_pesadas)
+        ]),
+        ('exportar_backup', [
+            lambda: cliente.get('/api/exportar_backup') for _ in range(repeticiones_pesadas)
+        ])
+    ]
+
+
+def llamadas_importar(cliente, repeticiones):
+    """Importa el último backup exportado (se lee una sola vez)"""
+    carpeta = os.path.join(os.path.expanduser('~'), 'Downloads')
+    ultimo = max(nombre for nombre in os.listdir(carpeta) if nombre.endswith('.json'))
+    with open(os.path.join(carpeta, ultimo), 'rb') as f:
+        contenido = f.read()
+
+    def importar():
+        return cliente.post('/api/importar_backup', content_type='multipart/form-data',
+                            data={'archivo': (io.BytesIO(contenido), 'backup.json')})
+    return [importar] * repeticiones
+
+
+# ================================================================================
+# EJECUCIÓN
+# ================================================================================
+
+def commit_actual():
+    """Commit de git del árbol medido (None si no es un repositorio)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def importar_app(carpeta, datos_dir, backend=None):
+    """
+    Importa app.py sobre esa carpeta de datos (la toma al importarse)
+    Los backups exportados van a carpeta/Downloads; nunca graba capturas
+    """
+    os.environ['PADEL_DATOS'] = datos_dir
+    if backend:
+        os.environ['PADEL_ALMACENAMIENTO'] = backend
+    os.environ.pop('PADEL_CAPTURA', None)
+    os.environ['HOME'] = os.environ['USERPROFILE'] = carpeta
+    os.makedirs(os.path.join(carpeta, 'Downloads'), exist_ok=True)
+    import app as modulo_app
+    return modulo_app
+
+
+def ejecutar(args):
+    carpeta = tempfile.mkdtemp(prefix='padel_bench_')
+    try:
+        datos_dir = os.path.join(carpeta, 'datos')
+        if args.datos:
+            shutil.copytree(args.datos, datos_dir)
+            datos = {'origen': os.path.abspath(args.datos), 'backend': args.backend}
+        else:
+            inicio = time.perf_counter()
+            datos = generar(datos_dir, args.canchas, args.anios, args.ocupacion,
+                            args.turnos_fijos, args.ausencias, args.backend, semilla=args.semilla)
+            datos['generacion_s'] = round(time.perf_counter() - inicio, 3)
+
+        inicio = time.perf_counter()
+        modulo_app = importar_app(carpeta, datos_dir, args.backend)
+        importacion_s = time.perf_counter() - inicio
+        cliente = modulo_app.app.test_client()
+
+        if 'fecha_desde' not in datos:
+            fechas = sorted(modulo_app.cargar_reservas(solo_lectura=True))
+            datos['fecha_desde'] = fechas[0].partition('_')[0]
+            datos['fecha_hasta'] = fechas[-1].partition('_')[0]
+
+        resultados = {}
+        config = modulo_app.cargar_config(solo_lectura=True)
+        for nombre, llamadas in escenarios(cliente, config, datos, args.repeticiones, args.repeticiones_pesadas):
+            resultados[nombre] = medir(llamadas)
+            _mostrar(nombre, resultados[nombre], args.silencioso)
+        resultados['importar_backup'] = medir(llamadas_importar(cliente, args.repeticiones_pesadas))
+        _mostrar('importar_backup', resultados['importar_backup'], args.silencioso)
+        modulo_app.almacenamiento.cerrar()
+
+        return {
+            'version': VERSION_RESULTADOS,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'python': sys.version.split()[0],
+            'plataforma': platform.platform(),
+            'parametros': {'repeticiones': args.repeticiones, 'repeticiones_pesadas': args.repeticiones_pesadas},
+            'datos': datos,
+            'importar_app_s': round(importacion_s, 3),
+            'endpoints': resultados
+        }
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def _mostrar(nombre, resultado, silencioso):
+    if not silencioso:
+        print(f"{nombre:<48} mediana {resultado['mediana_ms']:>10.3f} ms  p95 {resultado['p95_ms']:>10.3f} ms  "
+              f"primera {resultado['primera_ms']:>10.3f} ms  errores {resultado['errores']}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de los endpoints con datos sintéticos')
+    agregar_argumentos(parser)
+    parser.add_argument('--datos', help='Usar una copia de esta carpeta de datos en lugar de generar una')
+    parser.add_argument('--repeticiones', type=int, default=30, help='Llamadas por endpoint liviano')
+    parser.add_argument('--repeticiones-pesadas', type=int, default=5,
+                        help='Llamadas para reportes de rango y backups')
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA, help='Archivo JSON de resultados')
+    parser.add_argument('--silencioso', action='store_true')
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(args)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if not args.silencioso:
+        print(f"Resultados: {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark del reporte financiero por rango
+
+Compara el motor de una sola pasada (finanzas.calcular_reporte) con el
+algoritmo anterior (día por día recorriendo todos los turnos fijos,
+ausencias y reservas), verifica que ambos den exactamente el mismo
+resultado y muestra cómo escala el motor con el largo del rango.
+
+Uso:
+    python -m benchmarks.bench_reporte_rango [--reservas-por-dia N] [--turnos-fijos N]
+                                             [--sin-anterior] [--json]
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from finanzas import calcular_reporte
+
+
+CONFIG = {
+    'cantidad_canchas': 4,
+    'horario_inicio': '08:00',
+    'horario_fin': '23:00',
+    'duracion_turno': 90,
+    'precio_turno_regular': 10000,
+    'precio_turno_fijo': 9000,
+    'descuento_promocion': 10
+}
+HORARIOS = ['08:00', '09:30', '11:00', '12:30', '14:00', '15:30', '17:00', '18:30', '20:00', '21:30']
+FECHA_INICIO = datetime(2024, 1, 1)
+DIAS_DATOS = 3 * 365            # Historia sintética: tres años
+RANGOS_MESES = (1, 3, 6, 12, 24)
+
+
+# ================================================================================
+# DATOS SINTÉTICOS
+# ================================================================================
+
+def generar_datos(reservas_por_dia, cantidad_turnos_fijos, semilla=42):
+    """Retorna (turnos_fijos, reservas, ausencias) con el formato de los archivos JSON"""
+    azar = random.Random(semilla)
+    canchas = [f"cancha_{i}" for i in range(1, CONFIG['cantidad_canchas'] + 1)]
+
+    turnos_fijos = []
+    ocupados = set()
+    while len(turnos_fijos) < cantidad_turnos_fijos:
+        slot = (azar.randrange(7), azar.choice(HORARIOS), azar.choice(canchas))
+        if slot in ocupados:
+            continue
+        ocupados.add(slot)
+        turnos_fijos.append({
+            'id': len(turnos_fijos) + 1,
+            'dia_semana': slot[0],
+            'horario': slot[1],
+            'cancha_id': slot[2],
+            'nombre_cliente': f"Fijo {len(turnos_fijos) + 1}",
+            'precio_base': 9000,
+            'descuento_aplicado': 900.0,
+            'precio_final': 8100.0,
+            'precio_extras': azar.choice((0, 0, 500, 1500))
+        })
+
+    reservas = {}
+    ausencias = []
+    for n in range(DIAS_DATOS):
+        dia = FECHA_INICIO + timedelta(days=n)
+        fecha = dia.strftime('%Y-%m-%d')
+        for _ in range(reservas_por_dia):
+            horario = azar.choice(HORARIOS)
+            cancha_id = azar.choice(canchas)
+            reservas.setdefault(f"{fecha}_{horario}", {})[cancha_id] = {
+                'nombre': 'Cliente',
+                'precio_base': 10000,
+                'descuento_aplicado': 1000.0,
+                'precio_final': 9000.0,
+                'precio_extras': azar.choice((0, 500))
+            }
+        for turno in turnos_fijos:
+            if turno['dia_semana'] == dia.weekday() and azar.random() < 0.05:
+                ausencias.append({
+                    'clave': f"{fecha}_{turno['horario']}_{turno['cancha_id']}",
+                    'fecha': fecha,
+                    'id_turno_fijo': turno['id']
+                })
+    return turnos_fijos, reservas, ausencias
+
+
+# ================================================================================
+# ALGORITMO ANTERIOR (referencia)
+# ================================================================================
+
+def reporte_anterior(fecha_desde, fecha_hasta, turnos_fijos, reservas, ausencias, config):
+    """Réplica del reporte_rango original: día por día recorriendo todo"""
+    desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
+    hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d')
+    total_recaudado = 0
+    turnos_regulares_count = 0
+    turnos_fijos_count = 0
+    total_descuentos = 0
+    total_extras = 0
+    detalle_turnos = []
+
+    dia_actual = desde
+    while dia_actual <= hasta:
+        fecha_str = dia_actual.strftime('%Y-%m-%d')
+        dia_semana = dia_actual.weekday()
+        for turno_fijo in turnos_fijos:
+            if turno_fijo['dia_semana'] == dia_semana:
+                clave_ausencia = f"{fecha_str}_{turno_fijo['horario']}_{turno_fijo['cancha_id']}"
+                if not any(a['clave'] == clave_ausencia for a in ausencias):
+                    precio_final = turno_fijo.get('precio_final', turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)))
+                    descuento = turno_fijo.get('descuento_aplicado', 0)
+                    precio_extras = turno_fijo.get('precio_extras', 0)
+                    total_recaudado += precio_final + precio_extras
+                    total_descuentos += descuento
+                    total_extras += precio_extras
+                    turnos_fijos_count += 1
+                    detalle_turnos.append({
+                        'tipo': 'Turno Fijo',
+                        'horario': turno_fijo['horario'],
+                        'cancha': turno_fijo['cancha_id'],
+                        'cliente': turno_fijo['nombre_cliente'],
+                        'precio_base': turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000)),
+                        'descuento': descuento,
+                        'precio_final': precio_final,
+                        'productos_extras': turno_fijo.get('productos_extras', ''),
+                        'precio_extras': precio_extras,
+                        'fecha': fecha_str
+                    })
+        for clave_fecha_hora, canchas in reservas.items():
+            if clave_fecha_hora.startswith(fecha_str):
+                for cancha_id, reserva in canchas.items():
+                    if not reserva.get('es_fijo', False):
+                        horario = clave_fecha_hora.split('_')[1]
+                        precio_final = reserva.get('precio_final', reserva.get('precio_base', config.get('precio_turno_regular', 10000)))
+                        descuento = reserva.get('descuento_aplicado', 0)
+                        precio_extras = reserva.get('precio_extras', 0)
+                        total_recaudado += precio_final + precio_extras
+                        total_descuentos += descuento
+                        total_extras += precio_extras
+                        turnos_regulares_count += 1
+                        detalle_turnos.append({
+                            'tipo': 'Turno Regular',
+                            'horario': horario,
+                            'cancha': cancha_id,
+                            'cliente': reserva['nombre'],
+                            'precio_base': reserva.get('precio_base', config.get('precio_turno_regular', 10000)),
+                            'descuento': descuento,
+                            'precio_final': precio_final,
+                            'productos_extras': reserva.get('productos_extras', ''),
+                            'precio_extras': precio_extras,
+                            'fecha': fecha_str
+                        })
+        dia_actual += timedelta(days=1)
+
+    resumen = {
+        'total_recaudado': total_recaudado,
+        'turnos_regulares': turnos_regulares_count,
+        'turnos_fijos': turnos_fijos_count,
+        'total_turnos': turnos_regulares_count + turnos_fijos_count,
+        'total_descuentos': total_descuentos,
+        'total_extras': total_extras,
+        'descuento_promocion_actual': config.get('descuento_promocion', 0)
+    }
+    return resumen, detalle_turnos
+
+
+# ================================================================================
+# MEDICIÓN
+# ================================================================================
+
+def medir(funcion, *args, repeticiones=3):
+    """Mejor tiempo (segundos) de varias ejecuciones y el último resultado"""
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def reservas_en_rango(reservas, fecha_desde, fecha_hasta):
+    """Lo que entrega almacenamiento.obtener_reservas_rango()"""
+    return {
+        clave: canchas for clave, canchas in reservas.items()
+        if fecha_desde <= clave.partition('_')[0] <= fecha_hasta
+    }
+
+
+def ejecutar(reservas_por_dia=20, cantidad_turnos_fijos=60, con_anterior=True):
+    turnos_fijos, reservas, ausencias = generar_datos(reservas_por_dia, cantidad_turnos_fijos)
+    claves_ausentes = frozenset(a['clave'] for a in ausencias)
+
+    resultados = []
+    for meses in RANGOS_MESES:
+        fecha_desde = FECHA_INICIO.strftime('%Y-%m-%d')
+        fecha_hasta = (FECHA_INICIO + timedelta(days=round(meses * 30.44) - 1)).strftime('%Y-%m-%d')
+        reservas_rango = reservas_en_rango(reservas, fecha_desde, fecha_hasta)
+
+        segundos, (resumen, detalle) = medir(
+            calcular_reporte, fecha_desde, fecha_hasta, turnos_fijos, reservas_rango, claves_ausentes, CONFIG
+        )
+        fila = {
+            'meses': meses,
+            'lineas': len(detalle),
+            'motor_ms': round(segundos * 1000, 2),
+            'motor_us_por_linea': round(segundos * 1e6 / max(len(detalle), 1), 3)
+        }
+        if con_anterior:
+            segundos_anterior, esperado = medir(
+                reporte_anterior, fecha_desde, fecha_hasta, turnos_fijos, reservas, ausencias, CONFIG,
+                repeticiones=1
+            )
+            if esperado != (resumen, detalle):
+                raise AssertionError(f'El motor no coincide con el algoritmo anterior ({meses} meses)')
+            fila['anterior_ms'] = round(segundos_anterior * 1000, 2)
+            fila['aceleracion'] = round(segundos_anterior / segundos, 1) if segundos else None
+        resultados.append(fila)
+
+    return {
+        'reservas': sum(len(canchas) for canchas in reservas.values()),
+        'turnos_fijos': len(turnos_fijos),
+        'ausencias': len(ausencias),
+        'resultados': resultados
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de /api/finanzas/reporte_rango')
+    parser.add_argument('--reservas-por-dia', type=int, default=20)
+    parser.add_argument('--turnos-fijos', type=int, default=60)
+    parser.add_argument('--sin-anterior', action='store_true',
+                        help='No medir el algoritmo anterior (es lento con rangos largos)')
+    parser.add_argument('--json', action='store_true', help='Salida en JSON')
+    args = parser.parse_args(argv)
+
+    datos = ejecutar(args.reservas_por_dia, args.turnos_fijos, not args.sin_anterior)
+    if args.json:
+        print(json.dumps(datos, indent=2))
+        return
+
+    print(f"Datos: {datos['reservas']} reservas, {datos['turnos_fijos']} turnos fijos, "
+          f"{datos['ausencias']} ausencias")
+    print(f"{'meses':>6} {'líneas':>8} {'motor ms':>10} {'us/línea':>9} {'anterior ms':>12} {'x':>7}")
+    for fila in datos['resultados']:
+        print(f"{fila['meses']:>6} {fila['lineas']:>8} {fila['motor_ms']:>10} {fila['motor_us_por_linea']:>9} "
+              f"{fila.get('anterior_ms', '-'):>12} {fila.get('aceleracion', '-'):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Generador de datos sintéticos
+
+Crea una carpeta de datos completa (configuración, reservas, turnos fijos y
+ausencias) con el mismo formato que produce la aplicación, a la escala que
+se pida, usando el backend de almacenamiento elegido (JSON o SQLite).
+
+Uso:
+    python -m benchmarks.datos_sinteticos DESTINO [--canchas N] [--anios N] [--ocupacion F]
+                                          [--turnos-fijos N] [--ausencias N]
+                                          [--backend json|sqlite] [--semilla N]
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from almacenamiento import AlmacenamientoJSON, AlmacenamientoSQLite, ARCHIVO_SQLITE, guardar_seleccion
+
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+NOMBRES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elena', 'Facundo', 'Gabriela', 'Hernán', 'Inés', 'Julián']
+PRODUCTOS = [('Agua', 1500), ('Gatorade', 2500), ('Pelotas', 6000), ('Grip', 3000), ('Alquiler paleta', 4000)]
+
+
+def configuracion(canchas):
+    return {
+        'cantidad_canchas': canchas,
+        'horario_inicio': '08:00',
+        'horario_fin': '23:00',
+        'duracion_turno': 90,
+        'precio_turno_regular': 10000,
+        'precio_turno_fijo': 9000,
+        'descuento_promocion': 10
+    }
+
+
+def horarios_de(config):
+    """Misma grilla que app.generar_horarios (sin cruzar medianoche)"""
+    horarios = []
+    actual = datetime.strptime(config['horario_inicio'], '%H:%M')
+    fin = datetime.strptime(config['horario_fin'], '%H:%M')
+    while actual < fin:
+        horarios.append(actual.strftime('%H:%M'))
+        actual += timedelta(minutes=config['duracion_turno'])
+    return horarios
+
+
+def _productos(azar):
+    """(productos_lista, productos_extras, precio_extras); la mayoría sin productos"""
+    if azar.random() >= 0.3:
+        return [], '', 0
+    lista = [{'nombre': nombre, 'precio': precio} for nombre, precio in azar.sample(PRODUCTOS, azar.randint(1, 2))]
+    return lista, ', '.join(f"{p['nombre']} (${p['precio']})" for p in lista), sum(p['precio'] for p in lista)
+
+
+def _precios(config, clave_precio):
+    precio_base = config[clave_precio]
+    descuento = precio_base * (config['descuento_promocion'] / 100)
+    return {
+        'precio_base': precio_base,
+        'descuento_porcentaje': config['descuento_promocion'],
+        'descuento_aplicado': descuento,
+        'precio_final': precio_base - descuento
+    }
+
+
+# ================================================================================
+# GENERACIÓN
+# ================================================================================
+
+def generar_datos(canchas=4, anios=1, ocupacion=0.4, cantidad_turnos_fijos=200, cantidad_ausencias=2000,
+                  hasta=None, semilla=42):
+    """
+    Retorna (config, reservas, turnos_fijos, ausencias)
+    Las reservas cubren los últimos `anios` años hasta `hasta` (hoy por defecto)
+    ocupando esa fracción de los turnos de cada día que no son fijos
+    """
+    azar = random.Random(semilla)
+    config = configuracion(canchas)
+    horarios = horarios_de(config)
+    ids_canchas = [f"cancha_{i}" for i in range(1, canchas + 1)]
+    hasta = hasta or datetime.now().strftime('%Y-%m-%d')
+    fin = datetime.strptime(hasta, '%Y-%m-%d')
+    inicio = fin - timedelta(days=round(anios * 365) - 1)
+
+    slots_semana = [(dia, horario, cancha) for dia in range(7) for horario in horarios for cancha in ids_canchas]
+    turnos_fijos = []
+    fijos_por_dia = {}
+    for numero, (dia, horario, cancha) in enumerate(
+            azar.sample(slots_semana, min(cantidad_turnos_fijos, len(slots_semana))), start=1):
+        productos_lista, productos_extras, precio_extras = _productos(azar)
+        turno = {
+            'id': numero,
+            'dia_semana': dia,
+            'dia_nombre': DIAS_SEMANA[dia],
+            'horario': horario,
+            'cancha_id': cancha,
+            'nombre_cliente': f"{azar.choice(NOMBRES)} (fijo {numero})",
+            'telefono_cliente': f"11{azar.randrange(10**8):08d}",
+            'fecha_creacion': inicio.isoformat(),
+            **_precios(config, 'precio_turno_fijo'),
+            'productos_lista': productos_lista,
+            'productos_extras': productos_extras,
+            'precio_extras': precio_extras
+        }
+        turnos_fijos.append(turno)
+        fijos_por_dia.setdefault(dia, set()).add((horario, cancha))
+
+    reservas = {}
+    fechas = []
+    dia_actual = inicio
+    while dia_actual <= fin:
+        fecha = dia_actual.strftime('%Y-%m-%d')
+        fechas.append((fecha, dia_actual.weekday()))
+        ocupados = fijos_por_dia.get(dia_actual.weekday(), set())
+        for horario in horarios:
+            for cancha in ids_canchas:
+                if (horario, cancha) in ocupados or azar.random() >= ocupacion:
+                    continue
+                productos_lista, productos_extras, precio_extras = _productos(azar)
+                reservas.setdefault(f"{fecha}_{horario}", {})[cancha] = {
+                    'nombre': azar.choice(NOMBRES),
+                    'telefono': f"11{azar.randrange(10**8):08d}",
+                    'fecha_reserva': dia_actual.isoformat(),
+                    'es_fijo': False,
+                    **_precios(config, 'precio_turno_regular'),
+                    'productos_lista': productos_lista,
+                    'productos_extras': productos_extras,
+                    'precio_extras': precio_extras
+                }
+        dia_actual += timedelta(days=1)
+
+    ausencias = []
+    claves = set()
+    fechas_por_dia = {}
+    for fecha, dia in fechas:
+        fechas_por_dia.setdefault(dia, []).append(fecha)
+    posibles = sum(len(fechas_por_dia.get(t['dia_semana'], ())) for t in turnos_fijos)
+    while turnos_fijos and len(ausencias) < min(cantidad_ausencias, posibles):
+        turno = azar.choice(turnos_fijos)
+        fecha = azar.choice(fechas_por_dia[turno['dia_semana']])
+        clave = f"{fecha}_{turno['horario']}_{turno['cancha_id']}"
+        if clave in claves:
+            continue
+        claves.add(clave)
+        ausencias.append({
+            'clave': clave,
+            'fecha': fecha,
+            'horario': turno['horario'],
+            'cancha_id': turno['cancha_id'],
+            'id_turno_fijo': turno['id'],
+            'fecha_marcado': f"{fecha}T08:00:00"
+        })
+
+    return config, reservas, turnos_fijos, ausencias
+
+
+def escribir(destino, config, reservas, turnos_fijos, ausencias, backend='json'):
+    """Guarda los datos en la carpeta con el backend pedido (y lo deja seleccionado)"""
+    os.makedirs(destino, exist_ok=True)
+    if backend == 'sqlite':
+        almacenamiento = AlmacenamientoSQLite(os.path.join(destino, ARCHIVO_SQLITE))
+        guardar_seleccion(destino, 'sqlite')
+    else:
+        almacenamiento = AlmacenamientoJSON(destino)
+        guardar_seleccion(destino, 'json')
+    try:
+        almacenamiento.guardar_config(config)
+        almacenamiento.guardar_reservas(reservas)
+        almacenamiento.guardar_turnos_fijos(turnos_fijos)
+        almacenamiento.guardar_ausencias(ausencias)
+    finally:
+        almacenamiento.cerrar()
+
+
+def generar(destino, canchas=4, anios=1, ocupacion=0.4, cantidad_turnos_fijos=200, cantidad_ausencias=2000,
+            backend='json', hasta=None, semilla=42):
+    """Genera y escribe una carpeta de datos; retorna sus estadísticas"""
+    config, reservas, turnos_fijos, ausencias = generar_datos(
+        canchas, anios, ocupacion, cantidad_turnos_fijos, cantidad_ausencias, hasta, semilla
+    )
+    escribir(destino, config, reservas, turnos_fijos, ausencias, backend)
+    fechas = sorted(clave.partition('_')[0] for clave in reservas)
+    return {
+        'backend': backend,
+        'canchas': canchas,
+        'anios': anios,
+        'ocupacion': ocupacion,
+        'semilla': semilla,
+        'fecha_desde': fechas[0] if fechas else None,
+        'fecha_hasta': fechas[-1] if fechas else None,
+        'reservas': sum(len(canchas_horario) for canchas_horario in reservas.values()),
+        'turnos_fijos': len(turnos_fijos),
+        'ausencias': len(ausencias)
+    }
+
+
+def agregar_argumentos(parser):
+    """Parámetros de escala (compartidos con bench_endpoints)"""
+    parser.add_argument('--canchas', type=int, default=4, help='Cantidad de canchas (2-50)')
+    parser.add_argument('--anios', type=float, default=1, help='Años de historia de reservas (1-5)')
+    parser.add_argument('--ocupacion', type=float, default=0.4, help='Fracción de turnos reservados por día')
+    parser.add_argument('--turnos-fijos', type=int, default=200)
+    parser.add_argument('--ausencias', type=int, default=2000)
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--semilla', type=int, default=42)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera una carpeta de datos sintéticos')
+    parser.add_argument('destino', help='Carpeta de datos a crear (se usa como PADEL_DATOS)')
+    agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    estadisticas = generar(args.destino, args.canchas, args.anios, args.ocupacion,
+                           args.turnos_fijos, args.ausencias, args.backend, semilla=args.semilla)
+    print(json.dumps(estadisticas, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Reproducción de capturas
+
+Reproduce un archivo grabado con PADEL_CAPTURA (ver captura.py) contra una
+copia nueva de una carpeta de datos, respetando los intervalos originales
+(1x), acelerados (Nx) o sin esperas (max), con la concurrencia pedida, y
+reporta rendimiento, percentiles de latencia y tasa de errores.
+
+Con --concurrencia 1 la reproducción es determinística: las solicitudes se
+ejecutan una por una en el orden grabado sobre los mismos datos de partida.
+
+Uso:
+    python -m benchmarks.replay CAPTURA --datos CARPETA [--velocidad 1|N|max]
+                                [--concurrencia N] [--backend json|sqlite] [--salida ARCHIVO]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.bench_endpoints import commit_actual, importar_app, percentil
+from captura import leer_captura
+
+
+VERSION_RESULTADOS = 1
+ARCHIVO_SALIDA = 'resultados_replay.json'
+PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99))
+
+
+def leer_velocidad(texto):
+    """'max' -> None (sin esperas); '1', '2.5', '10x' -> factor de aceleración"""
+    texto = texto.strip().lower()
+    if texto == 'max':
+        return None
+    velocidad = float(texto.rstrip('x'))
+    if velocidad <= 0:
+        raise argparse.ArgumentTypeError('La velocidad debe ser mayor que 0 o "max"')
+    return velocidad
+
+
+def reproducible(solicitud):
+    """Los POST sin cuerpo JSON grabado (subida de backups) no se pueden reenviar"""
+    return solicitud['cuerpo'] is not None or solicitud['metodo'] not in ('POST', 'PUT')
+
+
+# ================================================================================
+# REPRODUCCIÓN
+# ================================================================================
+
+def reproducir(app, solicitudes, velocidad=1.0, concurrencia=1):
+    """
+    Envía las solicitudes en su instante programado (t / velocidad) con un
+    pool de `concurrencia` threads; retorna (resultados, duración en segundos)
+    Cada resultado: regla, estado, estado grabado, latencia y retraso (cuánto
+    después de lo programado empezó, por esperar un thread libre)
+    """
+    locales = threading.local()
+    resultados = [None] * len(solicitudes)
+    t_inicial = solicitudes[0]['t'] if solicitudes else 0
+
+    def enviar(posicion, solicitud, programado):
+        cliente = getattr(locales, 'cliente', None)
+        if cliente is None:
+            cliente = locales.cliente = app.test_client()
+        inicio = time.perf_counter()
+        try:
+            respuesta = cliente.open(
+                solicitud['ruta'], method=solicitud['metodo'],
+                query_string=solicitud.get('query') or None,
+                json=solicitud['cuerpo'] if solicitud['cuerpo'] is not None else None
+            )
+            respuesta.get_data()
+            estado = respuesta.status_code
+        except Exception:
+            estado = None
+        fin = time.perf_counter()
+        resultados[posicion] = {
+            'regla': solicitud.get('regla') or solicitud['ruta'],
+            'estado': estado,
+            'estado_grabado': solicitud.get('estado'),
+            'latencia': fin - inicio,
+            'retraso': max(0.0, inicio - programado)
+        }
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        comienzo = time.perf_counter()
+        for posicion, solicitud in enumerate(solicitudes):
+            programado = comienzo
+            if velocidad is not None:
+                programado += (solicitud['t'] - t_inicial) / velocidad
+                espera = programado - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            pool.submit(enviar, posicion, solicitud, programado)
+    return resultados, time.perf_counter() - comienzo
+
+
+def _latencias_ms(valores):
+    if not valores:
+        return {}
+    ms = [v * 1000 for v in valores]
+    estadisticas = {nombre: round(percentil(ms, fraccion), 3) for nombre, fraccion in PERCENTILES}
+    estadisticas['max'] = round(max(ms), 3)
+    estadisticas['media'] = round(sum(ms) / len(ms), 3)
+    return estadisticas
+
+
+def _es_error(resultado):
+    return resultado['estado'] is None or resultado['estado'] >= 400
+
+
+def resumir(resultados, duracion):
+    errores = sum(1 for r in resultados if _es_error(r))
+    por_ruta = {}
+    for r in resultados:
+        por_ruta.setdefault(r['regla'], []).append(r)
+    return {
+        'solicitudes': len(resultados),
+        'duracion_s': round(duracion, 3),
+        'rendimiento_rps': round(len(resultados) / duracion, 2) if duracion else None,
+        'latencia_ms': _latencias_ms([r['latencia'] for r in resultados]),
+        'retraso_ms': _latencias_ms([r['retraso'] for r in resultados]),
+        'errores': errores,
+        'tasa_errores': round(errores / len(resultados), 4) if resultados else 0,
+        # Estado distinto al grabado: los datos de partida no son los de la captura
+        'estados_distintos': sum(1 for r in resultados if r['estado'] != r['estado_grabado']),
+        'por_ruta': {
+            regla: {
+                'cantidad': len(lista),
+                'errores': sum(1 for r in lista if _es_error(r)),
+                **_latencias_ms([r['latencia'] for r in lista])
+            }
+            for regla, lista in sorted(por_ruta.items())
+        }
+    }
+
+
+# ================================================================================
+# EJECUCIÓN
+# ================================================================================
+
+def ejecutar(args):
+    solicitudes = leer_captura(args.captura)
+    omitidas = [s for s in solicitudes if not reproducible(s)]
+    solicitudes = [s for s in solicitudes if reproducible(s)]
+
+    carpeta = tempfile.mkdtemp(prefix='padel_replay_')
+    try:
+        datos_dir = os.path.join(carpeta, 'datos')
+        shutil.copytree(args.datos, datos_dir)
+        modulo_app = importar_app(carpeta, datos_dir, args.backend)
+        resultados, duracion = reproducir(modulo_app.app, solicitudes, args.velocidad, args.concurrencia)
+        modulo_app.almacenamiento.cerrar()
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return {
+        'version': VERSION_RESULTADOS,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': sys.version.split()[0],
+        'captura': os.path.abspath(args.captura),
+        'datos': os.path.abspath(args.datos),
+        'velocidad': 'max' if args.velocidad is None else args.velocidad,
+        'concurrencia': args.concurrencia,
+        'duracion_grabada_s': round(solicitudes[-1]['t'] - solicitudes[0]['t'], 3) if solicitudes else 0,
+        'omitidas': len(omitidas),
+        **resumir(resultados, duracion)
+    }
+
+
+def _mostrar(resumen):
+    latencia = resumen['latencia_ms']
+    print(f"{resumen['solicitudes']} solicitudes en {resumen['duracion_s']} s "
+          f"(grabadas en {resumen['duracion_grabada_s']} s, {resumen['omitidas']} omitidas)")
+    print(f"Rendimiento: {resumen['rendimiento_rps']} sol/s  Errores: {resumen['errores']} "
+          f"({resumen['tasa_errores']:.2%})  Estados distintos a la captura: {resumen['estados_distintos']}")
+    if latencia:
+        print(f"Latencia ms: p50 {latencia['p50']}  p90 {latencia['p90']}  p95 {latencia['p95']}  "
+              f"p99 {latencia['p99']}  max {latencia['max']}")
+    print(f"{'ruta':<44} {'cant':>6} {'err':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for regla, fila in resumen['por_ruta'].items():
+        print(f"{regla:<44} {fila['cantidad']:>6} {fila['errores']:>5} {fila['p50']:>10} "
+              f"{fila['p95']:>10} {fila['p99']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reproduce una captura de solicitudes')
+    parser.add_argument('captura', help='Archivo grabado con PADEL_CAPTURA')
+    parser.add_argument('--datos', required=True, help='Carpeta de datos de partida (se usa una copia)')
+    parser.add_argument('--velocidad', type=leer_velocidad, default=1.0,
+                        help='1 = tiempo real, N = N veces más rápido, max = sin esperas')
+    parser.add_argument('--concurrencia', type=int, default=1, help='Solicitudes simultáneas como máximo')
+    parser.add_argument('--backend', choices=('json', 'sqlite'),
+                        help='Forzar backend (por defecto el de la carpeta de datos)')
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA, help='Archivo JSON de resultados')
+    args = parser.parse_args(argv)
+
+    resumen = ejecutar(args)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, indent=2, ensure_ascii=False)
+    _mostrar(resumen)
+    print(f"Resultados: {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Bitácora - Sistema de Turnos de Pádel
+Logging estructurado: cada registro es una línea JSON con fecha, nivel,
+módulo, mensaje y campos adicionales.
+
+- Un logger por módulo: obtener_logger('app') -> 'padel.app'
+- Formato perezoso: los argumentos de %-formato y los campos se convierten
+  a texto recién al escribir el registro (si el nivel lo descarta, no cuesta nada)
+- Muestreo: de cada evento DEBUG repetido se escribe 1 de cada N
+- Archivo rotativo padel.log en data_path (más la consola para WARNING o mayor);
+  con servidor.py --procesos N cada trabajador escribe su propio
+  padel.<n>.log (varios procesos no pueden rotar un mismo archivo)
+- Volcados de datos completos (volcar()): apagados por defecto; se prenden
+  en tiempo de ejecución con actualizar(volcados=True) o /api/logging
+
+Variables de entorno: PADEL_LOG_NIVEL (INFO), PADEL_LOG_MUESTREO (10),
+PADEL_LOG_VOLCADOS (0)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+
+RAIZ = 'padel'
+ARCHIVO_LOG = 'padel.log'
+ARCHIVO_LOG_TRABAJADOR = 'padel.{numero}.log'
+TAMANO_MAXIMO_LOG = 5 * 1024 * 1024   # bytes por archivo antes de rotar
+ARCHIVOS_ROTADOS = 3
+NIVELES = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+_estado = {
+    'volcados': os.environ.get('PADEL_LOG_VOLCADOS', '0') == '1',
+    'archivo': None,
+    'trabajador': None
+}
+
+
+def obtener_logger(modulo):
+    """Logger de un módulo (hijo de 'padel')"""
+    return logging.getLogger(f'{RAIZ}.{modulo}')
+
+
+# ================================================================================
+# FORMATO Y MUESTREO
+# ================================================================================
+
+class FormateadorJSON(logging.Formatter):
+    """Un objeto JSON por línea; los campos callables se evalúan recién acá"""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'modulo': record.name,
+            'mensaje': record.getMessage()
+        }
+        for nombre, valor in getattr(record, 'campos', {}).items():
+            if nombre not in datos:
+                datos[nombre] = valor() if callable(valor) else valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar 1 de cada N registros DEBUG de un mismo evento (logger + mensaje)"""
+
+    def __init__(self, cada):
+        super().__init__()
+        self.cada = cada
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.cada <= 1:
+            return True
+        clave = (record.name, record.msg)
+        with self._lock:
+            cantidad = self._contadores.get(clave, 0)
+            self._contadores[clave] = cantidad + 1
+        return cantidad % self.cada == 0
+
+
+_muestreo = FiltroMuestreo(int(os.environ.get('PADEL_LOG_MUESTREO', '10')))
+
+
+# ================================================================================
+# CONFIGURACIÓN
+# ================================================================================
+
+def por_trabajador(numero):
+    """
+    Proceso trabajador número `numero` (servidor.py --procesos N): su log va a
+    padel.<numero>.log. Llamar antes de configurar()
+    """
+    _estado['trabajador'] = numero
+
+
+def configurar(data_path, nivel=None):
+    """Instala el archivo rotativo y la consola en el logger 'padel' (una sola vez)"""
+    raiz = logging.getLogger(RAIZ)
+    if _estado['archivo'] is not None:
+        return raiz
+    raiz.setLevel(_validar_nivel(nivel or os.environ.get('PADEL_LOG_NIVEL', 'INFO')))
+    raiz.propagate = False
+    formateador = FormateadorJSON()
+
+    if _estado['trabajador'] is None:
+        archivo = os.path.join(data_path, ARCHIVO_LOG)
+    else:
+        archivo = os.path.join(data_path, ARCHIVO_LOG_TRABAJADOR.format(numero=_estado['trabajador']))
+    manejador = RotatingFileHandler(archivo, maxBytes=TAMANO_MAXIMO_LOG,
+                                    backupCount=ARCHIVOS_ROTADOS, encoding='utf-8', delay=True)
+    manejador.setFormatter(formateador)
+    manejador.addFilter(_muestreo)
+    raiz.addHandler(manejador)
+
+    # En el ejecutable con ventana no hay consola
+    if sys.stderr is not None:
+        consola = logging.StreamHandler()
+        consola.setLevel(logging.WARNING)
+        consola.setFormatter(formateador)
+        raiz.addHandler(consola)
+
+    _estado['archivo'] = archivo
+    return raiz
+
+
+def _validar_nivel(nivel):
+    nivel = str(nivel).upper()
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel de log no válido (usar {', '.join(NIVELES)})")
+    return nivel
+
+
+def actualizar(nivel=None, volcados=None, muestreo=None):
+    """Cambia nivel, volcados y muestreo en tiempo de ejecución"""
+    if nivel is not None:
+        logging.getLogger(RAIZ).setLevel(_validar_nivel(nivel))
+    if muestreo is not None:
+        muestreo = int(muestreo)
+        if muestreo < 1:
+            raise ValueError('El muestreo debe ser 1 o mayor')
+        _muestreo.cada = muestreo
+    if volcados is not None:
+        _estado['volcados'] = bool(volcados)
+    return estado()
+
+
+def estado():
+    return {
+        'nivel': logging.getLevelName(logging.getLogger(RAIZ).getEffectiveLevel()),
+        'volcados': _estado['volcados'],
+        'muestreo': _muestreo.cada,
+        'archivo': _estado['archivo']
+    }
+
+
+# ================================================================================
+# VOLCADOS DE DATOS
+# ================================================================================
+
+def volcar(logger, evento, **campos):
+    """
+    Registra en DEBUG datos completos (payloads, configuración, resultados)
+    No hace nada salvo que los volcados estén prendidos y el nivel sea DEBUG;
+    los campos pueden ser callables para no armar nada que no se escriba
+    """
+    if _estado['volcados'] and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(evento, extra={'campos': campos})
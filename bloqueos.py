@@ -0,0 +1,295 @@
+"""
+Bloqueos y Escritura Atómica - Sistema de Turnos de Pádel
+Coordina a varios threads y varios procesos que usan la misma carpeta de datos.
+
+- BloqueoArchivo: lock exclusivo entre procesos sobre un archivo .lock
+  (fcntl.flock en Linux/macOS, msvcrt.locking en Windows) combinado con un
+  RLock para los threads del mismo proceso. Es reentrante: un thread que ya
+  lo tiene puede volver a tomarlo (guardar_* dentro de agregar_*).
+- FranjasBloqueo: locks por clave repartidos en franjas (un byte del archivo
+  .lock por franja, con lock de rango entre procesos). Operaciones sobre
+  claves de distinta franja (otra fecha, otra cancha) nunca se esperan.
+- escribir_atomico: escribe en un temporal del mismo directorio, hace fsync
+  y lo renombra sobre el destino. Un corte a mitad de escritura deja el
+  archivo anterior intacto, nunca uno truncado.
+- TransaccionSQLite: BEGIN IMMEDIATE ... COMMIT/ROLLBACK para las bases
+  SQLite de los registros (toma el lock de escritura al empezar)
+- PorRuta: un único objeto por archivo dentro del proceso (locks, registros,
+  servicios), creado la primera vez que se pide
+"""
+
+import errno
+import os
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+CANTIDAD_FRANJAS = 64            # Franjas por archivo (colisiones: 1/64 por par de claves)
+ESPERA_FRANJA = 0.001           # Windows: segundos entre intentos de tomar una franja
+REINTENTOS_REEMPLAZO = 20       # Windows: el destino puede estar abierto por un lector
+ESPERA_REEMPLAZO = 0.01         # segundos entre reintentos (se duplica)
+
+
+# ================================================================================
+# UN OBJETO POR RUTA
+# ================================================================================
+
+class PorRuta:
+    """
+    crear(ruta_absoluta, *args) la primera vez que se pide una ruta; después,
+    el mismo objeto (los args de pedidos posteriores se ignoran)
+    """
+
+    def __init__(self, crear):
+        self._crear = crear
+        self._objetos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta, *args):
+        ruta = os.path.abspath(ruta)
+        with self._lock:
+            objeto = self._objetos.get(ruta)
+            if objeto is None:
+                objeto = self._objetos[ruta] = self._crear(ruta, *args)
+            return objeto
+
+
+# ================================================================================
+# LOCK POR ARCHIVO
+# ================================================================================
+
+class BloqueoArchivo:
+    """Lock exclusivo entre procesos y threads (usar con 'with')"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        self._profundidad = 0       # Cuántas veces lo tomó el thread dueño
+        self._fd = None
+
+    def _bloquear_archivo(self):
+        if self._fd is None:
+            self._fd = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            return
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                # LK_LOCK reintenta 10 veces (1 por segundo) antes de fallar
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _desbloquear_archivo(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            return
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def adquirir(self):
+        self._lock.acquire()
+        if self._profundidad == 0:
+            try:
+                self._bloquear_archivo()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._profundidad += 1
+
+    def liberar(self):
+        self._profundidad -= 1
+        try:
+            if self._profundidad == 0:
+                self._desbloquear_archivo()
+        finally:
+            self._lock.release()
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        self.liberar()
+        return False
+
+
+_bloqueos = PorRuta(BloqueoArchivo)
+
+
+def bloqueo_para(ruta):
+    """BloqueoArchivo de un archivo de datos (ruta + '.lock')"""
+    return _bloqueos.obtener(os.path.abspath(ruta) + '.lock')
+
+
+# ================================================================================
+# LOCKS POR FRANJA
+# ================================================================================
+
+class FranjasBloqueo:
+    """
+    Locks por clave (entre procesos y threads) repartidos en `cantidad`
+    franjas: franja(fecha, cancha_id) retorna el lock de esa clave.
+    Cada franja es reentrante. Un thread nunca debe tomar dos franjas a la vez.
+    """
+
+    def __init__(self, ruta, cantidad=CANTIDAD_FRANJAS):
+        self.ruta = ruta
+        self.cantidad = cantidad
+        self._franjas = [_Franja(self, posicion) for posicion in range(cantidad)]
+        self._lock_archivo = threading.Lock()   # Apertura (y en Windows, seek + locking)
+        self._fd = None
+
+    def franja(self, *clave):
+        # crc32 y no hash(): la misma clave cae en la misma franja en todos los procesos
+        texto = '\x1f'.join(str(parte) for parte in clave)
+        return self._franjas[zlib.crc32(texto.encode('utf-8')) % self.cantidad]
+
+    def _descriptor(self):
+        # Nunca se cierra: cerrar cualquier descriptor del archivo suelta
+        # todos los locks de rango del proceso (fcntl)
+        with self._lock_archivo:
+            if self._fd is None:
+                self._fd = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+            return self._fd
+
+    def _bloquear(self, posicion):
+        fd = self._descriptor()
+        if fcntl is not None:
+            while True:
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX, 1, posicion)
+                    return
+                except InterruptedError:
+                    continue
+                except OSError as e:
+                    # EDEADLK: el kernel ve a los procesos como dueños y puede
+                    # detectar un ciclo que entre threads no existe; reintentar
+                    if e.errno != errno.EDEADLK:
+                        raise
+                    time.sleep(ESPERA_FRANJA)
+        while True:
+            with self._lock_archivo:
+                os.lseek(fd, posicion, os.SEEK_SET)
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    pass
+            time.sleep(ESPERA_FRANJA)
+
+    def _desbloquear(self, posicion):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, posicion)
+            return
+        with self._lock_archivo:
+            os.lseek(self._fd, posicion, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+
+class _Franja:
+    """Una franja de FranjasBloqueo (usar con 'with')"""
+
+    def __init__(self, franjas, posicion):
+        self._franjas = franjas
+        self.posicion = posicion
+        self._lock = threading.RLock()
+        self._profundidad = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._profundidad == 0:
+            try:
+                self._franjas._bloquear(self.posicion)
+            except BaseException:
+                self._lock.release()
+                raise
+        self._profundidad += 1
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        self._profundidad -= 1
+        try:
+            if self._profundidad == 0:
+                self._franjas._desbloquear(self.posicion)
+        finally:
+            self._lock.release()
+        return False
+
+
+_franjas = PorRuta(FranjasBloqueo)
+
+
+def franjas_para(ruta):
+    """FranjasBloqueo de un archivo de datos (ruta + '.franjas.lock')"""
+    return _franjas.obtener(os.path.abspath(ruta) + '.franjas.lock')
+
+
+# ================================================================================
+# ESCRITURA ATÓMICA
+# ================================================================================
+
+def reemplazar(origen, destino):
+    """os.replace con reintentos (Windows no deja reemplazar un archivo abierto)"""
+    espera = ESPERA_REEMPLAZO
+    for intento in range(REINTENTOS_REEMPLAZO):
+        try:
+            os.replace(origen, destino)
+            return
+        except PermissionError:
+            # Windows no deja reemplazar un archivo abierto por otro proceso
+            if intento == REINTENTOS_REEMPLAZO - 1:
+                raise
+            time.sleep(espera)
+            espera = min(espera * 2, 0.5)
+
+
+def escribir_atomico(ruta, escribir, modo='w'):
+    """
+    Llama a escribir(archivo) sobre un temporal y lo renombra sobre ruta
+    Retorna la cantidad de bytes escritos
+    """
+    # Nombre único por proceso y thread: dos escritores nunca comparten temporal
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporal, modo, **({} if 'b' in modo else {'encoding': 'utf-8'})) as f:
+            escribir(f)
+            f.flush()
+            os.fsync(f.fileno())
+            tamano = f.tell()
+        reemplazar(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    return tamano
+
+
+# ================================================================================
+# TRANSACCIONES SQLITE
+# ================================================================================
+
+class TransaccionSQLite:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK si hay un error); retorna la conexión"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def __enter__(self):
+        self.conexion.execute('BEGIN IMMEDIATE')
+        return self.conexion
+
+    def __exit__(self, tipo_error, error, traza):
+        self.conexion.execute('COMMIT' if tipo_error is None else 'ROLLBACK')
+        return False
@@ -0,0 +1,172 @@
+"""
+Cache de Archivos JSON - Sistema de Turnos de Pádel
+Mantiene en memoria el contenido parseado de los archivos de datos y solo
+vuelve a leerlos del disco cuando cambia el archivo (inodo, fecha de
+modificación o tamaño), aunque lo haya modificado otro proceso.
+
+Los datos en cache se guardan "congelados" (dict/list de solo lectura):
+- leer(..., solo_lectura=True) entrega la vista compartida, sin copiar
+- leer(..., solo_lectura=False) entrega una copia modificable
+Así ningún handler puede alterar el contenido compartido por accidente.
+"""
+
+import json
+import os
+import threading
+
+from bloqueos import escribir_atomico
+from metricas import metricas
+
+
+# ================================================================================
+# ESTRUCTURAS DE SOLO LECTURA
+# ================================================================================
+
+def _solo_lectura(*args, **kwargs):
+    raise TypeError('Datos en cache de solo lectura: use una copia para modificarlos')
+
+
+class DictSoloLectura(dict):
+    """dict que rechaza cualquier modificación (sigue siendo serializable a JSON)"""
+
+    __setitem__ = __delitem__ = _solo_lectura
+    clear = pop = popitem = setdefault = update = _solo_lectura
+    __ior__ = _solo_lectura
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return descongelar(self)
+
+
+class ListaSoloLectura(list):
+    """list que rechaza cualquier modificación (sigue siendo serializable a JSON)"""
+
+    __setitem__ = __delitem__ = _solo_lectura
+    append = extend = insert = pop = remove = clear = sort = reverse = _solo_lectura
+    __iadd__ = __imul__ = _solo_lectura
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return descongelar(self)
+
+
+def congelar(datos):
+    """Convierte recursivamente dicts/listas en sus versiones de solo lectura"""
+    if isinstance(datos, dict):
+        return DictSoloLectura((clave, congelar(valor)) for clave, valor in datos.items())
+    if isinstance(datos, list):
+        return ListaSoloLectura(congelar(valor) for valor in datos)
+    return datos
+
+
+def descongelar(datos):
+    """Copia recursiva a dicts/listas comunes (modificables)"""
+    if isinstance(datos, dict):
+        return {clave: descongelar(valor) for clave, valor in datos.items()}
+    if isinstance(datos, list):
+        return [descongelar(valor) for valor in datos]
+    return datos
+
+
+# ================================================================================
+# CACHE
+# ================================================================================
+
+class CacheArchivos:
+    """
+    Cache de archivos JSON validado por (inodo, mtime, tamaño).
+    Las escrituras son atómicas (temporal + rename): cada una crea un inodo
+    nuevo, así que un cambio nunca pasa desapercibido aunque mtime y tamaño
+    coincidan.
+    Clave: ruta absoluta del archivo.
+    """
+
+    def __init__(self):
+        self._entradas = {}   # ruta -> (firma, datos_congelados)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def firma(ruta):
+        """(inodo, mtime_ns, tamaño) del archivo, o None si no existe"""
+        try:
+            stat = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def leer(self, ruta, por_defecto, solo_lectura=False):
+        """
+        Retorna el contenido del archivo JSON (o por_defecto si no existe)
+        Solo relee el disco si el archivo cambió desde la última lectura
+        """
+        datos = self.leer_version(ruta, por_defecto)[1]
+        return datos if solo_lectura else descongelar(datos)
+
+    def leer_version(self, ruta, por_defecto):
+        """(firma, contenido de solo lectura) del archivo: la firma identifica esa versión"""
+        ruta = os.path.abspath(ruta)
+        firma = self.firma(ruta)
+        if firma is None:
+            with self._lock:
+                self._entradas.pop(ruta, None)
+            return None, congelar(por_defecto)
+
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada is not None and entrada[0] == firma:
+                self.aciertos += 1
+                datos = entrada[1]
+            else:
+                entrada = None
+
+        if entrada is None:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = congelar(json.load(f))
+            metricas.sumar_bytes_leidos(os.path.basename(ruta), firma[2])
+            with self._lock:
+                self.fallos += 1
+                self._entradas[ruta] = (firma, datos)
+
+        return firma, datos
+
+    def escribir(self, ruta, datos, **opciones_json):
+        """
+        Escribe el archivo JSON (de forma atómica) y actualiza la cache con
+        lo escrito (la próxima lectura no necesita volver al disco)
+        """
+        ruta = os.path.abspath(ruta)
+        tamano = escribir_atomico(ruta, lambda f: json.dump(datos, f, **opciones_json))
+        congelados = congelar(datos)
+        firma = self.firma(ruta)
+        metricas.sumar_bytes_escritos(os.path.basename(ruta), tamano)
+        with self._lock:
+            self._entradas[ruta] = (firma, congelados)
+
+    def invalidar(self, ruta=None):
+        """Descarta una entrada (o toda la cache si ruta es None)"""
+        with self._lock:
+            if ruta is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(os.path.abspath(ruta), None)
+
+    def estadisticas(self):
+        """Contadores de aciertos/fallos y cantidad de archivos en memoria"""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / total, 4) if total else 0.0,
+                'archivos': len(self._entradas)
+            }
+
+
+# Cache compartida por todo el proceso
+cache_global = CacheArchivos()
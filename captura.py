@@ -0,0 +1,105 @@
+"""
+Captura de Solicitudes - Sistema de Turnos de Pádel
+Graba las solicitudes a /api/* en un archivo (una línea JSON por solicitud)
+para después reproducirlas con benchmarks.replay y así medir el sistema con
+el tráfico real del mostrador.
+
+Se activa con la variable PADEL_CAPTURA=archivo.jsonl (apagada por defecto).
+Cada línea: instante (hora del reloj, time.time()), método, ruta, query,
+cuerpo JSON, estado y duración. Los cuerpos que no son JSON (subida de
+backups) no se graban. Con la hora del reloj las líneas de varios procesos
+(servidor --procesos N) o de varias sesiones en el mismo archivo quedan en
+el orden real; leer_captura las lleva a segundos desde la primera.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+PREFIJO_API = '/api/'
+
+
+class CapturaSolicitudes:
+    """Archivo de captura abierto en modo append (escrituras serializadas)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._archivo = open(ruta, 'a', encoding='utf-8')
+        self.cantidad = 0
+
+    def registrar(self, instante, metodo, ruta, regla, query, cuerpo, estado, duracion):
+        """instante: time.time() al llegar la solicitud"""
+        linea = json.dumps({
+            't': round(instante, 6),
+            'metodo': metodo,
+            'ruta': ruta,
+            'regla': regla,
+            'query': query,
+            'cuerpo': cuerpo,
+            'estado': estado,
+            'duracion_ms': round(duracion * 1000, 3)
+        }, ensure_ascii=False)
+        with self._lock:
+            self._archivo.write(linea + '\n')
+            self._archivo.flush()
+            self.cantidad += 1
+
+    def cerrar(self):
+        with self._lock:
+            self._archivo.close()
+
+
+def leer_captura(ruta):
+    """
+    Lista de solicitudes grabadas, en el orden en que llegaron
+    't' queda en segundos desde la primera solicitud de la captura
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        solicitudes = [json.loads(linea) for linea in f if linea.strip()]
+    solicitudes.sort(key=lambda s: s['t'])
+    if solicitudes:
+        primera = solicitudes[0]['t']
+        for solicitud in solicitudes:
+            solicitud['t'] = round(solicitud['t'] - primera, 6)
+    return solicitudes
+
+
+# ================================================================================
+# INTEGRACIÓN CON FLASK
+# ================================================================================
+
+def instalar(app, captura):
+    """Registra los hooks que graban cada solicitud a /api/*"""
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_captura():
+        if request.path.startswith(PREFIJO_API):
+            g.inicio_captura = (time.time(), time.perf_counter())
+
+    @app.after_request
+    def _registrar_captura(response):
+        medicion = g.pop('inicio_captura', None)
+        if medicion is not None:
+            instante, inicio = medicion
+            cuerpo = request.get_json(silent=True) if request.is_json else None
+            captura.registrar(
+                instante, request.method, request.path,
+                request.url_rule.rule if request.url_rule is not None else None,
+                request.query_string.decode('utf-8', 'replace'), cuerpo,
+                response.status_code, time.perf_counter() - inicio
+            )
+        return response
+
+
+def desde_entorno(app):
+    """Instala la captura si PADEL_CAPTURA apunta a un archivo; retorna la captura o None"""
+    ruta = os.environ.get('PADEL_CAPTURA')
+    if not ruta:
+        return None
+    captura = CapturaSolicitudes(ruta)
+    instalar(app, captura)
+    return captura
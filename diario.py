@@ -0,0 +1,566 @@
+"""
+Diario de Mutaciones - Sistema de Turnos de Pádel
+Registro append-only para reservas y ausencias del backend JSON.
+
+En lugar de reescribir reservas.json completo en cada reserva, cada cambio
+se agrega como una línea compacta a diario.jsonl (con fsync), y el estado
+vive en memoria. Un thread en segundo plano compacta periódicamente el
+diario en los archivos de siempre (reservas.json y ausencias.json).
+
+Al iniciar: se carga la última instantánea y se re-aplican las líneas del
+diario. Una línea final incompleta (corte de luz a mitad de escritura) se
+descarta sin afectar al resto de los datos.
+
+Operaciones registradas (campo "op"):
+    reservar, cancelar, actualizar, ausencia, quitar_ausencia
+
+Las reservas se agrupan por fecha, para que las consultas de un día o de un
+rango solo toquen las reservas de esas fechas. El estado publicado nunca se
+modifica: cada cambio arma un día nuevo y publica una vista nueva de una sola
+vez, así las lecturas (reportes, backups) no toman ningún lock y ven siempre
+un estado consistente aunque haya reservas en curso.
+
+Las mutaciones de reservas y ausencias toman la franja (fecha, cancha) de
+bloqueos.FranjasBloqueo. El lock del diario se toma solo para validar,
+escribir la línea y aplicarla; el fsync se hace después, fuera de ese lock,
+así dos reservas de distinta fecha o cancha nunca esperan el disco de la otra.
+
+Varios procesos pueden usar la misma carpeta de datos:
+- Cada mutación toma el lock de archivo diario.jsonl.lock, primero aplica
+  las líneas que agregaron otros procesos y recién después valida y escribe
+- Las lecturas comparan el tamaño del diario y la generación con lo ya
+  aplicado (dos stat) y se ponen al día solo si algo cambió, leyendo las
+  líneas nuevas sin el lock de archivo (solo una recarga completa lo toma)
+- Compactar o reemplazar los datos cambia la generación (archivo
+  diario.jsonl.generacion): los demás procesos recargan todo
+- Una sola compactación a la vez en todos los procesos
+  (diario.jsonl.compactando.lock)
+"""
+
+import bisect
+import json
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+
+from bloqueos import bloqueo_para, escribir_atomico, franjas_para, reemplazar
+from cache_archivos import DictSoloLectura, ListaSoloLectura, congelar, descongelar
+from metricas import metricas
+from bitacora import obtener_logger
+
+log = obtener_logger('diario')
+
+
+def _escribir_json(ruta, datos):
+    """Escribe un JSON de forma atómica (temporal + fsync + rename)"""
+    tamano = escribir_atomico(ruta, lambda f: json.dump(datos, f, indent=4))
+    metricas.sumar_bytes_escritos(os.path.basename(ruta), tamano)
+
+
+def _firma(ruta):
+    """Identifica una versión del archivo (cambia con cada reemplazo atómico)"""
+    try:
+        stat = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _tamano(ruta):
+    try:
+        return os.path.getsize(ruta)
+    except FileNotFoundError:
+        return 0
+
+
+def _fecha_de(clave_fecha_hora):
+    return clave_fecha_hora.partition('_')[0]
+
+
+# ================================================================================
+# ESTADO PUBLICADO
+# ================================================================================
+
+class EstadoDiario:
+    """
+    Una versión de reservas y ausencias. Nunca se modifica: cada cambio arma
+    un estado nuevo (copiando solo el día afectado) y se publica de una sola
+    vez, así quien tiene un estado puede leerlo entero sin locks.
+    """
+
+    __slots__ = ('dias', 'fechas', 'ausencias', 'version_reservas', 'version_ausencias')
+
+    def __init__(self, dias, fechas, ausencias, version_reservas, version_ausencias):
+        self.dias = dias                            # {fecha: {clave_fecha_hora: {cancha_id: reserva}}}
+        self.fechas = fechas                        # tuple ordenada de las fechas con reservas
+        self.ausencias = ausencias                  # {clave: ausencia} (orden de inserción)
+        self.version_reservas = version_reservas
+        self.version_ausencias = version_ausencias
+
+    @classmethod
+    def vacio(cls):
+        return cls({}, (), {}, 0, 0)
+
+    def con_reservas(self, reservas):
+        """Estado con todas las reservas reemplazadas ({clave_fecha_hora: canchas})"""
+        dias = {}
+        for clave, canchas in reservas.items():
+            dias.setdefault(_fecha_de(clave), {})[clave] = congelar(canchas)
+        return EstadoDiario(
+            {fecha: DictSoloLectura(claves) for fecha, claves in dias.items()}, tuple(sorted(dias)),
+            self.ausencias, self.version_reservas + 1, self.version_ausencias
+        )
+
+    def con_dia(self, fecha, claves):
+        """Estado con las reservas de ese día reemplazadas ({clave_fecha_hora: canchas})"""
+        dias = dict(self.dias)
+        fechas = self.fechas
+        if claves:
+            if fecha not in dias:
+                posicion = bisect.bisect_left(fechas, fecha)
+                fechas = fechas[:posicion] + (fecha,) + fechas[posicion:]
+            dias[fecha] = DictSoloLectura(claves)
+        elif dias.pop(fecha, None) is not None:
+            posicion = bisect.bisect_left(fechas, fecha)
+            fechas = fechas[:posicion] + fechas[posicion + 1:]
+        return EstadoDiario(dias, fechas, self.ausencias, self.version_reservas + 1, self.version_ausencias)
+
+    def con_ausencias(self, ausencias):
+        """Estado con las ausencias reemplazadas ({clave: ausencia} ya congeladas)"""
+        return EstadoDiario(self.dias, self.fechas, ausencias, self.version_reservas, self.version_ausencias + 1)
+
+    # --- Lecturas ---
+
+    def reservas(self):
+        """{clave_fecha_hora: canchas} de todas las fechas, ordenadas por fecha"""
+        return DictSoloLectura(
+            (clave, canchas) for fecha in self.fechas for clave, canchas in self.dias[fecha].items()
+        )
+
+    def reservas_horario(self, clave_fecha_hora):
+        return self.dias.get(_fecha_de(clave_fecha_hora), {}).get(clave_fecha_hora) or DictSoloLectura()
+
+    def reservas_fecha(self, fecha):
+        """{clave_fecha_hora: {cancha_id: reserva}} de un día (mismo orden que reservas())"""
+        return dict(self.dias.get(fecha, {}))
+
+    def reservas_rango(self, fecha_desde, fecha_hasta):
+        """Igual que reservas_fecha pero de fecha_desde a fecha_hasta (inclusive), por fecha"""
+        inicio = bisect.bisect_left(self.fechas, fecha_desde)
+        fin = bisect.bisect_right(self.fechas, fecha_hasta)
+        return {clave: canchas for fecha in self.fechas[inicio:fin] for clave, canchas in self.dias[fecha].items()}
+
+    def lista_ausencias(self):
+        return ListaSoloLectura(self.ausencias.values())
+
+
+class DiarioReservas:
+    """
+    Estado en memoria de reservas y ausencias (EstadoDiario, publicado de una
+    sola vez en cada cambio) + diario append-only en disco.
+    """
+
+    def __init__(self, reservas_file, ausencias_file, diario_file,
+                 intervalo_compactacion=300, max_entradas=1000):
+        self.reservas_file = reservas_file
+        self.ausencias_file = ausencias_file
+        self.diario_file = diario_file
+        self.diario_compactando = diario_file + '.compactando'
+        self.archivo_generacion = diario_file + '.generacion'
+        self.intervalo_compactacion = intervalo_compactacion
+        self.max_entradas = max_entradas
+
+        self._lock = threading.RLock()              # Protege el estado en memoria
+        self._bloqueo = bloqueo_para(diario_file)   # Mutaciones (entre procesos)
+        # Una sola compactación/reemplazo a la vez, en todos los procesos
+        self._bloqueo_compactacion = bloqueo_para(self.diario_compactando)
+        self._franjas = franjas_para(diario_file)   # Una franja por (fecha, cancha)
+        self._offset = 0                            # Bytes del diario ya aplicados
+        self._firma_generacion = None
+        self._sin_confirmar = None                  # Archivo con la última línea escrita, sin fsync
+        self._estado = EstadoDiario.vacio()        # Se reemplaza, nunca se modifica
+        self._entradas_pendientes = 0
+
+        with self._bloqueo_compactacion:
+            with self._lock, self._bloqueo:
+                self._cargar()
+            if os.path.exists(self.diario_compactando):
+                # Una compactación anterior quedó a medias (su proceso ya no tiene
+                # el lock): terminarla. Lo del diario actual queda en el diario.
+                self._escribir_instantanea(self._estado)
+                with self._bloqueo:
+                    os.remove(self.diario_compactando)
+
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._thread = threading.Thread(target=self._bucle_compactacion, daemon=True)
+        self._thread.start()
+
+    # Contadores que cambian con cada modificación (para invalidar índices)
+
+    @property
+    def version_reservas(self):
+        return self._estado.version_reservas
+
+    @property
+    def version_ausencias(self):
+        return self._estado.version_ausencias
+
+    def marca(self):
+        """
+        (generación, tamaño del diario) leídos del disco: cambia con cada
+        modificación de cualquier proceso (compactar o reemplazar cambia la
+        generación), a diferencia de las versiones, que son de este proceso
+        """
+        return (_firma(self.archivo_generacion), _tamano(self.diario_file))
+
+    # ================================================================================
+    # CARGA INICIAL Y REPLAY
+    # ================================================================================
+
+    def _cargar(self):
+        """Estado completo desde la instantánea y los diarios (con el lock de archivo tomado)"""
+        self._firma_generacion = _firma(self.archivo_generacion)
+        reservas = {}
+        if os.path.exists(self.reservas_file):
+            with open(self.reservas_file, 'r', encoding='utf-8') as f:
+                reservas = json.load(f)
+                metricas.sumar_bytes_leidos(os.path.basename(self.reservas_file), f.tell())
+        ausencias = []
+        if os.path.exists(self.ausencias_file):
+            with open(self.ausencias_file, 'r', encoding='utf-8') as f:
+                ausencias = json.load(f)
+                metricas.sumar_bytes_leidos(os.path.basename(self.ausencias_file), f.tell())
+        # Los backups antiguos traen ausencias como dict: solo se usan listas
+        if not isinstance(ausencias, list):
+            ausencias = []
+        # Versiones siempre nuevas: los índices armados antes de recargar ya no valen
+        self._estado = self._estado.con_reservas(reservas).con_ausencias(
+            {a['clave']: congelar(a) for a in ausencias}
+        )
+
+        # Primero el diario que quedó a medio compactar (si lo hay), luego el actual
+        self._replay(self.diario_compactando)
+        self._entradas_pendientes, self._offset = self._replay(self.diario_file)
+
+    def _replay(self, ruta, desde=0, truncar=True):
+        """
+        Re-aplica las operaciones de un archivo de diario a partir del byte `desde`
+        Retorna (cuántas aplicó, hasta qué byte quedó válido)
+        Sin el lock de archivo (truncar=False) la última línea puede estar a
+        medio escribir por otro proceso: se deja para la próxima lectura.
+        """
+        if not os.path.exists(ruta):
+            return 0, 0
+        aplicadas = 0
+        valido_hasta = desde
+        with open(ruta, 'rb') as f:
+            f.seek(desde)
+            for linea in f:
+                if not linea.endswith(b'\n'):
+                    break
+                try:
+                    operacion = json.loads(linea.decode('utf-8'))
+                except ValueError:
+                    # Línea incompleta por un corte a mitad de escritura: se descarta
+                    break
+                self._aplicar(operacion)
+                aplicadas += 1
+                valido_hasta += len(linea)
+        metricas.sumar_bytes_leidos(os.path.basename(self.diario_file), valido_hasta - desde)
+        if truncar and valido_hasta < os.path.getsize(ruta):
+            # Con el lock de archivo tomado nadie está escribiendo: es un resto de un corte
+            with open(ruta, 'r+b') as f:
+                f.truncate(valido_hasta)
+        return aplicadas, valido_hasta
+
+    # ================================================================================
+    # COORDINACIÓN ENTRE PROCESOS
+    # ================================================================================
+
+    def _sincronizar(self):
+        """Aplica lo que escribieron otros procesos (con self._lock y el lock de archivo tomados)"""
+        if _firma(self.archivo_generacion) != self._firma_generacion:
+            self._cargar()
+            return
+        tamano = _tamano(self.diario_file)
+        if tamano == self._offset:
+            return
+        if tamano < self._offset:
+            self._cargar()
+            return
+        aplicadas, self._offset = self._replay(self.diario_file, self._offset)
+        self._entradas_pendientes += aplicadas
+
+    def _verificar_cambios(self):
+        """
+        Antes de leer: si otro proceso modificó el diario, ponerse al día.
+        Las líneas nuevas se aplican sin el lock de archivo (no espera a los
+        escritores); solo una recarga completa (otra generación) lo toma.
+        """
+        if _firma(self.archivo_generacion) == self._firma_generacion:
+            if _tamano(self.diario_file) == self._offset:
+                return
+            with self._lock:
+                tamano = _tamano(self.diario_file)
+                if tamano > self._offset:
+                    aplicadas, self._offset = self._replay(self.diario_file, self._offset, truncar=False)
+                    self._entradas_pendientes += aplicadas
+                # Si mientras tanto se rotó el diario, lo aplicado no vale: recargar
+                if tamano >= self._offset and _firma(self.archivo_generacion) == self._firma_generacion:
+                    return
+        with self._lock, self._bloqueo:
+            self._sincronizar()
+
+    @contextmanager
+    def _mutacion(self, *franja):
+        """
+        Franja de la clave (si se indica) y locks de thread y de archivo, con el
+        estado al día. La línea escrita adentro recibe el fsync al salir, ya
+        sin los locks del diario (solo con la franja tomada).
+        """
+        archivo = None
+        with self._franjas.franja(*franja) if franja else nullcontext():
+            try:
+                with self._lock, self._bloqueo:
+                    self._sincronizar()
+                    try:
+                        yield
+                    finally:
+                        archivo, self._sin_confirmar = self._sin_confirmar, None
+                if archivo is not None:
+                    os.fsync(archivo.fileno())
+            finally:
+                if archivo is not None:
+                    archivo.close()
+
+    def _nueva_generacion(self):
+        """Avisa a los demás procesos que deben recargar todo (con el lock de archivo tomado)"""
+        try:
+            with open(self.archivo_generacion, 'r', encoding='utf-8') as f:
+                generacion = int(f.read() or 0) + 1
+        except (FileNotFoundError, ValueError):
+            generacion = 1
+        escribir_atomico(self.archivo_generacion, lambda f: f.write(str(generacion)))
+        self._firma_generacion = _firma(self.archivo_generacion)
+
+    # ================================================================================
+    # APLICAR OPERACIONES
+    # ================================================================================
+
+    @staticmethod
+    def _franja_ausencia(clave_ausencia):
+        """(fecha, cancha_id) de una clave de ausencia (fecha_horario_cancha)"""
+        fecha, _, resto = clave_ausencia.partition('_')
+        return fecha, resto.partition('_')[2]
+
+    def _aplicar(self, op):
+        """
+        Aplica una operación al estado en memoria.
+        Todas son idempotentes sobre su clave (re-aplicarlas no cambia el resultado).
+        """
+        tipo = op['op']
+        estado = self._estado
+        if tipo == 'ausencia':
+            if op['datos']['clave'] not in estado.ausencias:
+                ausencias = dict(estado.ausencias)
+                ausencias[op['datos']['clave']] = congelar(op['datos'])
+                self._estado = estado.con_ausencias(ausencias)
+            return
+        if tipo == 'quitar_ausencia':
+            if op['clave'] in estado.ausencias:
+                ausencias = dict(estado.ausencias)
+                del ausencias[op['clave']]
+                self._estado = estado.con_ausencias(ausencias)
+            return
+
+        clave = op['clave']
+        fecha = _fecha_de(clave)
+        claves = dict(estado.dias.get(fecha, {}))
+        canchas = dict(claves.get(clave, {}))
+        if tipo == 'reservar':
+            canchas[op['cancha']] = congelar(op['datos'])
+        elif tipo == 'cancelar':
+            if canchas.pop(op['cancha'], None) is None:
+                return
+        elif tipo == 'actualizar':
+            if op['cancha'] not in canchas:
+                return
+            reserva = dict(canchas[op['cancha']])
+            reserva.update(congelar(op['cambios']))
+            canchas[op['cancha']] = DictSoloLectura(reserva)
+        if canchas:
+            claves[clave] = DictSoloLectura(canchas)
+        else:
+            claves.pop(clave, None)
+        self._estado = estado.con_dia(fecha, claves)
+
+    def _registrar(self, op):
+        """
+        Agrega la operación al diario y luego la aplica en memoria (dentro de
+        _mutacion, que hace el fsync al salir sobre este mismo archivo)
+        """
+        linea = (json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        # Se abre en cada escritura: otro proceso puede haber rotado el archivo
+        archivo = open(self.diario_file, 'ab')
+        try:
+            archivo.write(linea)
+            archivo.flush()
+        except BaseException:
+            archivo.close()
+            raise
+        self._sin_confirmar = archivo
+        self._offset += len(linea)
+        metricas.sumar_bytes_escritos(os.path.basename(self.diario_file), len(linea))
+        self._aplicar(op)
+        self._entradas_pendientes += 1
+        if self._entradas_pendientes >= self.max_entradas:
+            self._despertar.set()
+
+    # ================================================================================
+    # LECTURA
+    # ================================================================================
+
+    # Sin locks: leen el estado publicado, que nunca cambia
+
+    def estado(self):
+        """Estado vigente (EstadoDiario), al día con lo que escribieron otros procesos"""
+        self._verificar_cambios()
+        return self._estado
+
+    def reservas(self, solo_lectura=False):
+        vista = self.estado().reservas()
+        return vista if solo_lectura else descongelar(vista)
+
+    def reservas_horario(self, clave_fecha_hora):
+        return self.estado().reservas_horario(clave_fecha_hora)
+
+    def reservas_fecha(self, fecha):
+        return self.estado().reservas_fecha(fecha)
+
+    def reservas_rango(self, fecha_desde, fecha_hasta):
+        return self.estado().reservas_rango(fecha_desde, fecha_hasta)
+
+    def ausencias(self, solo_lectura=False):
+        vista = self.estado().lista_ausencias()
+        return vista if solo_lectura else descongelar(vista)
+
+    # ================================================================================
+    # MUTACIONES (una línea de diario cada una)
+    # ================================================================================
+
+    def reservar(self, clave_fecha_hora, cancha_id, reserva):
+        """Retorna False si la cancha ya estaba reservada"""
+        with self._mutacion(_fecha_de(clave_fecha_hora), cancha_id):
+            if cancha_id in self._estado.reservas_horario(clave_fecha_hora):
+                return False
+            self._registrar({'op': 'reservar', 'clave': clave_fecha_hora, 'cancha': cancha_id, 'datos': reserva})
+            return True
+
+    def cancelar(self, clave_fecha_hora, cancha_id):
+        """Retorna False si la reserva no existía"""
+        with self._mutacion(_fecha_de(clave_fecha_hora), cancha_id):
+            if cancha_id not in self._estado.reservas_horario(clave_fecha_hora):
+                return False
+            self._registrar({'op': 'cancelar', 'clave': clave_fecha_hora, 'cancha': cancha_id})
+            return True
+
+    def actualizar(self, clave_fecha_hora, cancha_id, cambios):
+        """Retorna False si la reserva no existía"""
+        with self._mutacion(_fecha_de(clave_fecha_hora), cancha_id):
+            if cancha_id not in self._estado.reservas_horario(clave_fecha_hora):
+                return False
+            self._registrar({'op': 'actualizar', 'clave': clave_fecha_hora, 'cancha': cancha_id, 'cambios': cambios})
+            return True
+
+    def marcar_ausencia(self, ausencia):
+        """Retorna False si ya había una ausencia con esa clave"""
+        with self._mutacion(*self._franja_ausencia(ausencia['clave'])):
+            if ausencia['clave'] in self._estado.ausencias:
+                return False
+            self._registrar({'op': 'ausencia', 'datos': ausencia})
+            return True
+
+    def quitar_ausencia(self, clave_ausencia):
+        with self._mutacion(*self._franja_ausencia(clave_ausencia)):
+            if clave_ausencia in self._estado.ausencias:
+                self._registrar({'op': 'quitar_ausencia', 'clave': clave_ausencia})
+
+    def reemplazar(self, reservas=None, ausencias=None):
+        """
+        Reemplaza reservas y/o ausencias completas (importar backup, cambio
+        de precios). Escribe la instantánea en el momento y vacía el diario.
+        reservas puede ser una función que recibe una copia modificable de
+        las actuales y retorna las nuevas (lectura y escritura sin cortes).
+        """
+        with self._bloqueo_compactacion, self._mutacion():
+            estado = self._estado
+            if callable(reservas):
+                reservas = reservas(descongelar(estado.reservas()))
+            if reservas is not None:
+                estado = estado.con_reservas(reservas)
+            if ausencias is not None:
+                if not isinstance(ausencias, list):
+                    ausencias = []
+                estado = estado.con_ausencias({a['clave']: congelar(a) for a in ausencias})
+            self._estado = estado
+            self._escribir_instantanea(estado)
+            open(self.diario_file, 'wb').close()
+            if os.path.exists(self.diario_compactando):
+                os.remove(self.diario_compactando)
+            self._offset = 0
+            self._entradas_pendientes = 0
+            self._nueva_generacion()
+
+    # ================================================================================
+    # COMPACTACIÓN
+    # ================================================================================
+
+    def _escribir_instantanea(self, estado):
+        """Escribe un estado publicado (no cambia: no hace falta el lock)"""
+        _escribir_json(self.reservas_file, estado.reservas())
+        _escribir_json(self.ausencias_file, estado.lista_ausencias())
+
+    def compactar(self):
+        """
+        Vuelca el estado actual en reservas.json/ausencias.json y descarta el diario.
+        Los escritores solo esperan el instante en que se rota el archivo de diario.
+        """
+        with self._bloqueo_compactacion:
+            with self._mutacion():
+                # Un diario a medio compactar que quedó de un proceso caído se
+                # termina sin rotar (el estado al día ya incluye sus líneas)
+                previo = os.path.exists(self.diario_compactando)
+                if not self._entradas_pendientes and not previo:
+                    return
+                estado = self._estado
+                if not previo:
+                    # Rotar el diario: lo nuevo va a un archivo vacío (en Windows
+                    # se reintenta mientras otro thread termina su fsync)
+                    reemplazar(self.diario_file, self.diario_compactando)
+                    open(self.diario_file, 'wb').close()
+                    self._offset = 0
+                    self._entradas_pendientes = 0
+                    self._nueva_generacion()
+
+            self._escribir_instantanea(estado)
+            # Con el lock de archivo: nadie está recargando a partir de este diario
+            with self._bloqueo:
+                os.remove(self.diario_compactando)
+
+    def _bucle_compactacion(self):
+        while not self._detener.is_set():
+            self._despertar.wait(self.intervalo_compactacion)
+            self._despertar.clear()
+            try:
+                self.compactar()
+            except OSError as e:
+                # Se reintenta en el próximo ciclo; el diario sigue siendo válido
+                log.error('Compactación del diario: %s', e)
+
+    def cerrar(self):
+        """Compacta lo pendiente y detiene el thread de compactación"""
+        self._detener.set()
+        self._despertar.set()
+        self._thread.join(timeout=5)
+        self.compactar()
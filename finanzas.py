@@ -0,0 +1,347 @@
+"""
+Motor de Reportes Financieros - Sistema de Turnos de Pádel
+Arma el detalle y el resumen de /api/finanzas/reporte_diario y reporte_rango
+en una sola pasada sobre los datos del rango.
+
+- Las reservas del rango se agrupan por fecha una sola vez
+- Los turnos fijos se agrupan por día de la semana y su línea de detalle se
+  arma una sola vez; cada fecha del rango solo la copia (agregando 'fecha')
+- Las ausencias se consultan en un set de claves "fecha_horario_cancha"
+
+El costo queda proporcional a los días del rango más los turnos realmente
+incluidos, en lugar de (días x todos los turnos fijos, ausencias y reservas).
+
+El orden del detalle es el de siempre: día por día, primero los turnos
+fijos (en el orden en que fueron creados) y luego las reservas regulares.
+
+También calcula las filas diarias (totales de un día) que se materializan
+en los rollups (ver rollups.py), genera la exportación en CSV/NDJSON
+línea por línea, sin armar el detalle completo en memoria, y pagina el
+detalle con cursores en orden (fecha, horario, cancha).
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+
+TIPO_TURNO_FIJO = 'Turno Fijo'
+TIPO_TURNO_REGULAR = 'Turno Regular'
+
+
+# ================================================================================
+# LÍNEAS DE DETALLE
+# ================================================================================
+
+def linea_turno_fijo(turno_fijo, config):
+    """Línea de detalle de un turno fijo (sin la fecha)"""
+    precio_base = turno_fijo.get('precio_base', config.get('precio_turno_fijo', 9000))
+    return {
+        'tipo': TIPO_TURNO_FIJO,
+        'horario': turno_fijo['horario'],
+        'cancha': turno_fijo['cancha_id'],
+        'cliente': turno_fijo['nombre_cliente'],
+        'precio_base': precio_base,
+        'descuento': turno_fijo.get('descuento_aplicado', 0),
+        'precio_final': turno_fijo.get('precio_final', precio_base),
+        'productos_extras': turno_fijo.get('productos_extras', ''),
+        'precio_extras': turno_fijo.get('precio_extras', 0)
+    }
+
+
+def linea_reserva(horario, cancha_id, reserva, config):
+    """Línea de detalle de una reserva regular (sin la fecha)"""
+    precio_base = reserva.get('precio_base', config.get('precio_turno_regular', 10000))
+    return {
+        'tipo': TIPO_TURNO_REGULAR,
+        'horario': horario,
+        'cancha': cancha_id,
+        'cliente': reserva['nombre'],
+        'precio_base': precio_base,
+        'descuento': reserva.get('descuento_aplicado', 0),
+        'precio_final': reserva.get('precio_final', precio_base),
+        'productos_extras': reserva.get('productos_extras', ''),
+        'precio_extras': reserva.get('precio_extras', 0)
+    }
+
+
+# ================================================================================
+# GENERACIÓN DEL DETALLE (una pasada)
+# ================================================================================
+
+def fechas_del_rango(fecha_desde, fecha_hasta):
+    """Lista de fechas 'YYYY-MM-DD' de fecha_desde a fecha_hasta (inclusive)"""
+    desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
+    cantidad_dias = (datetime.strptime(fecha_hasta, '%Y-%m-%d') - desde).days + 1
+    return [(desde + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(cantidad_dias)]
+
+
+def agrupar_reservas_por_fecha(reservas):
+    """
+    { "fecha_horario": {cancha_id: reserva} } -> { fecha: [(horario, canchas)] }
+    Conserva el orden de las reservas dentro de cada fecha.
+    """
+    por_fecha = {}
+    for clave_fecha_hora, canchas in reservas.items():
+        fecha, _, horario = clave_fecha_hora.partition('_')
+        por_fecha.setdefault(fecha, []).append((horario, canchas))
+    return por_fecha
+
+
+def iterar_detalle(fecha_desde, fecha_hasta, turnos_fijos, reservas, claves_ausentes, config,
+                   incluir_fecha=True):
+    """
+    Genera las líneas de detalle de fecha_desde a fecha_hasta (inclusive)
+
+    turnos_fijos:    lista de turnos fijos tal como están guardados
+    reservas:        { "fecha_horario": {cancha_id: reserva} } (puede traer otras fechas)
+    claves_ausentes: set de claves "fecha_horario_cancha"
+    incluir_fecha:   agrega 'fecha' a cada línea (el reporte diario no la lleva)
+    """
+    desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
+    hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d')
+
+    # Patrón semanal: dia_semana -> [(horario, cancha_id, línea)]
+    semana = {}
+    for turno_fijo in turnos_fijos:
+        semana.setdefault(turno_fijo['dia_semana'], []).append(
+            (turno_fijo['horario'], turno_fijo['cancha_id'], linea_turno_fijo(turno_fijo, config))
+        )
+
+    reservas_por_fecha = agrupar_reservas_por_fecha(reservas)
+
+    for n in range((hasta - desde).days + 1):
+        dia = desde + timedelta(days=n)
+        fecha = dia.strftime('%Y-%m-%d')
+
+        for horario, cancha_id, linea in semana.get(dia.weekday(), ()):
+            if f"{fecha}_{horario}_{cancha_id}" in claves_ausentes:
+                continue
+            linea = dict(linea)
+            if incluir_fecha:
+                linea['fecha'] = fecha
+            yield linea
+
+        for horario, canchas in reservas_por_fecha.get(fecha, ()):
+            for cancha_id, reserva in canchas.items():
+                if reserva.get('es_fijo', False):  # Solo contar regulares
+                    continue
+                linea = linea_reserva(horario, cancha_id, reserva, config)
+                if incluir_fecha:
+                    linea['fecha'] = fecha
+                yield linea
+
+
+def iterar_detalle_por_tramos(fecha_desde, fecha_hasta, turnos_fijos, obtener_reservas_rango,
+                              claves_ausentes, config, dias_por_tramo=31):
+    """
+    Igual que iterar_detalle, pero pide las reservas de a tramos de
+    dias_por_tramo días (obtener_reservas_rango(desde, hasta)), así la memoria
+    usada no depende del largo del rango
+    """
+    desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
+    hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d')
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=dias_por_tramo - 1), hasta)
+        tramo_desde = inicio.strftime('%Y-%m-%d')
+        tramo_hasta = fin.strftime('%Y-%m-%d')
+        yield from iterar_detalle(tramo_desde, tramo_hasta, turnos_fijos,
+                                  obtener_reservas_rango(tramo_desde, tramo_hasta),
+                                  claves_ausentes, config)
+        inicio = fin + timedelta(days=1)
+
+
+# ================================================================================
+# RESUMEN
+# ================================================================================
+
+# Campos de una fila diaria (rollup)
+CAMPOS_FILA = ('turnos_regulares', 'turnos_fijos', 'total_recaudado', 'total_descuentos', 'total_extras')
+
+
+class AcumuladorFinanzas:
+    """Suma los totales del resumen a medida que llegan las líneas de detalle"""
+
+    def __init__(self):
+        self.total_recaudado = 0
+        self.turnos_regulares = 0
+        self.turnos_fijos = 0
+        self.total_descuentos = 0
+        self.total_extras = 0
+
+    def sumar_fila(self, fila):
+        """Suma los totales ya calculados de un día"""
+        for campo in CAMPOS_FILA:
+            setattr(self, campo, getattr(self, campo) + fila[campo])
+
+    def fila(self):
+        """Totales acumulados en formato de fila diaria"""
+        return {campo: getattr(self, campo) for campo in CAMPOS_FILA}
+
+    def agregar(self, linea):
+        self.total_recaudado += linea['precio_final'] + linea['precio_extras']
+        self.total_descuentos += linea['descuento']
+        self.total_extras += linea['precio_extras']
+        if linea['tipo'] == TIPO_TURNO_FIJO:
+            self.turnos_fijos += 1
+        else:
+            self.turnos_regulares += 1
+        return linea
+
+    def resumen(self, config):
+        return {
+            'total_recaudado': self.total_recaudado,
+            'turnos_regulares': self.turnos_regulares,
+            'turnos_fijos': self.turnos_fijos,
+            'total_turnos': self.turnos_regulares + self.turnos_fijos,
+            'total_descuentos': self.total_descuentos,
+            'total_extras': self.total_extras,
+            'descuento_promocion_actual': config.get('descuento_promocion', 0)
+        }
+
+
+def calcular_reporte(fecha_desde, fecha_hasta, turnos_fijos, reservas, claves_ausentes, config,
+                     incluir_fecha=True):
+    """Retorna (resumen, detalle) del rango"""
+    acumulador = AcumuladorFinanzas()
+    detalle = [
+        acumulador.agregar(linea)
+        for linea in iterar_detalle(fecha_desde, fecha_hasta, turnos_fijos, reservas,
+                                    claves_ausentes, config, incluir_fecha)
+    ]
+    return acumulador.resumen(config), detalle
+
+
+def calcular_filas_diarias(fecha_desde, fecha_hasta, turnos_fijos, reservas, claves_ausentes, config):
+    """
+    Retorna { fecha: fila } con los totales de cada día del rango
+    (los días sin movimientos también tienen su fila, en cero)
+    """
+    acumuladores = {fecha: AcumuladorFinanzas() for fecha in fechas_del_rango(fecha_desde, fecha_hasta)}
+    for linea in iterar_detalle(fecha_desde, fecha_hasta, turnos_fijos, reservas, claves_ausentes, config):
+        acumuladores[linea['fecha']].agregar(linea)
+    return {fecha: acumulador.fila() for fecha, acumulador in acumuladores.items()}
+
+
+# ================================================================================
+# FILTROS Y PAGINACIÓN
+# ================================================================================
+
+# Valores del filtro 'tipo' de la API
+TIPOS_FILTRO = {'fijo': TIPO_TURNO_FIJO, 'regular': TIPO_TURNO_REGULAR}
+
+
+def clave_orden(linea):
+    """Orden estable del detalle paginado: (fecha, horario, cancha, tipo)"""
+    return (linea['fecha'], linea['horario'], linea['cancha'], linea['tipo'])
+
+
+def ordenar_por_dia(lineas):
+    """
+    Ordena las líneas por clave_orden sin juntarlas todas: los días ya llegan
+    en orden, así que alcanza con ordenar cada día por separado
+    """
+    for _, del_dia in groupby(lineas, key=itemgetter('fecha')):
+        yield from sorted(del_dia, key=clave_orden)
+
+
+def filtrar_lineas(lineas, tipo=None, cancha=None, cliente=None):
+    """
+    tipo:    'fijo' o 'regular'
+    cancha:  cancha_id exacto (ej: 'cancha_2')
+    cliente: texto contenido en el nombre (sin distinguir mayúsculas)
+    """
+    if tipo is not None:
+        if tipo not in TIPOS_FILTRO:
+            raise ValueError('Tipo no válido (usar fijo o regular)')
+        tipo = TIPOS_FILTRO[tipo]
+    if cliente:
+        cliente = cliente.casefold()
+    for linea in lineas:
+        if tipo is not None and linea['tipo'] != tipo:
+            continue
+        if cancha and linea['cancha'] != cancha:
+            continue
+        if cliente and cliente not in str(linea['cliente']).casefold():
+            continue
+        yield linea
+
+
+def codificar_cursor(clave):
+    """Cursor opaco a partir de la clave de orden de la última línea entregada"""
+    return base64.urlsafe_b64encode(json.dumps(list(clave)).encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(cursor):
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        raise ValueError('Cursor no válido')
+    if not isinstance(clave, list) or len(clave) != 4 or not all(isinstance(v, str) for v in clave):
+        raise ValueError('Cursor no válido')
+    return tuple(clave)
+
+
+def paginar(lineas, limite, despues_de=None):
+    """
+    Toma hasta 'limite' líneas (ya ordenadas) posteriores a la clave 'despues_de'
+    Retorna (pagina, cursor_siguiente); el cursor es None si no hay más líneas.
+    Solo consume del generador lo necesario para llenar la página.
+    """
+    pagina = []
+    for linea in lineas:
+        if despues_de is not None and clave_orden(linea) <= despues_de:
+            continue
+        if len(pagina) == limite:
+            return pagina, codificar_cursor(clave_orden(pagina[-1]))
+        pagina.append(linea)
+    return pagina, None
+
+
+# ================================================================================
+# EXPORTACIÓN (streaming)
+# ================================================================================
+
+COLUMNAS_EXPORTACION = ('fecha', 'tipo', 'horario', 'cancha', 'cliente', 'precio_base',
+                        'descuento', 'precio_final', 'productos_extras', 'precio_extras')
+
+
+def exportar_csv(lineas, config):
+    """
+    Genera el CSV de a una fila (encabezado, detalle y al final el resumen)
+    Empieza con BOM para que Excel reconozca los acentos
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def fila(valores):
+        escritor.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return texto
+
+    acumulador = AcumuladorFinanzas()
+    yield '\ufeff' + fila(COLUMNAS_EXPORTACION)
+    for linea in lineas:
+        acumulador.agregar(linea)
+        yield fila([linea.get(columna, '') for columna in COLUMNAS_EXPORTACION])
+
+    yield fila([])
+    yield fila(['RESUMEN'])
+    for campo, valor in acumulador.resumen(config).items():
+        yield fila([campo, valor])
+
+
+def exportar_ndjson(lineas, config):
+    """Genera una línea JSON por turno y una última línea {"resumen": {...}}"""
+    acumulador = AcumuladorFinanzas()
+    for linea in lineas:
+        acumulador.agregar(linea)
+        yield json.dumps(linea, ensure_ascii=False) + '\n'
+    yield json.dumps({'resumen': acumulador.resumen(config)}, ensure_ascii=False) + '\n'
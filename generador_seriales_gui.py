@@ -6,10 +6,12 @@ Aplicación standalone para generar seriales de licencia
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import sys
 import os
-import json
+import multiprocessing
+import queue
+import threading
 from datetime import datetime, timedelta
 import traceback
 
@@ -22,6 +24,8 @@ else:
 sys.path.insert(0, base_path)
 
 from licencia_manager import LicenciaManager
+from registro_clientes import ARCHIVO_JSON, ARCHIVO_REGISTRO, DIAS_POR_VENCER, nuevo_registro, registro_para
+import lote_seriales
 
 class GeneradorSerialesGUI:
     def __init__(self, root):
@@ -41,6 +45,12 @@ class GeneradorSerialesGUI:
         # Manager de licencias
         self.manager = LicenciaManager()
         
+        # Registro de clientes (importa registro_clientes.json la primera vez)
+        self.registro = registro_para(
+            os.path.join(base_path, ARCHIVO_REGISTRO),
+            os.path.join(base_path, ARCHIVO_JSON)
+        )
+        
         # Crear interfaz
         self.crear_interfaz()
         
@@ -243,7 +253,22 @@ class GeneradorSerialesGUI:
             command=self.ver_registros,
             height=2
         )
-        btn_registros.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        btn_registros.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        # Botón generar por lote
+        self.btn_lote = tk.Button(
+            botones_frame,
+            text="Generar Lote (CSV)",
+            font=("Segoe UI", 12, "bold"),
+            bg="#2196F3",
+            fg="white",
+            activebackground="#1976D2",
+            activeforeground="white",
+            cursor="hand2",
+            command=self.generar_lote,
+            height=2
+        )
+        self.btn_lote.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
         
         # Resultado
         resultado_frame = tk.LabelFrame(
@@ -290,48 +315,19 @@ class GeneradorSerialesGUI:
         self.entry_dias.focus()
     
     def guardar_registro(self, nombre, apellido, contacto, tipo, dias, serial, datos):
-        """Guarda el registro del cliente y serial en un archivo JSON"""
-        archivo_registro = os.path.join(base_path, "registro_clientes.json")
-
-        # Cargar registros existentes (manejar archivo vacío o corrupto)
-        registros = []
-        if os.path.exists(archivo_registro):
-            try:
-                with open(archivo_registro, 'r', encoding='utf-8') as f:
-                    registros = json.load(f)
-                    if not isinstance(registros, list):
-                        registros = []
-            except json.JSONDecodeError:
-                # Archivo vacío o contenido inválido -> reiniciar registros
-                registros = []
-            except Exception as e:
-                messagebox.showerror("Error al leer registros", f"No se pudo leer el archivo de registros:\n{str(e)}")
-                registros = []
-        
-        # Crear nuevo registro
-        fecha_generacion = datetime.now()
-        fecha_expiracion = fecha_generacion + timedelta(days=dias)
-        
-        nuevo_registro = {
-            "id": len(registros) + 1,
-            "nombre": nombre,
-            "apellido": apellido,
-            "nombre_completo": f"{nombre} {apellido}",
-            "contacto": contacto,
-            "tipo_plan": tipo,
-            "dias": dias,
-            "fecha_generacion": fecha_generacion.strftime('%Y-%m-%d %H:%M:%S'),
-            "fecha_expiracion": fecha_expiracion.strftime('%Y-%m-%d'),
-            "serial": serial,
-            "serial_id": datos['serial_id'],
-            "activo": True
-        }
-        
-        registros.append(nuevo_registro)
-        
-        # Guardar registros
-        with open(archivo_registro, 'w', encoding='utf-8') as f:
-            json.dump(registros, f, indent=2, ensure_ascii=False)
+        """Guarda el registro del cliente y serial en registro_clientes.db"""
+        self.registro.agregar(nuevo_registro(nombre, apellido, contacto, tipo, dias, serial, datos))
+    
+    def registrar_error(self, contexto):
+        """Guarda el traceback actual en error_log.txt para diagnóstico"""
+        try:
+            log_path = os.path.join(base_path, 'error_log.txt')
+            with open(log_path, 'a', encoding='utf-8') as logf:
+                logf.write(f"[{datetime.now().isoformat()}] {contexto}:\n")
+                logf.write(traceback.format_exc())
+                logf.write("\n\n")
+        except:
+            pass
     
     def generar_serial(self):
         # Validar nombre
@@ -437,20 +433,13 @@ IMPORTANTE:
                 f"Cliente: {nombre} {apellido}\n"
                 f"Contacto: {contacto}\n"
                 f"Duracion: {dias} dias\n\n"
-                "El registro se guardo en 'registro_clientes.json'\n"
+                "El registro se guardo en 'registro_clientes.db'\n"
                 "Usa el boton 'Copiar' para copiar el serial."
             )
             
         except Exception as e:
             # Guardar traceback en archivo de log para diagnóstico
-            try:
-                log_path = os.path.join(base_path, 'error_log.txt')
-                with open(log_path, 'a', encoding='utf-8') as logf:
-                    logf.write(f"[{datetime.now().isoformat()}] Error al generar serial:\n")
-                    logf.write(traceback.format_exc())
-                    logf.write("\n\n")
-            except:
-                pass
+            self.registrar_error("Error al generar serial")
 
             # Mostrar mensaje más amigable al usuario
             messagebox.showerror(
@@ -469,107 +458,485 @@ IMPORTANTE:
         
         messagebox.showinfo("Exito", "Serial copiado al portapapeles!")
     
-    def ver_registros(self):
-        """Abre una ventana con el historial de clientes"""
-        archivo_registro = os.path.join(base_path, "registro_clientes.json")
-
-        if not os.path.exists(archivo_registro):
-            messagebox.showinfo("Registros", "Aun no hay clientes registrados")
+    def generar_lote(self):
+        """Genera los seriales de todos los clientes de un CSV sin bloquear la ventana"""
+        archivo_csv = filedialog.askopenfilename(
+            parent=self.root,
+            title="CSV de clientes (nombre, apellido, contacto, plan, dias)",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not archivo_csv:
             return
-
-        # Cargar registros con manejo de errores
-        try:
-            with open(archivo_registro, 'r', encoding='utf-8') as f:
-                registros = json.load(f)
-        except Exception as e:
-            messagebox.showerror("Error al leer registros", f"No se pudo leer el archivo de registros:\n{str(e)}")
+        
+        sugerido = lote_seriales.archivo_salida_para(archivo_csv)
+        archivo_salida = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Guardar seriales generados",
+            initialdir=os.path.dirname(sugerido),
+            initialfile=os.path.basename(sugerido),
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")]
+        )
+        if not archivo_salida:
             return
         
-        if not registros:
-            messagebox.showinfo("Registros", "Aun no hay clientes registrados")
+        # Ventana de avance (no se puede cerrar a mitad del lote)
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Generando seriales")
+        ventana.configure(bg=self.color_fondo)
+        ventana.resizable(False, False)
+        ventana.transient(self.root)
+        ventana.protocol("WM_DELETE_WINDOW", lambda: None)
+        
+        etiqueta = tk.Label(
+            ventana,
+            text="Leyendo clientes...",
+            font=("Segoe UI", 10),
+            bg=self.color_fondo,
+            fg=self.color_texto
+        )
+        etiqueta.pack(padx=20, pady=(20, 10))
+        
+        barra = ttk.Progressbar(ventana, length=360, mode="determinate")
+        barra.pack(padx=20, pady=(0, 20))
+        
+        self.btn_lote.config(state=tk.DISABLED)
+        
+        # El lote corre en otro thread y avisa por una cola que lee revisar_lote
+        cola = queue.Queue()
+        
+        def trabajar():
+            try:
+                guardados = lote_seriales.procesar_lote(
+                    archivo_csv, archivo_salida, self.registro,
+                    progreso=lambda hechos, total: cola.put(("avance", hechos, total))
+                )
+                cola.put(("fin", guardados))
+            except lote_seriales.ErrorLote as e:
+                cola.put(("invalido", e))
+            except Exception as e:
+                self.registrar_error("Error al generar lote")
+                cola.put(("error", e))
+        
+        threading.Thread(target=trabajar, name="lote-seriales").start()
+        self.revisar_lote(ventana, etiqueta, barra, cola, archivo_salida)
+    
+    def revisar_lote(self, ventana, etiqueta, barra, cola, archivo_salida):
+        """Actualiza la ventana de avance hasta que el lote termina"""
+        try:
+            while True:
+                mensaje = cola.get_nowait()
+                if mensaje[0] == "avance":
+                    _, hechos, total = mensaje
+                    barra.config(maximum=total, value=hechos)
+                    etiqueta.config(text=f"Generando seriales: {hechos} de {total}")
+                    continue
+                break
+        except queue.Empty:
+            self.root.after(100, self.revisar_lote, ventana, etiqueta, barra, cola, archivo_salida)
             return
         
-        # Crear ventana de registros
-        ventana_registros = tk.Toplevel(self.root)
-        ventana_registros.title("Registro de Clientes")
-        ventana_registros.geometry("900x600")
-        ventana_registros.configure(bg=self.color_fondo)
+        ventana.destroy()
+        self.btn_lote.config(state=tk.NORMAL)
+        
+        if mensaje[0] == "fin":
+            guardados = mensaje[1]
+            messagebox.showinfo(
+                "Exito",
+                f"{len(guardados)} seriales generados correctamente!\n\n"
+                "Los clientes se guardaron en 'registro_clientes.db'\n"
+                f"Seriales para enviar: {archivo_salida}"
+            )
+        elif mensaje[0] == "invalido":
+            errores = mensaje[1].errores
+            detalle = "\n".join(errores[:15])
+            if len(errores) > 15:
+                detalle += f"\n... y {len(errores) - 15} errores mas"
+            messagebox.showerror("CSV invalido", f"No se genero ningun serial:\n\n{detalle}")
+        else:
+            messagebox.showerror(
+                "Error",
+                f"Error al generar el lote:\n{str(mensaje[1])}\n\n"
+                "Se registró el detalle en 'error_log.txt' (carpeta de la app)."
+            )
+    
+    def ver_registros(self):
+        """Abre una ventana con el historial de clientes"""
+        try:
+            if self.registro.cantidad() == 0:
+                messagebox.showinfo("Registros", "Aun no hay clientes registrados")
+                return
+            VisorRegistros(self)
+        except Exception as e:
+            self.registrar_error("Error al abrir registros")
+            messagebox.showerror("Error al leer registros", f"No se pudo leer el registro de clientes:\n{str(e)}")
+
+
+class VisorRegistros:
+    """
+    Ventana del registro de clientes con búsqueda, filtros y orden
+    La tabla es virtual: solo tiene las filas que se ven. Cada búsqueda trae
+    de registro_clientes.db los ids que cumplen (por índices) y al desplazarse
+    se leen solo los registros de las filas visibles.
+    """
+    
+    ALTO_FILA = 22
+    ESPERA_BUSQUEDA = 150       # ms sin escribir antes de buscar
+    LINEAS_RUEDA = 3
+    
+    COLUMNAS = [
+        ("id", "ID", 50, tk.E),
+        ("nombre_completo", "Nombre completo", 190, tk.W),
+        ("contacto", "Contacto", 190, tk.W),
+        ("tipo_plan", "Plan", 90, tk.W),
+        ("dias", "Dias", 50, tk.E),
+        ("fecha_generacion", "Generado", 140, tk.W),
+        ("fecha_expiracion", "Expira", 90, tk.W),
+        ("serial_id", "Serial ID", 140, tk.W),
+    ]
+    
+    FILTROS = [
+        ("Todos", "todos"),
+        (f"Por vencer ({DIAS_POR_VENCER} dias)", "por_vencer"),
+        ("Vencidas o inactivas", "inactivas"),
+    ]
+    
+    def __init__(self, gui):
+        self.gui = gui
+        self.registro = gui.registro
+        self.ids = []               # ids que cumplen búsqueda y filtro, en orden
+        self.inicio = 0             # Posición en self.ids de la primera fila visible
+        self.visibles = 1           # Filas que entran en la tabla
+        self.cursor = None          # Posición en self.ids de la fila seleccionada
+        self.seleccionado = None    # Registro de la fila seleccionada
+        self.orden = "id"
+        self.descendente = True     # Los más nuevos primero
+        self.busqueda_pendiente = None
+        
+        self.ventana = tk.Toplevel(gui.root)
+        self.ventana.title("Registro de Clientes")
+        self.ventana.geometry("1000x650")
+        self.ventana.configure(bg=gui.color_fondo)
+        
+        self.crear_interfaz()
+        self.actualizar()
+        self.entry_buscar.focus()
+    
+    def crear_interfaz(self):
+        gui = self.gui
         
         # Header
-        header = tk.Label(
-            ventana_registros,
-            text=f"Registro de Clientes ({len(registros)} clientes)",
+        self.header = tk.Label(
+            self.ventana,
+            text="Registro de Clientes",
             font=("Segoe UI", 16, "bold"),
-            bg=self.color_primario,
+            bg=gui.color_primario,
             fg="white",
             height=2
         )
-        header.pack(fill=tk.X)
+        self.header.pack(fill=tk.X)
+        
+        # Búsqueda y filtros
+        barra_frame = tk.Frame(self.ventana, bg=gui.color_fondo)
+        barra_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        
+        tk.Label(
+            barra_frame,
+            text="Buscar:",
+            font=("Segoe UI", 10),
+            bg=gui.color_fondo,
+            fg=gui.color_texto
+        ).pack(side=tk.LEFT)
+        
+        self.texto_buscar = tk.StringVar()
+        self.texto_buscar.trace_add("write", self.al_escribir)
+        self.entry_buscar = tk.Entry(
+            barra_frame,
+            textvariable=self.texto_buscar,
+            font=("Segoe UI", 10),
+            width=30
+        )
+        self.entry_buscar.pack(side=tk.LEFT, padx=10)
         
-        # Frame con scroll
-        frame_contenedor = tk.Frame(ventana_registros, bg=self.color_fondo)
-        frame_contenedor.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        tk.Label(
+            barra_frame,
+            text="nombre, apellido, contacto, serial ID o expiracion (AAAA-MM-DD)",
+            font=("Segoe UI", 8),
+            bg=gui.color_fondo,
+            fg="#757575"
+        ).pack(side=tk.LEFT)
         
-        # Scrollbar
-        scrollbar = tk.Scrollbar(frame_contenedor)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        filtro_frame = tk.Frame(self.ventana, bg=gui.color_fondo)
+        filtro_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        # Text widget para mostrar registros
-        text_registros = tk.Text(
-            frame_contenedor,
+        self.filtro_var = tk.StringVar(value="todos")
+        for texto, valor in self.FILTROS:
+            tk.Radiobutton(
+                filtro_frame,
+                text=texto,
+                variable=self.filtro_var,
+                value=valor,
+                font=("Segoe UI", 10),
+                bg=gui.color_fondo,
+                fg=gui.color_texto,
+                activebackground=gui.color_fondo,
+                command=self.actualizar
+            ).pack(side=tk.LEFT, padx=(0, 15))
+        
+        # Tabla
+        tabla_frame = tk.Frame(self.ventana, bg=gui.color_fondo)
+        tabla_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        estilo = ttk.Style(self.ventana)
+        estilo.configure("Registros.Treeview", rowheight=self.ALTO_FILA, font=("Segoe UI", 9))
+        estilo.configure("Registros.Treeview.Heading", font=("Segoe UI", 9, "bold"))
+        
+        self.tabla = ttk.Treeview(
+            tabla_frame,
+            columns=[columna for columna, _, _, _ in self.COLUMNAS],
+            show="headings",
+            selectmode="browse",
+            style="Registros.Treeview"
+        )
+        for columna, titulo, ancho, alineacion in self.COLUMNAS:
+            self.tabla.heading(columna, command=lambda c=columna: self.ordenar(c))
+            self.tabla.column(columna, width=ancho, anchor=alineacion, stretch=(columna == "nombre_completo"))
+        self.tabla.tag_configure("vencida", foreground="#D32F2F")
+        self.tabla.tag_configure("por_vencer", foreground="#F57C00")
+        self.tabla.tag_configure("inactiva", foreground="#9E9E9E")
+        self.actualizar_encabezados()
+        
+        # La barra representa todos los resultados, no las filas de la tabla
+        self.scrollbar = ttk.Scrollbar(tabla_frame, orient=tk.VERTICAL, command=self.desplazar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.tabla.bind("<Configure>", self.al_redimensionar)
+        self.tabla.bind("<<TreeviewSelect>>", self.al_seleccionar)
+        self.tabla.bind("<MouseWheel>", self.al_girar_rueda)
+        self.tabla.bind("<Button-4>", lambda e: self.mover_vista(-self.LINEAS_RUEDA))
+        self.tabla.bind("<Button-5>", lambda e: self.mover_vista(self.LINEAS_RUEDA))
+        for tecla, paso in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "pagina-"), ("<Next>", "pagina+"),
+                            ("<Home>", "inicio"), ("<End>", "fin")):
+            self.tabla.bind(tecla, lambda e, p=paso: self.mover_cursor(p))
+        self.entry_buscar.bind("<Down>", lambda e: self.mover_cursor(1))
+        self.entry_buscar.bind("<Return>", lambda e: self.mover_cursor(1))
+        
+        # Detalle de la fila seleccionada
+        detalle_frame = tk.LabelFrame(
+            self.ventana,
+            text="  Detalle  ",
+            font=("Segoe UI", 10, "bold"),
+            bg=gui.color_fondo,
+            fg=gui.color_texto
+        )
+        detalle_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.text_detalle = tk.Text(
+            detalle_frame,
             font=("Consolas", 9),
+            height=4,
             bg="white",
-            yscrollcommand=scrollbar.set,
-            wrap=tk.NONE
+            wrap=tk.CHAR,
+            state=tk.DISABLED
         )
-        text_registros.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=text_registros.yview)
-        
-        # Formato de tabla
-        contenido = ""
-        contenido += "="*120 + "\n"
-        contenido += f"{'ID':<5} {'NOMBRE COMPLETO':<25} {'CONTACTO':<25} {'PLAN':<12} {'DIAS':<6} {'GENERADO':<20} {'EXPIRA':<12}\n"
-        contenido += "="*120 + "\n"
-        
-        for reg in sorted(registros, key=lambda x: x['id'], reverse=True):
-            contenido += f"{reg['id']:<5} "
-            contenido += f"{reg['nombre_completo'][:24]:<25} "
-            contenido += f"{reg['contacto'][:24]:<25} "
-            contenido += f"{reg['tipo_plan'].upper():<12} "
-            contenido += f"{reg['dias']:<6} "
-            contenido += f"{reg['fecha_generacion']:<20} "
-            contenido += f"{reg['fecha_expiracion']:<12}\n"
-            contenido += "-"*120 + "\n"
-        
-        contenido += "\n\n"
-        contenido += "DETALLES DE LOS ULTIMOS 5 CLIENTES:\n"
-        contenido += "="*120 + "\n\n"
-        
-        for reg in sorted(registros, key=lambda x: x['id'], reverse=True)[:5]:
-            contenido += f"ID: {reg['id']}\n"
-            contenido += f"Cliente: {reg['nombre_completo']}\n"
-            contenido += f"Contacto: {reg['contacto']}\n"
-            contenido += f"Plan: {reg['tipo_plan'].upper()} ({reg['dias']} dias)\n"
-            contenido += f"Generado: {reg['fecha_generacion']}\n"
-            contenido += f"Expira: {reg['fecha_expiracion']}\n"
-            contenido += f"Serial ID: {reg['serial_id']}\n"
-            contenido += f"Serial: {reg['serial'][:50]}...\n"
-            contenido += "-"*120 + "\n\n"
-        
-        text_registros.insert(1.0, contenido)
-        text_registros.config(state=tk.DISABLED)
+        self.text_detalle.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=10)
+        
+        self.btn_copiar = tk.Button(
+            detalle_frame,
+            text="Copiar Serial",
+            font=("Segoe UI", 10, "bold"),
+            bg="#2196F3",
+            fg="white",
+            activebackground="#1976D2",
+            activeforeground="white",
+            cursor="hand2",
+            state=tk.DISABLED,
+            command=self.copiar_serial
+        )
+        self.btn_copiar.pack(side=tk.RIGHT, padx=10)
         
         # Botón cerrar
         btn_cerrar = tk.Button(
-            ventana_registros,
+            self.ventana,
             text="Cerrar",
             font=("Segoe UI", 10, "bold"),
             bg="#757575",
             fg="white",
-            command=ventana_registros.destroy,
+            command=self.ventana.destroy,
             cursor="hand2"
         )
         btn_cerrar.pack(pady=10)
+    
+    # ============================================================
+    # Búsqueda y orden
+    # ============================================================
+    
+    def al_escribir(self, *args):
+        # Buscar cuando se deja de escribir, no en cada tecla
+        if self.busqueda_pendiente is not None:
+            self.ventana.after_cancel(self.busqueda_pendiente)
+        self.busqueda_pendiente = self.ventana.after(self.ESPERA_BUSQUEDA, self.actualizar)
+    
+    def actualizar(self):
+        """Vuelve a buscar los ids con el texto, filtro y orden actuales"""
+        self.busqueda_pendiente = None
+        if not self.ventana.winfo_exists():
+            return      # Se cerró con una búsqueda pendiente
+        self.ids = self.registro.buscar_ids(
+            self.texto_buscar.get(), self.filtro_var.get(), self.orden, self.descendente
+        )
+        self.inicio = 0
+        self.cursor = None
+        self.mostrar_detalle(None)
+        total = self.registro.cantidad()
+        if len(self.ids) == total:
+            self.header.config(text=f"Registro de Clientes ({total} clientes)")
+        else:
+            self.header.config(text=f"Registro de Clientes ({len(self.ids)} de {total} clientes)")
+        self.dibujar()
+    
+    def ordenar(self, columna):
+        if columna == self.orden:
+            self.descendente = not self.descendente
+        else:
+            self.orden = columna
+            self.descendente = False
+        self.actualizar_encabezados()
+        self.actualizar()
+    
+    def actualizar_encabezados(self):
+        for columna, titulo, _, _ in self.COLUMNAS:
+            if columna == self.orden:
+                titulo += " \u25bc" if self.descendente else " \u25b2"
+            self.tabla.heading(columna, text=titulo)
+    
+    # ============================================================
+    # Tabla virtual
+    # ============================================================
+    
+    def dibujar(self):
+        """Reemplaza las filas de la tabla por las de self.inicio en adelante"""
+        total = len(self.ids)
+        self.inicio = max(0, min(self.inicio, total - self.visibles))
+        posiciones = range(self.inicio, min(self.inicio + self.visibles, total))
+        registros = self.registro.obtener_varios([self.ids[posicion] for posicion in posiciones])
+        
+        hoy = datetime.now()
+        limite = (hoy + timedelta(days=DIAS_POR_VENCER)).strftime('%Y-%m-%d')
+        hoy = hoy.strftime('%Y-%m-%d')
+        
+        self.tabla.delete(*self.tabla.get_children())
+        for posicion in posiciones:
+            reg = registros.get(self.ids[posicion])
+            if reg is None:
+                continue
+            if not reg['activo']:
+                estado = ("inactiva",)
+            elif reg['fecha_expiracion'] < hoy:
+                estado = ("vencida",)
+            elif reg['fecha_expiracion'] <= limite:
+                estado = ("por_vencer",)
+            else:
+                estado = ()
+            # iid = posición en self.ids
+            self.tabla.insert(
+                "", tk.END, iid=str(posicion), tags=estado,
+                values=[reg[columna] for columna, _, _, _ in self.COLUMNAS]
+            )
+        
+        if self.cursor is not None and self.tabla.exists(str(self.cursor)):
+            self.tabla.selection_set(str(self.cursor))
+            self.tabla.focus(str(self.cursor))
+        
+        if total:
+            self.scrollbar.set(self.inicio / total, (self.inicio + len(posiciones)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def al_redimensionar(self, event):
+        # Filas que entran (menos la de los títulos)
+        visibles = max(1, event.height // self.ALTO_FILA - 1)
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self.dibujar()
+    
+    def desplazar(self, accion, cantidad, unidad=None):
+        """command de la barra: ('moveto', fracción) o ('scroll', n, 'units'|'pages')"""
+        if accion == "moveto":
+            self.inicio = int(float(cantidad) * len(self.ids))
+            self.dibujar()
+        else:
+            self.mover_vista(int(cantidad) * (self.visibles if unidad == "pages" else 1))
+    
+    def mover_vista(self, filas):
+        self.inicio += filas
+        self.dibujar()
+        return "break"
+    
+    def al_girar_rueda(self, event):
+        # Windows: múltiplos de 120; macOS: valores chicos
+        return self.mover_vista(-self.LINEAS_RUEDA if event.delta > 0 else self.LINEAS_RUEDA)
+    
+    def mover_cursor(self, paso):
+        """Teclado: mueve la selección por todos los resultados, no solo los visibles"""
+        if not self.ids:
+            return "break"
+        actual = self.inicio - 1 if self.cursor is None else self.cursor
+        if paso == "inicio":
+            nuevo = 0
+        elif paso == "fin":
+            nuevo = len(self.ids) - 1
+        elif paso == "pagina-":
+            nuevo = actual - self.visibles
+        elif paso == "pagina+":
+            nuevo = actual + self.visibles
+        else:
+            nuevo = actual + paso
+        self.cursor = max(0, min(nuevo, len(self.ids) - 1))
+        
+        # Que la fila quede a la vista
+        if self.cursor < self.inicio:
+            self.inicio = self.cursor
+        elif self.cursor >= self.inicio + self.visibles:
+            self.inicio = self.cursor - self.visibles + 1
+        self.dibujar()
+        self.tabla.focus_set()
+        return "break"
+    
+    # ============================================================
+    # Detalle
+    # ============================================================
+    
+    def al_seleccionar(self, event=None):
+        seleccion = self.tabla.selection()
+        if not seleccion:
+            return
+        self.cursor = int(seleccion[0])
+        reg = self.registro.obtener_varios([self.ids[self.cursor]]).get(self.ids[self.cursor])
+        self.mostrar_detalle(reg)
+    
+    def mostrar_detalle(self, reg):
+        self.seleccionado = reg
+        self.text_detalle.config(state=tk.NORMAL)
+        self.text_detalle.delete(1.0, tk.END)
+        if reg is not None:
+            self.text_detalle.insert(
+                1.0,
+                f"ID: {reg['id']}   Cliente: {reg['nombre_completo']}   Contacto: {reg['contacto']}\n"
+                f"Plan: {reg['tipo_plan'].upper()} ({reg['dias']} dias)   Generado: {reg['fecha_generacion']}   "
+                f"Expira: {reg['fecha_expiracion']}   Serial ID: {reg['serial_id']}\n"
+                f"Serial: {reg['serial']}"
+            )
+        self.text_detalle.config(state=tk.DISABLED)
+        self.btn_copiar.config(state=tk.NORMAL if reg is not None else tk.DISABLED)
+    
+    def copiar_serial(self):
+        if self.seleccionado is None:
+            return
+        self.ventana.clipboard_clear()
+        self.ventana.clipboard_append(self.seleccionado['serial'])
+        messagebox.showinfo("Exito", "Serial copiado al portapapeles!", parent=self.ventana)
 
 def main():
     root = tk.Tk()
@@ -577,4 +944,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Los procesos del lote se lanzan con spawn (también desde el .exe)
+    multiprocessing.freeze_support()
     main()
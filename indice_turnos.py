@@ -0,0 +1,143 @@
+"""
+Índice de Turnos Fijos - Sistema de Turnos de Pádel
+Estructura precompilada para aplicar turnos fijos y ausencias sin recorrer
+todas las listas en cada consulta de disponibilidad o reporte.
+
+- (dia_semana, horario) -> turnos fijos de ese slot, con precios ya
+  recalculados y los datos que se muestran en cada cancha ya armados
+- ausencias como set de claves "fecha_horario_cancha"
+
+El índice se reconstruye solo cuando cambian turnos fijos, ausencias o la
+configuración (según las versiones que informa el almacenamiento).
+"""
+
+import threading
+
+from cache_archivos import congelar
+
+
+def recalcular_precio_turno_fijo(config, turno):
+    """Recalcula precios de un turno fijo según configuración actual."""
+    precio_base_cfg = config.get('precio_turno_fijo', 9000)
+    descuento_pct = config.get('descuento_promocion', 0)
+    descuento_aplicado = precio_base_cfg * (descuento_pct / 100)
+    precio_final = precio_base_cfg - descuento_aplicado
+
+    turno['precio_base'] = precio_base_cfg
+    turno['descuento_porcentaje'] = descuento_pct
+    turno['descuento_aplicado'] = descuento_aplicado
+    turno['precio_final'] = precio_final
+    return turno
+
+
+class EntradaTurnoFijo:
+    """Un turno fijo listo para aplicarse a la grilla de canchas"""
+
+    __slots__ = ('turno', 'cancha_id', 'reserva', 'info_ausente')
+
+    def __init__(self, turno, config):
+        turno = recalcular_precio_turno_fijo(config, dict(turno))
+        self.turno = congelar(turno)
+        self.cancha_id = turno['cancha_id']
+        # Datos que se muestran cuando la cancha queda ocupada por el turno fijo
+        self.reserva = congelar({
+            'nombre': turno['nombre_cliente'],
+            'telefono': turno.get('telefono_cliente', ''),
+            'es_fijo': True,
+            'id_turno_fijo': turno['id'],
+            'productos_lista': turno.get('productos_lista', []),
+            'productos_extras': turno.get('productos_extras', ''),
+            'precio_extras': turno.get('precio_extras', 0),
+            'precio_base': turno.get('precio_base', 0),
+            'descuento_porcentaje': turno.get('descuento_porcentaje', config.get('descuento_promocion', 0)),
+            'descuento_aplicado': turno.get('descuento_aplicado', 0),
+            'precio_final': turno.get('precio_final', turno.get('precio_base', 0))
+        })
+        # Datos que se muestran cuando hay una ausencia marcada
+        self.info_ausente = congelar({
+            'nombre': turno['nombre_cliente'],
+            'telefono': turno.get('telefono_cliente', ''),
+            'id_turno_fijo': turno['id']
+        })
+
+
+class IndiceTurnosFijos:
+    """Turnos fijos agrupados por día/horario + set de ausencias"""
+
+    def __init__(self, turnos_fijos, ausencias, config):
+        self.por_dia = {}   # dia_semana -> {horario: [EntradaTurnoFijo]} (orden original)
+        for turno in turnos_fijos:
+            entrada = EntradaTurnoFijo(turno, config)
+            self.por_dia.setdefault(turno['dia_semana'], {}).setdefault(turno['horario'], []).append(entrada)
+        self.claves_ausentes = frozenset(
+            a['clave'] for a in (ausencias if isinstance(ausencias, list) else [])
+        )
+
+    def turnos(self, dia_semana, horario):
+        """Turnos fijos de un slot (lista vacía si no hay)"""
+        return self.por_dia.get(dia_semana, {}).get(horario, ())
+
+    def agenda_dia(self, dia_semana):
+        """{horario: [EntradaTurnoFijo]} de un día de la semana"""
+        return self.por_dia.get(dia_semana, {})
+
+    def esta_ausente(self, fecha, horario, cancha_id):
+        return f"{fecha}_{horario}_{cancha_id}" in self.claves_ausentes
+
+    def aplicar(self, fecha, dia_semana, horario, canchas):
+        """
+        Marca en la lista de canchas los turnos fijos de ese slot
+        - Sin ausencia: la cancha queda ocupada con los datos del turno fijo
+        - Con ausencia: la cancha sigue disponible pero muestra info del turno fijo
+        Costo proporcional a la cantidad de canchas del horario.
+        """
+        entradas = self.turnos(dia_semana, horario)
+        if not entradas:
+            return canchas
+        por_id = {cancha['id']: cancha for cancha in canchas}
+        for entrada in entradas:
+            cancha = por_id.get(entrada.cancha_id)
+            if cancha is None:
+                continue
+            if f"{fecha}_{horario}_{entrada.cancha_id}" in self.claves_ausentes:
+                cancha['turno_fijo_ausente'] = entrada.info_ausente
+            else:
+                cancha['disponible'] = False
+                cancha['reserva'] = entrada.reserva
+        return canchas
+
+
+class GestorIndiceTurnos:
+    """
+    Entrega el índice vigente y lo reconstruye solo si cambiaron
+    turnos fijos, ausencias o configuración.
+    """
+
+    COLECCIONES = ('turnos_fijos', 'ausencias', 'config')
+
+    def __init__(self, almacenamiento):
+        self.almacenamiento = almacenamiento
+        self._lock = threading.Lock()
+        self._actual = (None, None)     # (versión, índice): se reemplaza de una sola vez
+        self.reconstrucciones = 0
+
+    def obtener(self):
+        version = self.almacenamiento.version_datos(*self.COLECCIONES)
+        version_actual, indice = self._actual
+        if indice is not None and version == version_actual:
+            return indice
+        with self._lock:
+            version_actual, indice = self._actual
+            if indice is None or version != version_actual:
+                # Si los datos cambian mientras se carga, la versión guardada
+                # queda vieja y el próximo obtener() vuelve a reconstruir
+                indice = IndiceTurnosFijos(
+                    self.almacenamiento.cargar_turnos_fijos(solo_lectura=True),
+                    self.almacenamiento.cargar_ausencias(solo_lectura=True),
+                    self.almacenamiento.cargar_config(solo_lectura=True)
+                )
+                # El de una instantánea vieja (reporte largo) no reemplaza al vigente
+                if self.almacenamiento.instantanea_vigente():
+                    self._actual = (version, indice)
+                self.reconstrucciones += 1
+            return indice
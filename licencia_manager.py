@@ -4,55 +4,181 @@ Genera claves encriptadas basadas en fecha de expiración
 """
 
 import hashlib
+import hmac
 import json
 import os
+import sys
+import threading
 import uuid
 import platform
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
 import base64
+from bitacora import obtener_logger
+from bloqueos import PorRuta
+from registro_seriales import ARCHIVO_JSON, ARCHIVO_REGISTRO, registro_para
+
+# Clave secreta para encriptación (cambiar en producción)
+CLAVE_MAESTRA = b'TuClaveSecretaMuySegura2025PadelApp!!'
+# Clave Fernet derivada de la clave maestra (se calcula una sola vez)
+FERNET_KEY = base64.urlsafe_b64encode(hashlib.sha256(CLAVE_MAESTRA).digest())
+_CIPHER = Fernet(FERNET_KEY)
+
+log = obtener_logger('licencias')
+
+def evaluar_expiracion(fecha_expiracion, fecha_actual=None):
+    """
+    (es_valida, dias_restantes, mensaje) de una licencia que expira en esa fecha
+    """
+    fecha_actual = fecha_actual or datetime.now()
+    
+    if fecha_actual > fecha_expiracion:
+        dias_vencida = (fecha_actual - fecha_expiracion).days
+        return False, 0, f"Licencia expirada hace {dias_vencida} días. Contacte al proveedor para renovar."
+    
+    dias_restantes = (fecha_expiracion - fecha_actual).days
+    
+    # Advertencia si faltan menos de 7 días
+    if dias_restantes <= 7:
+        return True, dias_restantes, f"⚠️ ADVERTENCIA: La licencia expira en {dias_restantes} días. Renueve pronto."
+    
+    return True, dias_restantes, f"Licencia válida. Expira: {fecha_expiracion.strftime('%d/%m/%Y')}"
+
+# ================================================================================
+# HUELLA DE HARDWARE (una vez por proceso, guardada en disco)
+# ================================================================================
+# El ID se guarda firmado (HMAC) en ARCHIVO_HUELLA junto con datos del equipo
+# que se leen sin subprocesos (sistema, nombre, arquitectura). Al arrancar se
+# usa el guardado si la firma y esos datos coinciden, y se vuelve a calcular
+# en un thread aparte: activar un serial o revisar el trial nunca espera a wmic.
+# Solo la primera vez en la máquina (sin archivo) se calcula en el momento.
+
+def calcular_hardware_id():
+    """
+    ID de hardware consultando el sistema (en Windows lanza wmic: lento)
+    Usar huella_hardware(), que lo calcula una sola vez
+    """
+    try:
+        # Obtener información del sistema
+        sistema = platform.system()
+        nodo = platform.node()
+        procesador = platform.processor()
+        
+        # En Windows, intentar obtener el UUID de la BIOS
+        if sistema == 'Windows':
+            try:
+                import subprocess
+                resultado = subprocess.check_output('wmic csproduct get uuid', shell=True)
+                uuid_sistema = resultado.decode().split('\n')[1].strip()
+            except:
+                uuid_sistema = str(uuid.getnode())
+        else:
+            uuid_sistema = str(uuid.getnode())
+        
+        # Crear hash único
+        info_hardware = f"{sistema}-{nodo}-{procesador}-{uuid_sistema}"
+        hardware_id = hashlib.sha256(info_hardware.encode()).hexdigest()[:16]
+        
+        return hardware_id
+    except:
+        # Fallback: usar MAC address
+        return hashlib.sha256(str(uuid.getnode()).encode()).hexdigest()[:16]
+
+ARCHIVO_HUELLA = '.padel_huella'
+_CLAVE_HUELLA = hashlib.sha256(CLAVE_MAESTRA + b'-huella').digest()
+_huella = {'valor': None}
+_lock_huella = threading.Lock()
+
+def _ruta_huella():
+    carpeta = os.environ.get('APPDATA') if platform.system() == 'Windows' else None
+    return os.path.join(carpeta or os.path.expanduser('~'), ARCHIVO_HUELLA)
+
+def _firmar_huella(hardware_id):
+    """(datos, firma): los datos atan el archivo a esta máquina"""
+    datos = {
+        'hardware_id': hardware_id,
+        'sistema': platform.system(),
+        'nodo': platform.node(),
+        'maquina': platform.machine()
+    }
+    mensaje = json.dumps(datos, sort_keys=True).encode('utf-8')
+    return datos, hmac.new(_CLAVE_HUELLA, mensaje, hashlib.sha256).hexdigest()
+
+def _leer_huella():
+    """ID guardado si el archivo existe, la firma es correcta y es de esta máquina"""
+    try:
+        with open(_ruta_huella(), 'r', encoding='utf-8') as f:
+            guardado = json.load(f)
+        datos, firma = _firmar_huella(guardado['hardware_id'])
+        if hmac.compare_digest(firma, guardado.get('firma', '')) and \
+                all(guardado.get(clave) == valor for clave, valor in datos.items()):
+            return guardado['hardware_id']
+    except Exception:
+        pass
+    return None
+
+def _guardar_huella(hardware_id):
+    datos, firma = _firmar_huella(hardware_id)
+    ruta = _ruta_huella()
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({**datos, 'firma': firma, 'fecha': datetime.now().isoformat()}, f)
+        os.replace(temporal, ruta)
+    except OSError:
+        # Sin archivo solo se pierde el atajo del próximo arranque
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+
+def _revalidar_huella():
+    actual = calcular_hardware_id()
+    with _lock_huella:
+        if actual != _huella['valor']:
+            _huella['valor'] = actual
+            _guardar_huella(actual)
+
+def huella_hardware():
+    """ID de hardware de esta máquina (calculado una vez por proceso)"""
+    valor = _huella['valor']
+    if valor is not None:
+        return valor
+    with _lock_huella:
+        if _huella['valor'] is None:
+            guardado = _leer_huella()
+            if guardado is None:
+                _huella['valor'] = calcular_hardware_id()
+                _guardar_huella(_huella['valor'])
+            else:
+                _huella['valor'] = guardado
+                threading.Thread(target=_revalidar_huella, name='padel-huella', daemon=True).start()
+        return _huella['valor']
+
+def precalentar_huella():
+    """Calcula (o lee) la huella en segundo plano, antes de que la pida una activación"""
+    threading.Thread(target=huella_hardware, name='padel-huella', daemon=True).start()
 
 class LicenciaManager:
     def __init__(self, archivo_licencia='licencia.dat'):
         self.archivo_licencia = archivo_licencia
-        # Clave secreta para encriptación (cambiar en producción)
-        self.clave_maestra = b'TuClaveSecretaMuySegura2025PadelApp!!'
-        # Generar clave Fernet desde la clave maestra
-        self.fernet_key = base64.urlsafe_b64encode(hashlib.sha256(self.clave_maestra).digest())
-        self.cipher = Fernet(self.fernet_key)
-        # Archivo para registrar seriales usados (solo tú tienes acceso)
-        self.archivo_seriales_usados = 'seriales_usados.json'
+        self.clave_maestra = CLAVE_MAESTRA
+        self.fernet_key = FERNET_KEY
+        self.cipher = _CIPHER
+        # Registro de seriales usados (solo tú tienes acceso): base indexada en la
+        # carpeta de la licencia (no en la de trabajo); el JSON histórico de esa
+        # carpeta se importa solo la primera vez
+        carpeta = os.path.dirname(os.path.abspath(archivo_licencia))
+        self.archivo_seriales_usados = os.path.join(carpeta, ARCHIVO_JSON)
+        self.archivo_registro_seriales = os.path.join(carpeta, ARCHIVO_REGISTRO)
     
     def obtener_hardware_id(self):
         """
         Genera un ID único basado en el hardware de la máquina
         Esto evita que reinstalen para resetear el trial
+        Se calcula una vez por proceso y se guarda en disco (ver huella_hardware)
         """
-        try:
-            # Obtener información del sistema
-            sistema = platform.system()
-            nodo = platform.node()
-            procesador = platform.processor()
-            
-            # En Windows, intentar obtener el UUID de la BIOS
-            if sistema == 'Windows':
-                try:
-                    import subprocess
-                    resultado = subprocess.check_output('wmic csproduct get uuid', shell=True)
-                    uuid_sistema = resultado.decode().split('\n')[1].strip()
-                except:
-                    uuid_sistema = str(uuid.getnode())
-            else:
-                uuid_sistema = str(uuid.getnode())
-            
-            # Crear hash único
-            info_hardware = f"{sistema}-{nodo}-{procesador}-{uuid_sistema}"
-            hardware_id = hashlib.sha256(info_hardware.encode()).hexdigest()[:16]
-            
-            return hardware_id
-        except:
-            # Fallback: usar MAC address
-            return hashlib.sha256(str(uuid.getnode()).encode()).hexdigest()[:16]
+        return huella_hardware()
     
     def generar_licencia(self, nombre_cliente, dias_validez, tipo_licencia='mensual', hardware_id=None):
         """
@@ -106,19 +232,7 @@ class LicenciaManager:
             
             # Verificar expiración
             fecha_expiracion = datetime.fromisoformat(datos_licencia['fecha_expiracion'])
-            fecha_actual = datetime.now()
-            
-            if fecha_actual > fecha_expiracion:
-                dias_vencida = (fecha_actual - fecha_expiracion).days
-                return False, 0, f"Licencia expirada hace {dias_vencida} días. Contacte al proveedor para renovar."
-            
-            dias_restantes = (fecha_expiracion - fecha_actual).days
-            
-            # Advertencia si faltan menos de 7 días
-            if dias_restantes <= 7:
-                return True, dias_restantes, f"⚠️ ADVERTENCIA: La licencia expira en {dias_restantes} días. Renueve pronto."
-            
-            return True, dias_restantes, f"Licencia válida. Expira: {fecha_expiracion.strftime('%d/%m/%Y')}"
+            return evaluar_expiracion(fecha_expiracion)
             
         except Exception as e:
             return False, 0, f"Error al verificar licencia: {str(e)}"
@@ -166,17 +280,16 @@ class LicenciaManager:
         
         return True, f"Licencia renovada hasta {nueva_fecha_expiracion.strftime('%d/%m/%Y')}"
     
+    def registro_seriales(self):
+        """RegistroSeriales de este manager (ver registro_seriales.py)"""
+        return registro_para(self.archivo_registro_seriales, self.archivo_seriales_usados)
+    
     def verificar_serial_usado(self, serial_id):
         """
         Verifica si un serial ya fue usado (solo para administrador)
         """
-        if not os.path.exists(self.archivo_seriales_usados):
-            return False
-        
         try:
-            with open(self.archivo_seriales_usados, 'r') as f:
-                usados = json.load(f)
-            return serial_id in usados
+            return self.registro_seriales().esta_usado(serial_id)
         except:
             return False
     
@@ -185,21 +298,10 @@ class LicenciaManager:
         Marca un serial como usado (solo para administrador)
         """
         try:
-            usados = {}
-            if os.path.exists(self.archivo_seriales_usados):
-                with open(self.archivo_seriales_usados, 'r') as f:
-                    usados = json.load(f)
-            
-            usados[serial_id] = {
-                'hardware_id': hardware_id,
-                'fecha_activacion': datetime.now().isoformat()
-            }
-            
-            with open(self.archivo_seriales_usados, 'w') as f:
-                json.dump(usados, f, indent=2)
-            
+            self.registro_seriales().marcar(serial_id, hardware_id)
             return True
-        except:
+        except Exception as e:
+            log.warning('No se pudo marcar el serial %s como usado: %s', serial_id, e)
             return False
     
     def aplicar_serial(self, serial_encriptado):
@@ -260,28 +362,23 @@ class LicenciaManager:
             # Obtener hardware ID de esta máquina
             hardware_id_actual = self.obtener_hardware_id()
             
-            # Verificar si el serial ya fue usado
-            if self.verificar_serial_usado(serial_id):
-                # Si ya fue usado, verificar si es en la misma máquina
-                try:
-                    with open(self.archivo_seriales_usados, 'r') as f:
-                        usados = json.load(f)
-                    
-                    if usados[serial_id]['hardware_id'] == hardware_id_actual:
-                        # Mismo hardware, permitir reinstalación
-                        pass
-                    else:
-                        return False, "Este serial ya fue activado en otra computadora. Contacte al proveedor."
-                except:
-                    return False, "Serial ya utilizado"
+            # Verificar y marcar el serial en un solo paso: si ya fue usado,
+            # solo se permite en la misma máquina (reinstalación)
+            try:
+                libre, _ = self.registro_seriales().activar(serial_id, hardware_id_actual)
+            except Exception as e:
+                # Sin registro (carpeta de solo lectura, base dañada) no se sabe si
+                # el serial se usó: se activa igual, como antes con el JSON
+                log.warning('Registro de seriales no disponible (%s): %s se activa sin registrar',
+                            e, serial_id)
+                libre = True
+            if not libre:
+                return False, "Este serial ya fue activado en otra computadora. Contacte al proveedor."
             
             # Vincular el serial al hardware actual
             datos_licencia['hardware_id'] = hardware_id_actual
             datos_licencia['activaciones'] = datos_licencia.get('activaciones', 0) + 1
             
-            # Marcar serial como usado
-            self.marcar_serial_usado(serial_id, hardware_id_actual)
-            
             # Guardar la licencia
             json_data = json.dumps(datos_licencia).encode('utf-8')
             datos_encriptados_nuevos = self.cipher.encrypt(json_data)
@@ -407,11 +504,12 @@ class LicenciaManager:
             with open(archivo_trials, 'w') as f:
                 json.dump(trials_usados, f)
             
-            # En Windows, ocultar el archivo
+            # En Windows, ocultar el archivo (sin lanzar attrib)
             if platform.system() == 'Windows':
                 try:
-                    import subprocess
-                    subprocess.run(['attrib', '+H', archivo_trials], check=False)
+                    import ctypes
+                    FILE_ATTRIBUTE_HIDDEN = 0x02
+                    ctypes.windll.kernel32.SetFileAttributesW(archivo_trials, FILE_ATTRIBUTE_HIDDEN)
                 except:
                     pass
                     
@@ -468,6 +566,115 @@ class LicenciaManager:
         return False
 
 
+# ================================================================================
+# SERVICIO DE LICENCIA (compartido por la app)
+# ================================================================================
+
+def ruta_licencia():
+    """
+    licencia.dat junto al ejecutable (o junto al código en desarrollo)
+    La variable PADEL_LICENCIA la reemplaza (benchmarks, pruebas)
+    """
+    if os.environ.get('PADEL_LICENCIA'):
+        return os.environ['PADEL_LICENCIA']
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, 'licencia.dat')
+
+class ServicioLicencia:
+    """
+    Licencia desencriptada una sola vez y guardada en memoria mientras
+    licencia.dat no cambie (mtime, tamaño). es_valida() y dias_restantes()
+    cuestan un stat del archivo, no una lectura más desencriptado.
+    """
+
+    def __init__(self, archivo_licencia):
+        self.archivo_licencia = archivo_licencia
+        self.manager = LicenciaManager(archivo_licencia)
+        self._lock = threading.Lock()
+        self._firma = None          # (mtime_ns, tamaño) del archivo leído
+        self._datos = None          # Licencia desencriptada (None si no hay o es inválida)
+        self._expiracion = None     # datetime ya convertido
+        self._error = None          # Mensaje si no se pudo leer
+
+    def _firma_actual(self):
+        try:
+            estado = os.stat(self.archivo_licencia)
+        except FileNotFoundError:
+            return None
+        return estado.st_mtime_ns, estado.st_size
+
+    def _cargar(self):
+        firma = self._firma_actual()
+        if firma is not None and firma == self._firma:
+            return
+        with self._lock:
+            if firma is not None and firma == self._firma:
+                return
+            datos = expiracion = error = None
+            if firma is None:
+                error = "No se encontró archivo de licencia. Contacte al proveedor."
+            else:
+                try:
+                    with open(self.archivo_licencia, 'rb') as f:
+                        datos = json.loads(self.manager.cipher.decrypt(f.read()).decode('utf-8'))
+                    expiracion = datetime.fromisoformat(datos['fecha_expiracion'])
+                except Exception as e:
+                    datos, error = None, f"Error al verificar licencia: {str(e)}"
+            self._datos, self._expiracion, self._error = datos, expiracion, error
+            self._firma = firma
+
+    def invalidar(self):
+        with self._lock:
+            self._firma = None
+
+    def estado(self):
+        """(es_valida, dias_restantes, mensaje), igual que LicenciaManager.verificar_licencia"""
+        self._cargar()
+        if self._expiracion is None:
+            return False, 0, self._error
+        return evaluar_expiracion(self._expiracion)
+
+    def es_valida(self):
+        self._cargar()
+        return self._expiracion is not None and datetime.now() <= self._expiracion
+
+    def dias_restantes(self):
+        self._cargar()
+        if self._expiracion is None:
+            return 0
+        return max(0, (self._expiracion - datetime.now()).days)
+
+    def info(self):
+        """Copia de la licencia desencriptada (None si no hay o es inválida)"""
+        self._cargar()
+        return dict(self._datos) if self._datos is not None else None
+
+    # ============================================================
+    # Operaciones que reescriben licencia.dat
+    # ============================================================
+
+    def aplicar_serial(self, serial_encriptado):
+        try:
+            return self.manager.aplicar_serial(serial_encriptado)
+        finally:
+            self.invalidar()
+
+    def crear_licencia_trial(self):
+        try:
+            return self.manager.crear_licencia_trial()
+        finally:
+            self.invalidar()
+
+_servicios = PorRuta(ServicioLicencia)
+
+def servicio_licencia(archivo_licencia=None):
+    """ServicioLicencia de ese archivo (por defecto ruta_licencia())"""
+    return _servicios.obtener(archivo_licencia or ruta_licencia())
+
+
 # Herramienta para generar licencias (usar en tu computadora, no distribuir)
 def generar_licencia_cliente():
     """
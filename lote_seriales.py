@@ -0,0 +1,266 @@
+"""
+Generación de Seriales por Lote - Generador de Seriales
+Genera los seriales de muchos clientes a partir de un CSV:
+
+- Los seriales se encriptan en un pool de procesos (en bloques, con avance)
+- Todos los clientes se guardan en el registro en una sola transacción:
+  si algo falla no queda ninguno a medias
+- El resultado (cliente, plan, expiración y serial) se exporta a otro CSV
+
+CSV de entrada (con encabezado, separado por ',' o ';'):
+    nombre,apellido,contacto,plan[,dias]
+plan es trial, mensual, trimestral, semestral, anual o personalizada
+(personalizada requiere dias; en los demás dias es opcional).
+
+Uso:
+    python lote_seriales.py CLIENTES.csv [--salida SERIALES.csv] [--procesos N] [--db registro_clientes.db]
+(--db por defecto es el registro_clientes.db del generador, en la carpeta del
+programa; el registro_clientes.json de esa carpeta se importa si la base está vacía)
+"""
+
+import csv
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from registro_clientes import nuevo_registro
+
+
+# Días de cada plan (los mismos que ofrece la ventana del generador)
+PLANES = {
+    'trial': 15,
+    'mensual': 30,
+    'trimestral': 90,
+    'semestral': 180,
+    'anual': 365
+}
+PLAN_PERSONALIZADO = 'personalizada'
+LOTE_MINIMO_PROCESOS = 200      # Con menos clientes no vale la pena arrancar procesos
+TAMANO_BLOQUE = 50              # Seriales por tarea del pool (avance cada bloque)
+MAXIMO_PROCESOS = 8
+
+# Nombres aceptados para cada columna del CSV de entrada
+COLUMNAS = {
+    'nombre': ('nombre',),
+    'apellido': ('apellido',),
+    'contacto': ('contacto', 'email', 'telefono', 'teléfono', 'email/telefono', 'email/teléfono'),
+    'plan': ('plan', 'tipo', 'tipo_plan'),
+    'dias': ('dias', 'días')
+}
+COLUMNAS_SALIDA = ('id', 'nombre', 'apellido', 'contacto', 'tipo_plan', 'dias',
+                   'fecha_generacion', 'fecha_expiracion', 'serial_id', 'serial')
+
+
+class ErrorLote(ValueError):
+    """El CSV de entrada tiene filas inválidas (no se generó nada)"""
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__('\n'.join(errores))
+
+
+# ================================================================================
+# CSV DE ENTRADA
+# ================================================================================
+
+def _encabezados(campos):
+    """Nombre de columna del CSV -> campo (nombre, apellido, contacto, plan, dias)"""
+    encontrados = {}
+    for original in campos or []:
+        normalizado = (original or '').strip().lower()
+        for campo, alias in COLUMNAS.items():
+            if normalizado in alias:
+                encontrados[campo] = original
+    return encontrados
+
+
+def leer_clientes(archivo_csv):
+    """
+    Lee y valida el CSV de clientes
+    Retorna una lista de (nombre, apellido, contacto, plan, dias); si alguna
+    fila es inválida lanza ErrorLote con todos los errores (número de línea)
+    """
+    # utf-8-sig: Excel guarda el CSV con BOM
+    with open(archivo_csv, 'r', encoding='utf-8-sig', newline='') as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(f, dialect=dialecto)
+        columnas = _encabezados(lector.fieldnames)
+        faltantes = [campo for campo in ('nombre', 'apellido', 'contacto', 'plan') if campo not in columnas]
+        if faltantes:
+            raise ErrorLote([f"Faltan columnas en el encabezado: {', '.join(faltantes)}"])
+
+        clientes = []
+        errores = []
+        for fila in lector:
+            linea = lector.line_num
+            valores = {campo: (fila.get(columna) or '').strip() for campo, columna in columnas.items()}
+            if not any(valores.values()):
+                continue        # Fila vacía
+            faltan = [campo for campo in ('nombre', 'apellido', 'contacto', 'plan') if not valores[campo]]
+            if faltan:
+                errores.append(f"Línea {linea}: falta {', '.join(faltan)}")
+                continue
+            plan = valores['plan'].lower()
+            if plan not in PLANES and plan != PLAN_PERSONALIZADO:
+                errores.append(f"Línea {linea}: plan desconocido '{valores['plan']}'")
+                continue
+            if valores.get('dias'):
+                try:
+                    dias = int(valores['dias'])
+                except ValueError:
+                    errores.append(f"Línea {linea}: días inválidos '{valores['dias']}'")
+                    continue
+                if dias <= 0:
+                    errores.append(f"Línea {linea}: los días deben ser mayor a 0")
+                    continue
+            elif plan == PLAN_PERSONALIZADO:
+                errores.append(f"Línea {linea}: el plan personalizada requiere días")
+                continue
+            else:
+                dias = PLANES[plan]
+            clientes.append((valores['nombre'], valores['apellido'], valores['contacto'], plan, dias))
+
+    if errores:
+        raise ErrorLote(errores)
+    if not clientes:
+        raise ErrorLote(["El archivo no tiene clientes"])
+    return clientes
+
+
+# ================================================================================
+# GENERACIÓN
+# ================================================================================
+
+_manager = None
+
+
+def _generar_bloque(bloque):
+    """Corre en un proceso del pool: [(nombre_completo, dias, plan)] -> [(serial, datos)]"""
+    global _manager
+    if _manager is None:
+        from licencia_manager import LicenciaManager
+        _manager = LicenciaManager()
+    return [_manager.generar_serial(nombre_completo, dias, plan) for nombre_completo, dias, plan in bloque]
+
+
+def cantidad_procesos(total, procesos=None):
+    """Procesos a usar para `total` seriales (1 = sin pool)"""
+    if procesos is None:
+        if total < LOTE_MINIMO_PROCESOS:
+            return 1
+        procesos = min(os.cpu_count() or 1, MAXIMO_PROCESOS)
+    return max(1, min(procesos, -(-total // TAMANO_BLOQUE)))
+
+
+def generar_seriales(clientes, procesos=None, progreso=None):
+    """
+    Seriales de todos los clientes, en el mismo orden: [(serial, datos)]
+    progreso(hechos, total) se llama después de cada bloque (desde este thread)
+    """
+    trabajos = [(f"{nombre} {apellido}", dias, plan) for nombre, apellido, _, plan, dias in clientes]
+    bloques = [trabajos[inicio:inicio + TAMANO_BLOQUE] for inicio in range(0, len(trabajos), TAMANO_BLOQUE)]
+    resultados = [None] * len(bloques)
+    hechos = 0
+    procesos = cantidad_procesos(len(trabajos), procesos)
+
+    if procesos == 1:
+        for posicion, bloque in enumerate(bloques):
+            resultados[posicion] = _generar_bloque(bloque)
+            hechos += len(bloque)
+            if progreso:
+                progreso(hechos, len(trabajos))
+    else:
+        # spawn: no copiar con fork un proceso con threads (Tk, servidor)
+        with ProcessPoolExecutor(max_workers=procesos,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futuros = {pool.submit(_generar_bloque, bloque): posicion for posicion, bloque in enumerate(bloques)}
+            for futuro in as_completed(futuros):
+                posicion = futuros[futuro]
+                resultados[posicion] = futuro.result()
+                hechos += len(bloques[posicion])
+                if progreso:
+                    progreso(hechos, len(trabajos))
+    return [serial for bloque in resultados for serial in bloque]
+
+
+def exportar_csv(archivo_csv, registros):
+    """CSV de resultados (utf-8 con BOM para que Excel muestre bien los acentos)"""
+    with open(archivo_csv, 'w', encoding='utf-8-sig', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUMNAS_SALIDA, extrasaction='ignore')
+        escritor.writeheader()
+        escritor.writerows(registros)
+
+
+def archivo_salida_para(archivo_csv):
+    """seriales_<nombre>_<fecha>.csv junto al CSV de entrada"""
+    carpeta, nombre = os.path.split(os.path.abspath(archivo_csv))
+    base = os.path.splitext(nombre)[0]
+    return os.path.join(carpeta, f"seriales_{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+
+
+def procesar_lote(archivo_csv, archivo_salida, registro, procesos=None, progreso=None):
+    """
+    CSV de clientes -> seriales -> registro (una transacción) -> CSV de resultados
+    Retorna los registros guardados (con id)
+    """
+    clientes = leer_clientes(archivo_csv)
+    seriales = generar_seriales(clientes, procesos, progreso)
+    registros = [
+        nuevo_registro(nombre, apellido, contacto, plan, dias, serial, datos)
+        for (nombre, apellido, contacto, plan, dias), (serial, datos) in zip(clientes, seriales)
+    ]
+    guardados = registro.agregar_lote(registros)
+    exportar_csv(archivo_salida, guardados)
+    return guardados
+
+
+def carpeta_programa():
+    """Carpeta del generador (la del ejecutable si está empaquetado), donde la ventana guarda el registro"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv=None):
+    import argparse
+    from registro_clientes import ARCHIVO_JSON, ARCHIVO_REGISTRO, RegistroClientes
+
+    parser = argparse.ArgumentParser(description='Genera seriales para todos los clientes de un CSV')
+    parser.add_argument('clientes', help='CSV con nombre, apellido, contacto, plan y (opcional) dias')
+    parser.add_argument('--salida', help='CSV de resultados (por defecto seriales_<clientes>_<fecha>.csv)')
+    parser.add_argument('--procesos', type=int, help='Procesos para encriptar (por defecto según el tamaño del lote)')
+    parser.add_argument('--db', default=os.path.join(carpeta_programa(), ARCHIVO_REGISTRO),
+                        help='Base SQLite del registro de clientes (por defecto la del generador)')
+    args = parser.parse_args(argv)
+
+    salida = args.salida or archivo_salida_para(args.clientes)
+
+    def progreso(hechos, total):
+        print(f"\rGenerando seriales: {hechos}/{total}", end='', file=sys.stderr, flush=True)
+
+    registro = RegistroClientes(args.db, os.path.join(os.path.dirname(os.path.abspath(args.db)), ARCHIVO_JSON))
+    try:
+        guardados = procesar_lote(args.clientes, salida, registro, args.procesos, progreso)
+    except ErrorLote as e:
+        print("❌ No se generó ningún serial:", file=sys.stderr)
+        for error in e.errores:
+            print(f"   {error}", file=sys.stderr)
+        return 1
+    finally:
+        registro.cerrar()
+    print(file=sys.stderr)
+    print(f"✅ {len(guardados)} seriales generados y registrados en {args.db}")
+    print(f"   Resultados: {salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Métricas - Sistema de Turnos de Pádel
+Contadores e histogramas en memoria para saber qué endpoints son lentos y
+cuánto cuesta el acceso a los datos.
+
+- Por ruta: cantidad de solicitudes (por método y estado), errores,
+  histograma de latencia e histograma de tamaño de respuesta
+- Almacenamiento: histograma de tiempo de cada operación del backend
+  (cargar_*, guardar_*, agregar_*, eliminar_*, ...) y bytes leídos/escritos
+  por archivo o tabla
+
+Se exponen en /api/metrics en formato de texto de Prometheus o en JSON.
+Registrar una observación es una búsqueda binaria y una suma bajo un lock;
+con PADEL_METRICAS=0 no se registra nada.
+"""
+
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+
+
+# Límites superiores de los buckets (fijos)
+BUCKETS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histograma:
+    """Histograma de buckets fijos (cantidad por bucket, suma y total)"""
+
+    __slots__ = ('limites', 'cantidades', 'suma', 'total')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cantidades = [0] * (len(limites) + 1)   # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cantidades[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """[(limite, cantidad acumulada)] incluyendo +Inf, como los pide Prometheus"""
+        resultado = []
+        acumulado = 0
+        for limite, cantidad in zip(self.limites + (float('inf'),), self.cantidades):
+            acumulado += cantidad
+            resultado.append((limite, acumulado))
+        return resultado
+
+    def como_dict(self):
+        return {
+            'buckets': {_formatear_limite(limite): cantidad for limite, cantidad in self.acumulados()},
+            'suma': self.suma,
+            'total': self.total
+        }
+
+
+def _formatear_limite(limite):
+    return '+Inf' if limite == float('inf') else repr(limite)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class RegistroMetricas:
+    """Todas las métricas del proceso (un solo lock, operaciones O(1))"""
+
+    def __init__(self, habilitado=True):
+        self.habilitado = habilitado
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.inicio = time.time()
+            self.solicitudes = {}          # (ruta, metodo, estado) -> cantidad
+            self.errores = {}              # (ruta, metodo) -> cantidad (estado >= 400)
+            self.latencias = {}            # (ruta, metodo) -> Histograma (segundos)
+            self.tamanos = {}              # (ruta, metodo) -> Histograma (bytes)
+            self.operaciones = {}          # (operacion,) -> Histograma (segundos)
+            self.bytes_leidos = {}         # origen -> bytes
+            self.bytes_escritos = {}       # origen -> bytes
+
+    # ================================================================================
+    # REGISTRO
+    # ================================================================================
+
+    def registrar_solicitud(self, ruta, metodo, estado, segundos, bytes_respuesta=None):
+        if not self.habilitado:
+            return
+        clave = (ruta, metodo)
+        with self._lock:
+            clave_estado = (ruta, metodo, str(estado))
+            self.solicitudes[clave_estado] = self.solicitudes.get(clave_estado, 0) + 1
+            if estado >= 400:
+                self.errores[clave] = self.errores.get(clave, 0) + 1
+            histograma = self.latencias.get(clave)
+            if histograma is None:
+                histograma = self.latencias[clave] = Histograma(BUCKETS_SEGUNDOS)
+            histograma.observar(segundos)
+            if bytes_respuesta is not None:
+                histograma = self.tamanos.get(clave)
+                if histograma is None:
+                    histograma = self.tamanos[clave] = Histograma(BUCKETS_BYTES)
+                histograma.observar(bytes_respuesta)
+
+    def registrar_operacion(self, operacion, segundos):
+        if not self.habilitado:
+            return
+        with self._lock:
+            histograma = self.operaciones.get((operacion,))
+            if histograma is None:
+                histograma = self.operaciones[(operacion,)] = Histograma(BUCKETS_SEGUNDOS)
+            histograma.observar(segundos)
+
+    def sumar_bytes_leidos(self, origen, cantidad):
+        if self.habilitado:
+            with self._lock:
+                self.bytes_leidos[origen] = self.bytes_leidos.get(origen, 0) + cantidad
+
+    def sumar_bytes_escritos(self, origen, cantidad):
+        if self.habilitado:
+            with self._lock:
+                self.bytes_escritos[origen] = self.bytes_escritos.get(origen, 0) + cantidad
+
+    def medir(self, operacion):
+        """Decorador: registra el tiempo de cada llamada como 'operacion'"""
+        def decorador(funcion):
+            @wraps(funcion)
+            def medida(*args, **kwargs):
+                if not self.habilitado:
+                    return funcion(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    self.registrar_operacion(operacion, time.perf_counter() - inicio)
+            return medida
+        return decorador
+
+    # ================================================================================
+    # EXPORTACIÓN
+    # ================================================================================
+
+    def como_dict(self):
+        with self._lock:
+            return {
+                'habilitado': self.habilitado,
+                'segundos_activo': round(time.time() - self.inicio, 3),
+                'http': {
+                    'solicitudes': [
+                        {'ruta': r, 'metodo': m, 'estado': e, 'cantidad': n}
+                        for (r, m, e), n in sorted(self.solicitudes.items())
+                    ],
+                    'errores': [
+                        {'ruta': r, 'metodo': m, 'cantidad': n} for (r, m), n in sorted(self.errores.items())
+                    ],
+                    'latencia_segundos': [
+                        {'ruta': r, 'metodo': m, **h.como_dict()} for (r, m), h in sorted(self.latencias.items())
+                    ],
+                    'respuesta_bytes': [
+                        {'ruta': r, 'metodo': m, **h.como_dict()} for (r, m), h in sorted(self.tamanos.items())
+                    ]
+                },
+                'almacenamiento': {
+                    'duracion_segundos': [
+                        {'operacion': o, **h.como_dict()} for (o,), h in sorted(self.operaciones.items())
+                    ],
+                    'bytes_leidos': dict(sorted(self.bytes_leidos.items())),
+                    'bytes_escritos': dict(sorted(self.bytes_escritos.items()))
+                }
+            }
+
+    def como_prometheus(self):
+        """Formato de texto de Prometheus (version 0.0.4)"""
+        lineas = []
+
+        def contador(nombre, ayuda, etiquetas, valores):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} counter')
+            for clave, valor in sorted(valores.items()):
+                clave = clave if isinstance(clave, tuple) else (clave,)
+                lineas.append(f'{nombre}{_etiquetas(etiquetas, clave)} {valor}')
+
+        def histogramas(nombre, ayuda, etiquetas, valores):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} histogram')
+            for clave, histograma in sorted(valores.items()):
+                for limite, cantidad in histograma.acumulados():
+                    le = f'le="{_formatear_limite(limite)}"'
+                    lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, clave, le)} {cantidad}')
+                lineas.append(f'{nombre}_sum{_etiquetas(etiquetas, clave)} {histograma.suma}')
+                lineas.append(f'{nombre}_count{_etiquetas(etiquetas, clave)} {histograma.total}')
+
+        with self._lock:
+            contador('padel_http_solicitudes_total', 'Solicitudes atendidas',
+                     ('ruta', 'metodo', 'estado'), self.solicitudes)
+            contador('padel_http_errores_total', 'Solicitudes con estado >= 400',
+                     ('ruta', 'metodo'), self.errores)
+            histogramas('padel_http_duracion_segundos', 'Latencia por ruta',
+                        ('ruta', 'metodo'), self.latencias)
+            histogramas('padel_http_respuesta_bytes', 'Tamaño de la respuesta por ruta',
+                        ('ruta', 'metodo'), self.tamanos)
+            histogramas('padel_almacenamiento_duracion_segundos', 'Tiempo de cada operación del almacenamiento',
+                        ('operacion',), self.operaciones)
+            contador('padel_almacenamiento_bytes_leidos_total', 'Bytes leídos por archivo o tabla',
+                     ('origen',), self.bytes_leidos)
+            contador('padel_almacenamiento_bytes_escritos_total', 'Bytes escritos por archivo o tabla',
+                     ('origen',), self.bytes_escritos)
+        return '\n'.join(lineas) + '\n'
+
+
+# ================================================================================
+# INTEGRACIÓN CON FLASK
+# ================================================================================
+
+def instalar(app, registro):
+    """Registra los hooks before/after_request que miden cada solicitud"""
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_medicion():
+        if registro.habilitado:
+            g.inicio_solicitud = time.perf_counter()
+
+    @app.after_request
+    def _registrar_medicion(response):
+        inicio = g.pop('inicio_solicitud', None)
+        if inicio is not None:
+            ruta = request.url_rule.rule if request.url_rule is not None else 'sin_ruta'
+            # Las respuestas en streaming no tienen largo conocido
+            tamano = None if response.is_streamed else response.content_length
+            registro.registrar_solicitud(ruta, request.method, response.status_code,
+                                         time.perf_counter() - inicio, tamano)
+        return response
+
+
+# Registro compartido por todo el proceso
+metricas = RegistroMetricas(habilitado=os.environ.get('PADEL_METRICAS', '1') != '0')
@@ -0,0 +1,368 @@
+"""
+Registro de Clientes - Generador de Seriales
+Clientes y seriales generados por el administrador, en una base SQLite
+(registro_clientes.db) en lugar de registro_clientes.json:
+
+- Agregar un cliente inserta una fila; no se relee ni se reescribe todo el registro
+- agregar_lote() guarda cientos de clientes en una sola transacción
+  (o todos o ninguno)
+- importar_json() trae los datos de registro_clientes.json; se hace solo la
+  primera vez que se abre una base vacía con el JSON al lado (el JSON no se borra)
+- exportar_json() genera el mismo JSON de siempre para consultarlo o respaldarlo
+- buscar_ids() busca por prefijo (nombre, apellido, contacto, serial_id o
+  fecha de expiración) con índices, filtra y ordena sin leer los registros;
+  nombre, apellido y contacto se comparan sin mayúsculas ni acentos
+  (columnas *_busqueda, ver normalizar());
+  obtener_varios() trae solo las filas que se van a mostrar
+
+Uso:
+    python registro_clientes.py importar [--json registro_clientes.json] [--db registro_clientes.db]
+    python registro_clientes.py exportar [--json registro_clientes.json] [--db registro_clientes.db]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+from bloqueos import PorRuta, TransaccionSQLite, escribir_atomico
+
+
+ARCHIVO_REGISTRO = 'registro_clientes.db'
+ARCHIVO_JSON = 'registro_clientes.json'
+
+# Campos de cada registro (mismo orden y nombres que registro_clientes.json)
+CAMPOS = ('id', 'nombre', 'apellido', 'nombre_completo', 'contacto', 'tipo_plan', 'dias',
+          'fecha_generacion', 'fecha_expiracion', 'serial', 'serial_id', 'activo')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS clientes (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    apellido TEXT NOT NULL,
+    nombre_completo TEXT NOT NULL,
+    contacto TEXT NOT NULL,
+    tipo_plan TEXT NOT NULL,
+    dias INTEGER NOT NULL,
+    fecha_generacion TEXT NOT NULL,
+    fecha_expiracion TEXT NOT NULL,
+    serial TEXT NOT NULL,
+    serial_id TEXT NOT NULL UNIQUE,
+    activo INTEGER NOT NULL DEFAULT 1,
+    nombre_busqueda TEXT NOT NULL DEFAULT '',
+    apellido_busqueda TEXT NOT NULL DEFAULT '',
+    contacto_busqueda TEXT NOT NULL DEFAULT ''
+);
+"""
+
+# Se crean después de completar las columnas *_busqueda en bases viejas (ver _migrar)
+INDICES = """
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre_busqueda ON clientes(nombre_busqueda);
+CREATE INDEX IF NOT EXISTS idx_clientes_apellido_busqueda ON clientes(apellido_busqueda);
+CREATE INDEX IF NOT EXISTS idx_clientes_contacto_busqueda ON clientes(contacto_busqueda);
+CREATE INDEX IF NOT EXISTS idx_clientes_expiracion ON clientes(fecha_expiracion);
+"""
+
+# Columna normalizada -> columna original (la primera versión de la base no las tenía)
+COLUMNAS_NORMALIZADAS = (
+    ('nombre_busqueda', 'nombre_completo'),
+    ('apellido_busqueda', 'apellido'),
+    ('contacto_busqueda', 'contacto')
+)
+# Índices COLLATE NOCASE de la primera versión (solo plegaban ASCII)
+INDICES_VIEJOS = ('idx_clientes_nombre', 'idx_clientes_apellido', 'idx_clientes_contacto')
+
+# Columnas de la búsqueda por prefijo (cada una con su índice); el prefijo se
+# normaliza igual que las columnas *_busqueda
+COLUMNAS_BUSQUEDA = (
+    'nombre_busqueda',
+    'apellido_busqueda',
+    'contacto_busqueda',
+    'serial_id',                    # Índice del UNIQUE; hexadecimal en minúsculas
+    'fecha_expiracion'              # AAAA-MM-DD
+)
+COLUMNAS_TEXTO = ('nombre', 'apellido', 'nombre_completo', 'contacto', 'tipo_plan')
+FILTROS = ('todos', 'por_vencer', 'inactivas')
+DIAS_POR_VENCER = 30
+_FIN_PREFIJO = '\U0010ffff'         # Mayor que cualquier caracter: prefijo <= x < prefijo + esto
+
+
+def normalizar(texto):
+    """
+    Texto para comparar en la búsqueda: sin acentos ni diacríticos y sin
+    mayúsculas (casefold), para cualquier alfabeto
+    Ejemplo: 'Ápellido Núñez' -> 'apellido nunez'
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def nuevo_registro(nombre, apellido, contacto, tipo, dias, serial, datos):
+    """Registro (sin id) de un serial recién generado; datos es lo que retorna generar_serial"""
+    return {
+        'nombre': nombre,
+        'apellido': apellido,
+        'nombre_completo': f"{nombre} {apellido}",
+        'contacto': contacto,
+        'tipo_plan': tipo,
+        'dias': dias,
+        'fecha_generacion': datetime.fromisoformat(datos['fecha_inicio']).strftime('%Y-%m-%d %H:%M:%S'),
+        'fecha_expiracion': datos['fecha_expiracion'][:10],
+        'serial': serial,
+        'serial_id': datos['serial_id'],
+        'activo': True
+    }
+
+
+def _fila(registro):
+    """Valores para el INSERT (sin id); completa campos que faltan en registros viejos"""
+    nombre = registro.get('nombre', '')
+    apellido = registro.get('apellido', '')
+    nombre_completo = registro.get('nombre_completo') or f"{nombre} {apellido}".strip()
+    contacto = registro.get('contacto', '')
+    return (
+        nombre,
+        apellido,
+        nombre_completo,
+        contacto,
+        registro.get('tipo_plan', ''),
+        int(registro.get('dias') or 0),
+        registro.get('fecha_generacion', ''),
+        registro.get('fecha_expiracion', ''),
+        registro.get('serial', ''),
+        registro['serial_id'],
+        1 if registro.get('activo', True) else 0,
+        normalizar(nombre_completo),
+        normalizar(apellido),
+        normalizar(contacto)
+    )
+
+
+_COLUMNAS_INSERTAR = ('nombre, apellido, nombre_completo, contacto, tipo_plan, dias, fecha_generacion, '
+                      'fecha_expiracion, serial, serial_id, activo, '
+                      'nombre_busqueda, apellido_busqueda, contacto_busqueda')
+_INSERTAR = f'INSERT INTO clientes ({_COLUMNAS_INSERTAR}) VALUES ({", ".join("?" * 14)})'
+_INSERTAR_CON_ID = f'INSERT INTO clientes (id, {_COLUMNAS_INSERTAR}) VALUES ({", ".join("?" * 15)})'
+
+
+class RegistroClientes:
+    """Clientes registrados por el generador de seriales"""
+
+    def __init__(self, ruta_db, archivo_json=None):
+        self.ruta_db = ruta_db
+        # Una conexión por thread (la generación por lote corre fuera del thread de Tk)
+        self._local = threading.local()
+        conexion = self._conexion()
+        conexion.executescript(ESQUEMA)
+        self._migrar()
+        conexion.executescript(INDICES)
+        if archivo_json and os.path.exists(archivo_json) and self.cantidad() == 0:
+            self.importar_json(archivo_json)
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    def _transaccion(self):
+        return TransaccionSQLite(self._conexion())
+
+    def _migrar(self):
+        """Agrega y completa las columnas *_busqueda en una base de la primera versión"""
+        def columnas_faltantes(conexion):
+            existentes = {fila[1] for fila in conexion.execute('PRAGMA table_info(clientes)')}
+            return [(columna, origen) for columna, origen in COLUMNAS_NORMALIZADAS if columna not in existentes]
+
+        if not columnas_faltantes(self._conexion()):
+            return
+        self._conexion().create_function('normalizar', 1, normalizar, deterministic=True)
+        with self._transaccion() as conexion:
+            # Otro proceso pudo migrarla mientras se esperaba el lock
+            faltantes = columnas_faltantes(conexion)
+            if not faltantes:
+                return
+            for columna, _ in faltantes:
+                conexion.execute(f"ALTER TABLE clientes ADD COLUMN {columna} TEXT NOT NULL DEFAULT ''")
+            conexion.execute('UPDATE clientes SET ' + ', '.join(
+                f'{columna} = normalizar({origen})' for columna, origen in faltantes))
+            for indice in INDICES_VIEJOS:
+                conexion.execute(f'DROP INDEX IF EXISTS {indice}')
+
+    def cerrar(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+
+    # ============================================================
+    # Consultas
+    # ============================================================
+
+    @staticmethod
+    def _como_dict(fila):
+        registro = dict(zip(CAMPOS, fila))
+        registro['activo'] = bool(registro['activo'])
+        return registro
+
+    def cantidad(self):
+        return self._conexion().execute('SELECT COUNT(*) FROM clientes').fetchone()[0]
+
+    def todos(self):
+        """Todos los registros, por id"""
+        return [self._como_dict(fila) for fila in self._conexion().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM clientes ORDER BY id"
+        )]
+
+    def obtener_varios(self, ids):
+        """{id: registro} de esos ids (los que existan)"""
+        if not ids:
+            return {}
+        filas = self._conexion().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM clientes WHERE id IN ({', '.join('?' * len(ids))})",
+            list(ids)
+        )
+        return {fila[0]: self._como_dict(fila) for fila in filas}
+
+    def buscar_ids(self, texto='', filtro='todos', orden='id', descendente=False, hoy=None):
+        """
+        ids que cumplen la búsqueda y el filtro, en el orden pedido
+        texto: prefijo de nombre, apellido, contacto, serial_id o fecha de expiración
+        filtro: 'todos', 'por_vencer' (vence en DIAS_POR_VENCER días) o
+        'inactivas' (vencidas o desactivadas)
+        """
+        if filtro not in FILTROS:
+            raise ValueError(f"Filtro desconocido: {filtro}")
+        if orden not in CAMPOS:
+            raise ValueError(f"Columna desconocida: {orden}")
+        hoy = hoy or datetime.now()
+        condiciones = []
+        parametros = []
+
+        texto = texto.strip()
+        if texto:
+            # Un rango por columna: cada uno se resuelve con su índice (OR de índices)
+            prefijo = normalizar(texto)
+            rangos = []
+            for columna in COLUMNAS_BUSQUEDA:
+                rangos.append(f"({columna} >= ? AND {columna} < ?)")
+                parametros += [prefijo, prefijo + _FIN_PREFIJO]
+            condiciones.append('(' + ' OR '.join(rangos) + ')')
+
+        fecha_hoy = hoy.strftime('%Y-%m-%d')
+        if filtro == 'por_vencer':
+            condiciones.append('activo = 1 AND fecha_expiracion >= ? AND fecha_expiracion <= ?')
+            parametros += [fecha_hoy, (hoy + timedelta(days=DIAS_POR_VENCER)).strftime('%Y-%m-%d')]
+        elif filtro == 'inactivas':
+            condiciones.append('(activo = 0 OR fecha_expiracion < ?)')
+            parametros.append(fecha_hoy)
+
+        sentido = 'DESC' if descendente else 'ASC'
+        consulta = 'SELECT id FROM clientes'
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        # Con condiciones, '+' evita que SQLite recorra toda la tabla en el orden
+        # pedido (índice o id) en lugar de usar los índices de la búsqueda
+        mas = '+' if condiciones else ''
+        comparacion = ' COLLATE NOCASE' if orden in COLUMNAS_TEXTO else ''
+        consulta += f" ORDER BY {mas}{orden}{comparacion} {sentido}, {mas}id {sentido}"
+        return [fila[0] for fila in self._conexion().execute(consulta, parametros)]
+
+    # ============================================================
+    # Escrituras
+    # ============================================================
+
+    def agregar(self, registro):
+        """Guarda un registro (ver nuevo_registro) y retorna su id"""
+        return self.agregar_lote([registro])[0]['id']
+
+    def agregar_lote(self, registros):
+        """
+        Guarda todos los registros en una sola transacción (o ninguno si falla)
+        Retorna los registros con el id asignado
+        """
+        guardados = []
+        with self._transaccion() as conexion:
+            for registro in registros:
+                cursor = conexion.execute(_INSERTAR, _fila(registro))
+                guardados.append({'id': cursor.lastrowid, **registro})
+        return guardados
+
+    def importar_json(self, archivo_json):
+        """
+        Importa registro_clientes.json en una sola transacción
+        Los serial_id que ya están en la base no se tocan; retorna cuántos se agregaron
+        """
+        with open(archivo_json, 'r', encoding='utf-8') as f:
+            try:
+                registros = json.load(f)
+            except json.JSONDecodeError:
+                # Archivo vacío o contenido inválido (el generador lo trataba como vacío)
+                registros = []
+        if not isinstance(registros, list):
+            registros = []
+        agregados = 0
+        with self._transaccion() as conexion:
+            for registro in registros:
+                if not isinstance(registro, dict) or not registro.get('serial_id'):
+                    continue
+                if conexion.execute('SELECT 1 FROM clientes WHERE serial_id = ?',
+                                    (registro['serial_id'],)).fetchone():
+                    continue
+                # Se conserva el id del JSON salvo que ya esté ocupado (se asigna uno nuevo)
+                id_registro = registro.get('id')
+                if id_registro is not None and conexion.execute('SELECT 1 FROM clientes WHERE id = ?',
+                                                                (id_registro,)).fetchone():
+                    id_registro = None
+                conexion.execute(_INSERTAR_CON_ID, (id_registro,) + _fila(registro))
+                agregados += 1
+        return agregados
+
+    def exportar_json(self, archivo_json):
+        """Escribe todo el registro en el formato de registro_clientes.json; retorna la cantidad"""
+        registros = self.todos()
+        escribir_atomico(archivo_json, lambda f: json.dump(registros, f, indent=2, ensure_ascii=False))
+        return len(registros)
+
+
+_registros = PorRuta(RegistroClientes)
+
+
+def registro_para(ruta_db=ARCHIVO_REGISTRO, archivo_json=ARCHIVO_JSON):
+    """RegistroClientes de esa base (importa archivo_json si la base está vacía)"""
+    return _registros.obtener(ruta_db, archivo_json)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Registro de clientes - Generador de Seriales')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    importar = sub.add_parser('importar', help='Importa registro_clientes.json a la base')
+    exportar = sub.add_parser('exportar', help='Escribe la base en registro_clientes.json')
+    for comando in (importar, exportar):
+        comando.add_argument('--json', default=ARCHIVO_JSON, help='Archivo JSON')
+        comando.add_argument('--db', default=ARCHIVO_REGISTRO, help='Base SQLite del registro')
+    args = parser.parse_args(argv)
+
+    registro = RegistroClientes(args.db)
+    try:
+        if args.comando == 'importar':
+            agregados = registro.importar_json(args.json)
+            print(f"✅ Importados {agregados} clientes ({registro.cantidad()} en total) en {args.db}")
+        else:
+            cantidad = registro.exportar_json(args.json)
+            print(f"✅ Exportados {cantidad} clientes a {args.json}")
+    finally:
+        registro.cerrar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Registro de Seriales Usados - Sistema de Turnos de Pádel
+Qué serial se activó en qué computadora (hardware_id), en una base SQLite
+indexada en lugar de seriales_usados.json:
+
+- Buscar un serial es una consulta por clave primaria (no se lee el archivo entero)
+- Activar agrega o actualiza una sola fila dentro de una transacción
+  (BEGIN IMMEDIATE): verificar y marcar son un solo paso, también entre procesos
+- importar_json() trae los datos de seriales_usados.json; se hace solo la
+  primera vez que se abre una base vacía con el JSON al lado (el JSON no se borra)
+
+Uso:
+    python registro_seriales.py importar [--json seriales_usados.json] [--db seriales_usados.db]
+    python registro_seriales.py buscar SERIAL_ID [--db seriales_usados.db]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from bloqueos import PorRuta, TransaccionSQLite
+
+
+ARCHIVO_REGISTRO = 'seriales_usados.db'
+ARCHIVO_JSON = 'seriales_usados.json'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS seriales_usados (
+    serial_id TEXT PRIMARY KEY,
+    hardware_id TEXT,
+    fecha_activacion TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_seriales_hardware ON seriales_usados(hardware_id);
+"""
+
+
+class RegistroSeriales:
+    """Seriales activados (serial_id -> hardware_id, fecha_activacion)"""
+
+    def __init__(self, ruta_db, archivo_json=None):
+        self.ruta_db = ruta_db
+        # Una conexión por thread (Flask atiende cada solicitud en su thread)
+        self._local = threading.local()
+        conexion = self._conexion()
+        conexion.executescript(ESQUEMA)
+        if archivo_json and os.path.exists(archivo_json) and self.cantidad() == 0:
+            self.importar_json(archivo_json)
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    def _transaccion(self):
+        return TransaccionSQLite(self._conexion())
+
+    def cerrar(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+
+    # ============================================================
+    # Consultas
+    # ============================================================
+
+    def obtener(self, serial_id):
+        """{'hardware_id', 'fecha_activacion'} del serial, o None si nunca se usó"""
+        fila = self._conexion().execute(
+            'SELECT hardware_id, fecha_activacion FROM seriales_usados WHERE serial_id = ?', (serial_id,)
+        ).fetchone()
+        if fila is None:
+            return None
+        return {'hardware_id': fila[0], 'fecha_activacion': fila[1]}
+
+    def esta_usado(self, serial_id):
+        return self._conexion().execute(
+            'SELECT 1 FROM seriales_usados WHERE serial_id = ?', (serial_id,)
+        ).fetchone() is not None
+
+    def seriales_de(self, hardware_id):
+        """serial_id activados en esa computadora"""
+        return [fila[0] for fila in self._conexion().execute(
+            'SELECT serial_id FROM seriales_usados WHERE hardware_id = ? ORDER BY fecha_activacion',
+            (hardware_id,)
+        )]
+
+    def cantidad(self):
+        return self._conexion().execute('SELECT COUNT(*) FROM seriales_usados').fetchone()[0]
+
+    # ============================================================
+    # Escrituras
+    # ============================================================
+
+    def marcar(self, serial_id, hardware_id, fecha_activacion=None):
+        """Registra (o actualiza) la activación del serial"""
+        with self._transaccion() as conexion:
+            conexion.execute(
+                'INSERT OR REPLACE INTO seriales_usados (serial_id, hardware_id, fecha_activacion) VALUES (?, ?, ?)',
+                (serial_id, hardware_id, fecha_activacion or datetime.now().isoformat())
+            )
+
+    def activar(self, serial_id, hardware_id):
+        """
+        Verifica y marca en un solo paso
+        Retorna (True, None) si el serial estaba libre o ya era de esta
+        computadora (reinstalación), (False, hardware_id previo) si no
+        """
+        with self._transaccion() as conexion:
+            fila = conexion.execute(
+                'SELECT hardware_id FROM seriales_usados WHERE serial_id = ?', (serial_id,)
+            ).fetchone()
+            if fila is not None and fila[0] != hardware_id:
+                return False, fila[0]
+            conexion.execute(
+                'INSERT OR REPLACE INTO seriales_usados (serial_id, hardware_id, fecha_activacion) VALUES (?, ?, ?)',
+                (serial_id, hardware_id, datetime.now().isoformat())
+            )
+        return True, None
+
+    def importar_json(self, archivo_json):
+        """
+        Importa seriales_usados.json en una sola transacción
+        Los seriales que ya están en la base no se tocan; retorna cuántos se agregaron
+        """
+        with open(archivo_json, 'r', encoding='utf-8') as f:
+            usados = json.load(f)
+        filas = [
+            (serial_id, datos.get('hardware_id'), datos.get('fecha_activacion') or datetime.now().isoformat())
+            for serial_id, datos in usados.items()
+        ]
+        with self._transaccion() as conexion:
+            antes = conexion.total_changes
+            conexion.executemany(
+                'INSERT OR IGNORE INTO seriales_usados (serial_id, hardware_id, fecha_activacion) VALUES (?, ?, ?)',
+                filas
+            )
+            return conexion.total_changes - antes
+
+
+_registros = PorRuta(RegistroSeriales)
+
+
+def registro_para(ruta_db=ARCHIVO_REGISTRO, archivo_json=ARCHIVO_JSON):
+    """RegistroSeriales de esa base (importa archivo_json si la base está vacía)"""
+    return _registros.obtener(ruta_db, archivo_json)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Registro de seriales usados - Sistema de Turnos Pádel')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    importar = sub.add_parser('importar', help='Importa seriales_usados.json a la base indexada')
+    importar.add_argument('--json', default=ARCHIVO_JSON, help='Archivo JSON a importar')
+    importar.add_argument('--db', default=ARCHIVO_REGISTRO, help='Base SQLite del registro')
+    buscar = sub.add_parser('buscar', help='Muestra en qué computadora se activó un serial')
+    buscar.add_argument('serial_id')
+    buscar.add_argument('--db', default=ARCHIVO_REGISTRO, help='Base SQLite del registro')
+    args = parser.parse_args(argv)
+
+    registro = RegistroSeriales(args.db)
+    try:
+        if args.comando == 'importar':
+            agregados = registro.importar_json(args.json)
+            print(f"✅ Importados {agregados} seriales ({registro.cantidad()} en total) en {args.db}")
+        else:
+            datos = registro.obtener(args.serial_id)
+            if datos is None:
+                print("Serial sin activar")
+                return 1
+            print(f"Activado en {datos['hardware_id']} el {datos['fecha_activacion']}")
+    finally:
+        registro.cerrar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
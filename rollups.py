@@ -0,0 +1,91 @@
+"""
+Rollups Financieros Diarios - Sistema de Turnos de Pádel
+Totales por día (turnos regulares/fijos, recaudado, descuentos, extras)
+materializados en el almacenamiento, para que los reportes mensuales y
+anuales sumen una fila por día en lugar de recalcular todo desde los datos.
+
+Mantenimiento:
+- Reserva, cancelación, ausencia o productos de una reserva: se recalcula
+  la fila de esa fecha en el momento
+- Alta/baja/productos de un turno fijo: se descartan las filas de ese día de
+  la semana (se vuelven a calcular la próxima vez que se pidan)
+- Cambio de configuración o reemplazo completo de datos (backup): se
+  descartan todas
+- Días todavía no materializados: se calculan al pedir el reporte y se guardan
+
+Los cálculos se hacen sin lock (un reporte anual nunca demora a una reserva).
+Antes de calcular se lee almacenamiento.version_rollups(), que sale de los
+datos compartidos (no de la memoria del proceso), y el almacenamiento solo
+guarda las filas si esa versión sigue igual al momento de escribir
+(comprobación y escritura atómicas). Así una fila con datos viejos nunca
+pisa a la recalculada después, aunque las calcule otro proceso de
+servidor.py --procesos.
+"""
+
+from finanzas import AcumuladorFinanzas, calcular_filas_diarias
+
+
+class RollupsFinanzas:
+    """Resumen financiero por rango servido desde las filas diarias"""
+
+    def __init__(self, almacenamiento, indice_turnos):
+        self.almacenamiento = almacenamiento
+        self.indice_turnos = indice_turnos
+
+    def _calcular(self, fecha_desde, fecha_hasta):
+        return calcular_filas_diarias(
+            fecha_desde, fecha_hasta,
+            self.almacenamiento.cargar_turnos_fijos(solo_lectura=True),
+            self.almacenamiento.obtener_reservas_rango(fecha_desde, fecha_hasta),
+            self.indice_turnos.obtener().claves_ausentes,
+            self.almacenamiento.cargar_config(solo_lectura=True)
+        )
+
+    def filas(self, fecha_desde, fecha_hasta, fechas):
+        """
+        {fecha: fila} de todas las fechas pedidas (lista ordenada dentro del rango);
+        las que faltan se calculan en una sola pasada y se guardan
+        """
+        filas = self.almacenamiento.cargar_rollups(fecha_desde, fecha_hasta)
+        faltantes = [fecha for fecha in fechas if fecha not in filas]
+        if faltantes:
+            version = self.almacenamiento.version_rollups()
+            # Con una instantánea fijada que ya no es la vigente (después de
+            # leer la versión), lo calculado sirve para este reporte pero no se guarda
+            guardar = self.almacenamiento.instantanea_vigente()
+            nuevas = self._calcular(faltantes[0], faltantes[-1])
+            nuevas = {fecha: nuevas[fecha] for fecha in faltantes}
+            if guardar:
+                self.almacenamiento.guardar_rollups(nuevas, version)
+            filas.update(nuevas)
+        return filas
+
+    def resumen(self, fechas, config):
+        """Resumen del reporte (mismo formato que finanzas.calcular_reporte) para esas fechas"""
+        if not fechas:
+            return AcumuladorFinanzas().resumen(config)
+        filas = self.filas(fechas[0], fechas[-1], fechas)
+        acumulador = AcumuladorFinanzas()
+        for fecha in fechas:
+            acumulador.sumar_fila(filas[fecha])
+        return acumulador.resumen(config)
+
+    # ================================================================================
+    # INVALIDACIÓN (llamar después de modificar los datos)
+    # ================================================================================
+
+    def fecha_modificada(self, fecha):
+        """Recalcula la fila de una fecha (reserva, cancelación, ausencia, productos)"""
+        version = self.almacenamiento.version_rollups()
+        if not self.almacenamiento.guardar_rollups(self._calcular(fecha, fecha), version):
+            # Otra modificación llegó durante el cálculo (la guarda quien la hizo):
+            # la fila anterior a esta modificación no puede quedar
+            self.almacenamiento.borrar_rollups(fechas=[fecha])
+
+    def dia_semana_modificado(self, dia_semana):
+        """Descarta las filas de un día de la semana (cambió un turno fijo)"""
+        self.almacenamiento.borrar_rollups(dia_semana=dia_semana)
+
+    def invalidar(self):
+        """Descarta todas las filas (configuración o datos reemplazados)"""
+        self.almacenamiento.borrar_rollups()
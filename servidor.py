@@ -0,0 +1,386 @@
+"""
+Servidor de Producción - Sistema de Turnos de Pádel
+Sirve la app Flask para varios mostradores (en lugar del servidor de
+desarrollo de Werkzeug, que crea un thread por conexión sin límite).
+
+- Pool de threads acotado: a lo sumo `hilos` conexiones se atienden a la
+  vez; las demás esperan en la cola del socket hasta que se libere uno
+- HTTP/1.1 con keep-alive: el navegador reusa la conexión entre
+  solicitudes; una conexión inactiva se cierra a los TIEMPO_INACTIVIDAD s
+- Varios procesos trabajadores (opcional) aceptando conexiones del mismo
+  socket; todos usan la misma carpeta de datos (los locks entre procesos de
+  bloqueos.py ya lo permiten)
+- Cierre ordenado (SIGINT/SIGTERM o detener()): deja de aceptar
+  conexiones, termina las solicitudes en curso y cierra el almacenamiento
+- Arranque en dos pasos: el socket se abre enseguida (con puerto 0 el
+  sistema elige uno libre) y la app se importa en segundo plano;
+  esperar_listo() avisa cuando ya puede atender, sin esperas fijas
+
+Uso (sin ventana):
+    python servidor.py [--host 0.0.0.0] [--puerto 5000] [--hilos 16] [--procesos 1]
+Con ventana: python app_escritorio.py acepta las mismas opciones.
+"""
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream
+
+import bitacora
+
+
+HOST = '127.0.0.1'
+PUERTO = 5000
+HILOS = 16                  # Conexiones atendidas a la vez por proceso
+PROCESOS = 1
+TIEMPO_INACTIVIDAD = 5      # Segundos que una conexión keep-alive espera la próxima solicitud
+COLA_CONEXIONES = 128       # Conexiones pendientes en el socket (listen)
+ESPERA_TRABAJADORES = 30    # Segundos que se espera a cada proceso al detener
+
+
+class ManejadorHTTP(WSGIRequestHandler):
+    """
+    Solicitudes HTTP/1.1 con keep-alive (la conexión se reusa mientras haya solicitudes)
+    Werkzeug cierra siempre la conexión porque no sabe descartar el cuerpo que
+    la app no leyó; acá la app lee de un LimitedStream del tamaño del cuerpo y
+    lo que sobra se descarta antes de esperar la próxima solicitud
+    """
+
+    protocol_version = 'HTTP/1.1'
+    timeout = TIEMPO_INACTIVIDAD
+
+    def run_wsgi(self):
+        largo = self.headers.get('Content-Length', '0').strip()
+        if 'Transfer-Encoding' in self.headers or not largo.isdigit():
+            # Cuerpo chunked o sin largo válido: no se sabe dónde termina
+            self.close_connection = True
+            return super().run_wsgi()
+
+        original = self.rfile
+        cuerpo = self.rfile = LimitedStream(original, int(largo))
+        try:
+            super().run_wsgi()
+        finally:
+            self.rfile = original
+        if not self.close_connection:
+            try:
+                cuerpo.exhaust()
+            except (OSError, ValueError):
+                self.close_connection = True
+
+    def send_header(self, keyword, value):
+        # Werkzeug manda siempre 'Connection: close'; solo se respeta si hay que cerrar
+        if keyword.lower() == 'connection' and value.lower() == 'close':
+            if self.server.cerrando:
+                self.close_connection = True
+            if not self.close_connection:
+                return
+        super().send_header(keyword, value)
+
+    def log_error(self, formato, *args):
+        # Que una conexión keep-alive venza por inactividad no es un error
+        if formato.startswith('Request timed out'):
+            return
+        super().log_error(formato, *args)
+
+
+class ServidorPool(BaseWSGIServer):
+    """Servidor WSGI que atiende cada conexión en un pool de `hilos` threads"""
+
+    multithread = True
+    request_queue_size = COLA_CONEXIONES
+
+    def __init__(self, host, puerto, app, hilos=HILOS, fd=None, multiproceso=False):
+        self.multiprocess = multiproceso
+        self.hilos = hilos
+        self.cerrando = False
+        self._libres = threading.BoundedSemaphore(hilos)
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='padel-http')
+        super().__init__(host, puerto, app, handler=ManejadorHTTP, fd=fd)
+
+    def process_request(self, request, client_address):
+        # Sin thread libre no se aceptan más conexiones: esperan en la cola del socket
+        self._libres.acquire()
+        try:
+            self._pool.submit(self._atender, request, client_address)
+        except BaseException:
+            self._libres.release()
+            self.shutdown_request(request)
+            raise
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._libres.release()
+
+    def serve_forever(self, poll_interval=0.5):
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            # Ya no se aceptan conexiones: terminar las solicitudes en curso
+            self._pool.shutdown(wait=True)
+
+    def detener(self):
+        """Deja de aceptar conexiones y espera que termine serve_forever (desde otro thread)"""
+        if self.cerrando:
+            return
+        self.cerrando = True
+        self.shutdown()
+
+
+def crear_servidor(app, host=HOST, puerto=PUERTO, hilos=HILOS, fd=None, multiproceso=False):
+    """ServidorPool escuchando en host:puerto (o en el socket `fd` ya abierto)"""
+    # Sin un renglón por solicitud en la consola: /api/metrics ya las cuenta
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    return ServidorPool(host, puerto, app, hilos, fd=fd, multiproceso=multiproceso)
+
+
+def _abrir_socket(host, puerto):
+    """Socket de escucha (puerto 0: el sistema elige uno libre)"""
+    familia = socket.AF_INET6 if ':' in host else socket.AF_INET
+    return socket.create_server((host, puerto), family=familia, backlog=COLA_CONEXIONES)
+
+
+def _preparar_app(modulo):
+    """Importa la app y llama a su precalentar() si la define (plantillas de la primera página)"""
+    aplicacion = importlib.import_module(modulo)
+    precalentar = getattr(aplicacion, 'precalentar', None)
+    if precalentar is not None:
+        precalentar()
+    return aplicacion
+
+
+def cerrar_almacenamiento(modulo='app'):
+    """Cierra el almacenamiento de la app ya importada (conexiones SQLite, diario)"""
+    almacenamiento = getattr(sys.modules.get(modulo), 'almacenamiento', None)
+    if almacenamiento is not None:
+        almacenamiento.cerrar()
+
+
+# ================================================================================
+# SERVICIO EN MARCHA
+# ================================================================================
+# Los dos servicios (un proceso o varios) tienen la misma interfaz:
+# - puerto: se conoce apenas se crea el servicio (el socket se abre primero)
+# - preparar(): importa la app en segundo plano, todavía sin atender
+# - habilitar(): empieza a atender (las conexiones que llegaron antes esperan en la cola)
+# - esperar_listo(): bloquea hasta que la app está importada y precalentada
+# - detener() / esperar()
+
+class ServicioHilos:
+    """Un proceso: la app se importa y se sirve en un thread (pool de `hilos`)"""
+
+    def __init__(self, host=HOST, puerto=PUERTO, hilos=HILOS, modulo='app'):
+        self.host = host
+        self.hilos = hilos
+        self.modulo = modulo
+        self.servidor = None
+        self.error = None
+        self._escucha = _abrir_socket(host, puerto)
+        self.puerto = self._escucha.getsockname()[1]
+        self._lock = threading.Lock()
+        self._listo = threading.Event()
+        self._habilitado = threading.Event()
+        self._detenido = False
+        self._sirviendo = False
+        self._hilo = threading.Thread(target=self._servir, name='padel-servidor', daemon=True)
+
+    def _servir(self):
+        try:
+            aplicacion = _preparar_app(self.modulo)
+            self.servidor = crear_servidor(aplicacion.app, self.host, self.puerto, self.hilos,
+                                           fd=self._escucha.fileno())
+        except BaseException as e:
+            self.error = e
+            return
+        finally:
+            self._escucha.close()
+            self._listo.set()
+
+        self._habilitado.wait()
+        with self._lock:
+            if self._detenido:
+                self.servidor.server_close()
+                return
+            self._sirviendo = True
+        self.servidor.serve_forever()
+
+    def preparar(self):
+        self._hilo.start()
+        return self
+
+    def habilitar(self):
+        self._habilitado.set()
+        return self
+
+    def esperar_listo(self, tiempo=None):
+        if not self._listo.wait(tiempo):
+            raise TimeoutError('El servidor no terminó de iniciar a tiempo')
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def detener(self):
+        with self._lock:
+            self._detenido = True
+            sirviendo = self._sirviendo
+        self._habilitado.set()
+        if sirviendo:
+            self.servidor.detener()
+
+    def esperar(self):
+        # join con tiempo: en Windows un join sin tiempo no deja llegar Ctrl+C
+        while self._hilo.is_alive():
+            self._hilo.join(0.5)
+
+
+def _trabajador(numero, escucha, host, hilos, modulo, listo, habilitado, evento_cierre):
+    """Proceso trabajador: importa la app y atiende conexiones del socket compartido"""
+    # Ctrl+C llega a todo el grupo de procesos; el que coordina el cierre es el padre
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Cada trabajador rota su propio archivo de log
+    bitacora.por_trabajador(numero)
+    aplicacion = _preparar_app(modulo)
+    servidor = crear_servidor(aplicacion.app, host, escucha.getsockname()[1], hilos,
+                              fd=escucha.fileno(), multiproceso=True)
+    escucha.close()
+    listo.set()
+
+    signal.signal(signal.SIGTERM, lambda numero, marco: evento_cierre.set())
+    vigia = threading.Thread(target=lambda: (evento_cierre.wait(), servidor.detener()), daemon=True)
+    vigia.start()
+    try:
+        habilitado.wait()
+        if not evento_cierre.is_set():
+            servidor.serve_forever()
+    finally:
+        cerrar_almacenamiento(modulo)
+
+
+class GrupoProcesos:
+    """
+    `procesos` trabajadores aceptando conexiones del mismo socket
+    Se crean con 'spawn' (nunca fork): cada uno abre su propio almacenamiento
+    """
+
+    def __init__(self, host=HOST, puerto=PUERTO, hilos=HILOS, procesos=2, modulo='app'):
+        self.host = host
+        self.hilos = hilos
+        self.modulo = modulo
+        self.cantidad = procesos
+        self._contexto = multiprocessing.get_context('spawn')
+        self._listo = self._contexto.Event()
+        self._habilitado = self._contexto.Event()
+        self._evento_cierre = self._contexto.Event()
+        self._procesos = []
+        self._escucha = _abrir_socket(host, puerto)
+        self.puerto = self._escucha.getsockname()[1]
+
+    def preparar(self):
+        for numero in range(self.cantidad):
+            proceso = self._contexto.Process(
+                target=_trabajador, name=f'padel-trabajador-{numero + 1}',
+                args=(numero + 1, self._escucha, self.host, self.hilos, self.modulo,
+                      self._listo, self._habilitado, self._evento_cierre)
+            )
+            proceso.start()
+            self._procesos.append(proceso)
+        return self
+
+    def habilitar(self):
+        self._habilitado.set()
+        return self
+
+    def esperar_listo(self, tiempo=None):
+        """Listo apenas un trabajador puede atender (los demás se suman al terminar de importar)"""
+        limite = None if tiempo is None else time.monotonic() + tiempo
+        while not self._listo.wait(0.1):
+            if not any(proceso.is_alive() for proceso in self._procesos):
+                raise RuntimeError('Los procesos trabajadores terminaron antes de estar listos')
+            if limite is not None and time.monotonic() > limite:
+                raise TimeoutError('El servidor no terminó de iniciar a tiempo')
+        return self
+
+    def detener(self):
+        self._evento_cierre.set()
+        self._habilitado.set()
+        for proceso in self._procesos:
+            proceso.join(ESPERA_TRABAJADORES)
+            if proceso.is_alive():
+                proceso.terminate()
+                proceso.join()
+        self._escucha.close()
+
+    def esperar(self):
+        while any(proceso.is_alive() for proceso in self._procesos):
+            for proceso in self._procesos:
+                proceso.join(0.5)
+
+
+# ================================================================================
+# ARRANQUE
+# ================================================================================
+
+def preparar(host=HOST, puerto=PUERTO, hilos=HILOS, procesos=PROCESOS, modulo='app'):
+    """
+    Abre el socket y empieza a importar la app en segundo plano, sin atender
+    todavía (ver habilitar()). `modulo` es el que define `app`
+    """
+    if procesos > 1:
+        return GrupoProcesos(host, puerto, hilos, procesos, modulo).preparar()
+    return ServicioHilos(host, puerto, hilos, modulo).preparar()
+
+
+def iniciar(host=HOST, puerto=PUERTO, hilos=HILOS, procesos=PROCESOS, modulo='app'):
+    """Levanta el servidor en segundo plano; retorna el servicio ya habilitado"""
+    return preparar(host, puerto, hilos, procesos, modulo).habilitar()
+
+
+def detener_con_senales(servicio):
+    """SIGINT (Ctrl+C) y SIGTERM detienen el servicio de forma ordenada"""
+    def al_recibir(numero, marco):
+        threading.Thread(target=servicio.detener, name='padel-cierre').start()
+    signal.signal(signal.SIGINT, al_recibir)
+    signal.signal(signal.SIGTERM, al_recibir)
+
+
+def agregar_argumentos(parser, host=HOST, puerto=PUERTO):
+    """Opciones del servidor (compartidas con app_escritorio.py y app.py)"""
+    parser.add_argument('--host', default=host, help='Dirección donde escuchar (0.0.0.0 = toda la red)')
+    parser.add_argument('--puerto', type=int, default=puerto, help='0 = un puerto libre cualquiera')
+    parser.add_argument('--hilos', type=int, default=HILOS, help='Conexiones atendidas a la vez por proceso')
+    parser.add_argument('--procesos', type=int, default=PROCESOS,
+                        help='Procesos trabajadores (comparten la carpeta de datos)')
+
+
+def main(argv=None, modulo='app', host=HOST):
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description='Servidor de producción del sistema de turnos')
+    agregar_argumentos(parser, host)
+    args = parser.parse_args(argv)
+
+    servicio = iniciar(args.host, args.puerto, args.hilos, args.procesos, modulo)
+    detener_con_senales(servicio)
+    servicio.esperar_listo()
+    print(f"Sirviendo en http://{args.host}:{servicio.puerto} "
+          f"({args.procesos} proceso(s) x {args.hilos} threads). Ctrl+C para detener.", flush=True)
+    servicio.esperar()
+    if args.procesos == 1:
+        cerrar_almacenamiento(modulo)
+
+
+if __name__ == '__main__':
+    main()
@@ -156,28 +156,32 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 async function actualizarTodosSemaforos() {
-    const botonesHorario = document.querySelectorAll('.horario-btn');
-    for (const btn of botonesHorario) {
-        const horario = btn.getAttribute('data-horario');
-        try {
-            const response = await fetch('/api/obtener_disponibilidad', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    horario: horario,
-                    fecha: fechaSeleccionada
-                })
-            });
-            
-            const data = await response.json();
-            if (data.success) {
-                actualizarSemaforoHorario(horario, data.canchas, btn);
-            }
-        } catch (error) {
-            console.error('Error cargando semáforo:', error);
+    // Una sola llamada trae la grilla completa del día (todos los horarios)
+    try {
+        const response = await fetch('/api/disponibilidad_dia', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                fecha: fechaSeleccionada
+            })
+        });
+        
+        const data = await response.json();
+        if (!data.success) {
+            console.error('Error cargando semáforos:', data.message);
+            return;
         }
+        
+        data.horarios.forEach(item => {
+            const btn = document.querySelector(`.horario-btn[data-horario="${item.horario}"]`);
+            if (btn) {
+                actualizarSemaforoHorario(item.horario, item.canchas, btn);
+            }
+        });
+    } catch (error) {
+        console.error('Error cargando semáforos:', error);
     }
 }
 
@@ -970,6 +974,10 @@ function obtenerSemanaActual() {
     return `${año}-W${semana.toString().padStart(2, '0')}`;
 }
 
+// Paginación del detalle de finanzas (evita cargar miles de filas de una vez)
+const TAMANO_PAGINA_FINANZAS = 100;
+let consultaFinanzasActual = null;
+
 async function cargarReporteFinanzas() {
     let fechas = {};
     let titulo = '';
@@ -1028,12 +1036,14 @@ async function cargarReporteFinanzas() {
     }
     
     try {
+        // El detalle llega de a páginas; el resumen viene solo con la primera
+        consultaFinanzasActual = fechas;
         const response = await fetch('/api/finanzas/reporte_rango', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify(fechas)
+            body: JSON.stringify({ ...fechas, limite: TAMANO_PAGINA_FINANZAS })
         });
         
         const data = await response.json();
@@ -1111,51 +1121,97 @@ function mostrarReporteFinanzas(data) {
         promocionDiv.style.display = 'none';
     }
     
-    // Detalle de turnos
+    // Detalle de turnos (primera página)
     const detalleDiv = document.getElementById('detalleFinanzas');
     if (data.detalle.length === 0) {
         detalleDiv.innerHTML = '<p style="text-align: center; color: var(--text-light); padding: 30px;">No hay turnos registrados para esta fecha</p>';
     } else {
-        let html = '<div style="display: flex; flex-direction: column; gap: 10px;">';
-        
-        data.detalle.forEach(turno => {
-            const tipoColor = turno.tipo === 'Turno Fijo' ? 'var(--success-color)' : 'var(--primary-color)';
-            const tipoIcon = turno.tipo === 'Turno Fijo' ? '🔁' : '💵';
-            const tieneExtras = turno.precio_extras && turno.precio_extras > 0;
-            
-            html += `
-                <div style="background-color: var(--card-bg); border: 2px solid var(--border-color); border-left: 5px solid ${tipoColor}; padding: 15px; border-radius: 10px;">
-                    <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
-                        <div style="flex: 1;">
-                            <div style="font-weight: bold; color: ${tipoColor}; margin-bottom: 5px;">
-                                ${tipoIcon} ${turno.tipo}
-                            </div>
-                            <div style="font-size: 0.9em; color: var(--text-light);">
-                                ⏰ ${turno.horario} | 🎾 Cancha ${turno.cancha} | 👤 ${turno.cliente}
-                            </div>
-                            ${tieneExtras ? `<div style="font-size: 0.85em; color: #17a2b8; margin-top: 5px;">
-                                🧃 ${turno.productos_extras}
-                            </div>` : ''}
-                        </div>
-                        <div style="text-align: right;">
-                            <div style="font-size: 0.85em; color: var(--text-light); text-decoration: ${turno.descuento > 0 ? 'line-through' : 'none'};">
-                                ${turno.descuento > 0 ? formatoPrecio(turno.precio_base) : ''}
-                            </div>
-                            ${turno.descuento > 0 ? `<div style="font-size: 0.85em; color: var(--warning-color);">-${formatoPrecio(turno.descuento)}</div>` : ''}
-                            <div style="font-size: 1.3em; font-weight: bold; color: var(--success-color);">
-                                ${formatoPrecio(turno.precio_final)}
-                            </div>
-                            ${tieneExtras ? `<div style="font-size: 0.9em; color: #17a2b8; margin-top: 3px;">
-                                + ${formatoPrecio(turno.precio_extras)} (extras)
-                            </div>` : ''}
-                        </div>
+        detalleDiv.innerHTML = `
+            <div id="listaDetalleFinanzas" style="display: flex; flex-direction: column; gap: 10px;"></div>
+            <button id="btnMasDetalleFinanzas" class="btn-secondary" style="display: none; margin-top: 10px; width: 100%;">
+                Cargar más
+            </button>`;
+        agregarDetalleFinanzas(data);
+    }
+}
+
+function htmlTurnoFinanzas(turno) {
+    const formatoPrecio = (monto) => {
+        return '$' + Math.round(monto).toLocaleString('es-AR');
+    };
+    
+    const tipoColor = turno.tipo === 'Turno Fijo' ? 'var(--success-color)' : 'var(--primary-color)';
+    const tipoIcon = turno.tipo === 'Turno Fijo' ? '🔁' : '💵';
+    const tieneExtras = turno.precio_extras && turno.precio_extras > 0;
+    
+    return `
+        <div style="background-color: var(--card-bg); border: 2px solid var(--border-color); border-left: 5px solid ${tipoColor}; padding: 15px; border-radius: 10px;">
+            <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
+                <div style="flex: 1;">
+                    <div style="font-weight: bold; color: ${tipoColor}; margin-bottom: 5px;">
+                        ${tipoIcon} ${turno.tipo}
                     </div>
+                    <div style="font-size: 0.9em; color: var(--text-light);">
+                        ⏰ ${turno.horario} | 🎾 Cancha ${turno.cancha} | 👤 ${turno.cliente}
+                    </div>
+                    ${tieneExtras ? `<div style="font-size: 0.85em; color: #17a2b8; margin-top: 5px;">
+                        🧃 ${turno.productos_extras}
+                    </div>` : ''}
                 </div>
-            `;
+                <div style="text-align: right;">
+                    <div style="font-size: 0.85em; color: var(--text-light); text-decoration: ${turno.descuento > 0 ? 'line-through' : 'none'};">
+                        ${turno.descuento > 0 ? formatoPrecio(turno.precio_base) : ''}
+                    </div>
+                    ${turno.descuento > 0 ? `<div style="font-size: 0.85em; color: var(--warning-color);">-${formatoPrecio(turno.descuento)}</div>` : ''}
+                    <div style="font-size: 1.3em; font-weight: bold; color: var(--success-color);">
+                        ${formatoPrecio(turno.precio_final)}
+                    </div>
+                    ${tieneExtras ? `<div style="font-size: 0.9em; color: #17a2b8; margin-top: 3px;">
+                        + ${formatoPrecio(turno.precio_extras)} (extras)
+                    </div>` : ''}
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+function agregarDetalleFinanzas(data) {
+    const lista = document.getElementById('listaDetalleFinanzas');
+    lista.insertAdjacentHTML('beforeend', data.detalle.map(htmlTurnoFinanzas).join(''));
+    
+    // Botón "Cargar más" solo si quedan páginas
+    const boton = document.getElementById('btnMasDetalleFinanzas');
+    if (data.siguiente_cursor) {
+        boton.style.display = 'block';
+        boton.disabled = false;
+        boton.onclick = () => cargarMasDetalleFinanzas(data.siguiente_cursor);
+    } else {
+        boton.style.display = 'none';
+    }
+}
+
+async function cargarMasDetalleFinanzas(cursor) {
+    const boton = document.getElementById('btnMasDetalleFinanzas');
+    boton.disabled = true;
+    try {
+        const response = await fetch('/api/finanzas/reporte_rango', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ ...consultaFinanzasActual, limite: TAMANO_PAGINA_FINANZAS, cursor: cursor })
         });
+        const data = await response.json();
         
-        html += '</div>';
-        detalleDiv.innerHTML = html;
+        if (data.success) {
+            agregarDetalleFinanzas(data);
+        } else {
+            boton.disabled = false;
+            mostrarNotificacion('❌ ' + data.message);
+        }
+    } catch (error) {
+        boton.disabled = false;
+        mostrarNotificacion('❌ Error al cargar reporte: ' + error.message);
     }
 }
 